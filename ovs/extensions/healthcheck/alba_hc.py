@@ -21,21 +21,34 @@ Alba Health Check Module
 """
 
 import os
+import re
+import sys
 import uuid
 import time
+import shutil
 import hashlib
-import subprocess
+import tempfile
+import threading
 from ovs_extensions.db.arakoon.pyrakoon.pyrakoon.compat import ArakoonNotFound, ArakoonNoMaster, ArakoonNoMasterResult
 from ovs.extensions.generic.configuration import Configuration, NotFoundException
 from ovs.extensions.generic.sshclient import SSHClient
-from ovs.extensions.generic.system import System
 from ovs.extensions.healthcheck.expose_to_cli import expose_to_cli, HealthCheckCLIRunner
-from ovs.extensions.healthcheck.helpers.albacli import AlbaCLI
+from ovs.extensions.healthcheck.helpers.albacli import AlbaCLI, AlbaCLICache
 from ovs.extensions.healthcheck.helpers.backend import BackendHelper
-from ovs.extensions.healthcheck.decorators import cluster_check
+from ovs.extensions.healthcheck.helpers.cache import CacheHelper
+from ovs.extensions.healthcheck.helpers.concurrency import ConcurrencyHelper
+from ovs.extensions.healthcheck.helpers.disksafety import DiskSafetyAggregator, DiskSafetyTimeline
+from ovs.extensions.healthcheck.decorators import cluster_check, on_request_only
 from ovs.extensions.healthcheck.helpers.exceptions import AlbaException, ConfigNotMatchedException, ConnectionFailedException, DiskNotFoundException, ObjectNotFoundException
+from ovs.extensions.healthcheck.helpers.lock import SingleExecution
 from ovs.extensions.healthcheck.helpers.network import NetworkHelper
+from ovs.extensions.healthcheck.helpers.poller import Poller
 from ovs.extensions.healthcheck.helpers.service import ServiceHelper
+from ovs.extensions.healthcheck.helpers.statistics import StatisticsHelper
+from ovs.extensions.healthcheck.helpers.storagerouter import StoragerouterHelper
+from ovs.extensions.healthcheck.helpers.topology import BackendTopology
+from ovs.extensions.healthcheck.metrics import CheckMetrics
+from ovs.extensions.healthcheck.result import HCResults
 from ovs.extensions.services.servicefactory import ServiceFactory
 from ovs.lib.helpers.toolbox import Toolbox
 
@@ -46,31 +59,70 @@ class AlbaHealthCheck(object):
     """
     MODULE = 'alba'
     TEMP_FILE_SIZE = 1024 ** 2
-    LOCAL_SR = System.get_my_storagerouter()
-    LOCAL_ID = System.get_my_machine_id()
-    TEMP_FILE_LOC = '/tmp/ovs-hc.xml'  # to be put in alba file
-    TEMP_FILE_FETCHED_LOC = '/tmp/ovs-hc-fetched.xml'  # fetched (from alba) file location
+    TEMP_FILE_CHUNK_SIZE = 64 * 1024  # generated and hashed per chunk
+    TEMP_FILE_NAME = 'ovs-hc.xml'  # to be put in alba file
+    TEMP_FILE_FETCHED_NAME = 'ovs-hc-fetched.xml'  # fetched (from alba) file name, prefixed with the object key
     NAMESPACE_TIMEOUT = 30  # in seconds
+    NAMESPACE_POLL_INTERVAL = 0.1  # in seconds, doubled after every poll
+    NAMESPACE_MAX_POLL_INTERVAL = 2  # in seconds
+    NAMESPACE_POLL_JITTER = 0.2
+    NAMESPACE_CYCLE_INTERVAL = 24 * 60 * 60  # in seconds, see proxy_test_persistent_namespaces
+    PROXY_BENCHMARK_SETTINGS = {'object_sizes': [4 * 1024, 1024 ** 2, 4 * 1024 ** 2],  # in bytes
+                                'object_count': 20,  # per object size
+                                'concurrency': 4}
     BASE_NAMESPACE_KEY = 'ovs-healthcheck-'
+    PROXY_NAMESPACE_PREFIX = 'ovs-healthcheck-ns-'
+    PROXY_NAMESPACE_KEY = PROXY_NAMESPACE_PREFIX + '{0}-{1}'  # Formatted with the preset name and the machine id. Suffixed with _<uuid> unless persistent
+    PROXY_BENCHMARK_NAMESPACE_KEY = 'ovs-healthcheck-bench-{0}-{1}'  # Formatted with the preset name and the machine id. Suffixed with _<uuid>
+    PROXY_BENCHMARK_LOCK = 'ovs-healthcheck-proxy-benchmark'
+    TEMPORARY_NAMESPACE_SUFFIX = re.compile('_[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+    MAX_CONCURRENT_ASD_PROBES = 32  # of all backends together
+    MAX_CONCURRENT_ASD_PROBES_PER_NODE = 4
+    ASD_LATENCY_OUTLIER_FACTOR = 5  # times the median latency of the backend
+    ASD_LATENCY_OUTLIER_MINIMUM = 0.1  # in seconds
+    MAX_CONCURRENT_PROXY_TESTS = 4
+    MAX_HOURS_ZERO_DISK_SAFETY = 2  # Namespaces at disk safety zero are reported as a warning until then
+    BACKEND_TIMEOUT = 120  # in seconds, to fetch and evaluate the information of a backend
+
+    # Namespaces being created or removed by the proxy test, by all threads
+    _claimed_namespaces = set()
+    _namespaces_lock = threading.Lock()
+
+    @classmethod
+    def _get_probe_semaphores(cls, result_handler, asds):
+        """
+        Creates the semaphores bounding the amount of concurrent ASD probes, per alba node and in total
+        Shared by all backends checked at the same time: an alba node can host ASDs of multiple backends
+        :param result_handler: logging object
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param asds: the ASDs which will be probed (see BackendTopology.get_osds_by_backend)
+        :type asds: list[dict]
+        :return: semaphore by node id and the semaphore bounding the total amount of probes
+        :rtype: tuple(dict, threading.BoundedSemaphore)
+        """
+        settings = result_handler.context.settings
+        node_semaphores = ConcurrencyHelper.get_semaphores([asd['node_id'] for asd in asds],
+                                                           settings.get('max_concurrent_asd_probes_per_node', cls.MAX_CONCURRENT_ASD_PROBES_PER_NODE))
+        return node_semaphores, threading.BoundedSemaphore(max(1, settings.get('max_concurrent_asd_probes', cls.MAX_CONCURRENT_ASD_PROBES)))
 
     @classmethod
-    def _check_backend_asds(cls, result_handler, asds, backend_name, config):
+    def _check_backend_asds(cls, result_handler, asds, backend_name, probe_semaphores=None):
         """
         Checks if Alba ASDs work
         :param result_handler: logging object
         :type result_handler: ovs.extensions.healthcheck.result.HCResults
-        :param asds: list of alba ASDs
+        :param asds: list of alba ASDs (see BackendTopology.get_osds_by_backend)
         :type asds: list[dict]
         :param backend_name: name of a existing backend
         :type backend_name: str
-        :param config: path of the configuration file for the abm
-        :type config: str
-        :return: returns a dict that consists of lists with working disks and defective disks
+        :param probe_semaphores: semaphores shared with the other backends being checked (see _get_probe_semaphores). Created when not passed
+        :type probe_semaphores: tuple(dict, threading.BoundedSemaphore)
+        :return: returns a dict that consists of lists with working disks and defective disks and the latency statistics of the working disks
         :rtype: dict
         """
         working_disks = []
         broken_disks = []
-        result = {"working": working_disks, "broken": broken_disks}
+        result = {"working": working_disks, "broken": broken_disks, "latency": None}
 
         result_handler.info('Checking separate ASDs for backend {0}:'.format(backend_name), add_to_result=False)
 
@@ -79,63 +131,125 @@ class AlbaHealthCheck(object):
             return result
         # Map long id to ip
         osd_mapping = {}
-        try:
-            for osd in AlbaCLI.run(command='list-osds', config=config):
-                if len(osd.get('ips')) > 0:
-                    osd_mapping[osd.get('long_id')] = osd.get('ips')[0]
-                    continue
-                # @todo check with other ops for this logging
-                result_handler.warning('The osd is not bound to any ip! Please validate your asd-manager install!')
-        except AlbaException as ex:
-            result_handler.failure('Could not fetch osd list from Alba. Got {0}'.format(str(ex)))
-            raise
         for asd in asds:
-            key = '{0}{1}'.format(cls.BASE_NAMESPACE_KEY, str(uuid.uuid4()))
-            disk_asd_id = asd['asd_id']
-            value = str(time.time())
-            if asd['status'] == 'error':
-                broken_disks.append(disk_asd_id)
-                # @todo check with other ops for this logging. Perhaps filter on status_details
-                result_handler.warning('ASD test with DISK_ID {0} failed because: {1}'.format(disk_asd_id, asd['status_detail']))
+            if len(asd['ips']) > 0:
+                osd_mapping[asd['asd_id']] = asd['ips'][0]
                 continue
-            # Fetch ip of the asd with list-asds
-            ip_address = osd_mapping.get(disk_asd_id)
-            try:
-                # check if disk is missing
-                if not asd.get('port'):
-                    raise DiskNotFoundException('Disk is missing')
-                # put object
-                AlbaCLI.run(command='asd-set',
-                            named_params={'host': ip_address, 'port': str(asd.get('port')),
-                                          'long-id': disk_asd_id},
-                            extra_params=[key, value])
-                # get object
-                fetched_object = AlbaCLI.run(command='asd-multi-get',
-                                             named_params={'host': ip_address, 'port': str(asd.get('port')), 'long-id': disk_asd_id},
-                                             extra_params=[key],
-                                             to_json=False)
-                # check if put/get is successful
-                if 'None' in fetched_object:
-                    # test failed!
-                    raise ObjectNotFoundException(fetched_object)
-                # test successful!
-                result_handler.success('ASD test with DISK_ID {0} succeeded!'.format(disk_asd_id))
-                working_disks.append(disk_asd_id)
-
-                # delete object
-                AlbaCLI.run(command='asd-delete',
-                            named_params={'host': ip_address, 'port': str(asd.get('port')), 'long-id': disk_asd_id},
-                            extra_params=[key])
-            except ObjectNotFoundException:
-                broken_disks.append(disk_asd_id)
-                # @todo validate with other ops. #asds is important
-                result_handler.warning('ASD test with disk-id {0} failed on node {1}!'.format(disk_asd_id, ip_address))
-            except (AlbaException, DiskNotFoundException) as ex:
-                # @todo validate with other ops. #asds is important
-                broken_disks.append(disk_asd_id)
-                result_handler.warning('ASD test with DISK_ID {0} failed  on node {1} with {2}'.format(disk_asd_id, ip_address, str(ex)))
+            # @todo check with other ops for this logging
+            result_handler.warning('The osd is not bound to any ip! Please validate your asd-manager install!')
+        # Probes of the same node share the node's disks and network
+        node_semaphores, probe_semaphore = probe_semaphores or cls._get_probe_semaphores(result_handler, asds)
+
+        def _probe(asd_to_probe):
+            return cls._probe_asd(asd_to_probe, osd_mapping.get(asd_to_probe['asd_id']), node_semaphores[asd_to_probe['node_id']], probe_semaphore)
+
+        # The ASDs are listed node by node: probing them in that order would have all threads wait for the same few nodes
+        order = ConcurrencyHelper.interleave(asds, lambda asd_to_probe: asd_to_probe['node_id'])
+        outcomes = [None] * len(asds)
+        for index, outcome in zip(order, ConcurrencyHelper.map(lambda index: _probe(asds[index]), order,
+                                                                result_handler.context.settings.get('max_concurrent_asd_probes', cls.MAX_CONCURRENT_ASD_PROBES))):
+            outcomes[index] = outcome
+        # Report in the order of the asds, as if they were probed one after the other
+        latencies = {}
+        for asd, (outcome, asd_latencies) in zip(asds, outcomes):
+            for state, severity, message in outcome:
+                result[state].append(asd['asd_id'])
+                getattr(result_handler, severity)(message)
+            if asd_latencies is not None:
+                latencies[asd['asd_id']] = asd_latencies
+        result['latency'] = cls._check_asd_latencies(result_handler, latencies, osd_mapping, backend_name)
         return result
 
+    @classmethod
+    def _check_asd_latencies(cls, result_handler, latencies, osd_mapping, backend_name):
+        """
+        Reports the ASDs which respond a lot slower than the other ASDs of the backend
+        :param result_handler: logging object
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param latencies: latency in seconds of every operation of every working ASD, eg: {asd_id: {'set': 0.01, 'get': 0.01, 'delete': 0.01, 'total': 0.03}}
+        :type latencies: dict
+        :param osd_mapping: ip by ASD id
+        :type osd_mapping: dict
+        :param backend_name: name of the backend
+        :type backend_name: str
+        :return: latency percentiles by operation, the median total latency, the outlying ASDs and the latencies of every ASD
+        :rtype: dict
+        """
+        settings = result_handler.context.settings
+        totals = dict((asd_id, asd_latencies['total']) for asd_id, asd_latencies in latencies.iteritems())
+        median = StatisticsHelper.get_percentile(totals.values(), 50)
+        outliers = StatisticsHelper.get_outliers(totals,
+                                                 factor=settings.get('asd_latency_outlier_factor', cls.ASD_LATENCY_OUTLIER_FACTOR),
+                                                 minimum=settings.get('asd_latency_outlier_minimum', cls.ASD_LATENCY_OUTLIER_MINIMUM))
+        for asd_id, total in sorted(outliers.iteritems(), key=lambda item: item[1], reverse=True):
+            result_handler.warning('ASD {0} on node {1} of backend {2} is slow: it took {3}s while the median of the backend is {4}s'
+                                   .format(asd_id, osd_mapping.get(asd_id), backend_name, round(total, 3), round(median, 3)))
+        return {'percentiles': dict((operation, StatisticsHelper.get_percentiles([asd_latencies[operation] for asd_latencies in latencies.itervalues()]))
+                                    for operation in ['set', 'get', 'delete', 'total']),
+                'median': median,
+                'outliers': outliers,
+                'asds': latencies}
+
+    @classmethod
+    def _probe_asd(cls, asd, ip_address, node_semaphore, probe_semaphore):
+        """
+        Puts, gets and deletes an object on an ASD. An ASD the asd-manager reports as broken is not probed
+        :param asd: the ASD to probe
+        :type asd: dict
+        :param ip_address: ip of the ASD
+        :type ip_address: str
+        :param node_semaphore: semaphore bounding the amount of concurrent probes on the node of the ASD
+        :type node_semaphore: threading.BoundedSemaphore
+        :param probe_semaphore: semaphore bounding the total amount of concurrent probes
+        :type probe_semaphore: threading.BoundedSemaphore
+        :return: the outcome of the probe: (state, severity, message) tuples in the order they occurred. State is either working or broken
+                 and the latency of every operation when the ASD works
+        :rtype: tuple(list[tuple], dict)
+        """
+        disk_asd_id = asd['asd_id']
+        outcome = []
+        latencies = None
+        if asd['status'] == 'error':
+            # @todo check with other ops for this logging. Perhaps filter on status_details
+            outcome.append(('broken', 'warning', 'ASD test with DISK_ID {0} failed because: {1}'.format(disk_asd_id, asd['status_detail'])))
+            return outcome, latencies
+        key = '{0}{1}'.format(cls.BASE_NAMESPACE_KEY, str(uuid.uuid4()))
+        value = str(time.time())
+        try:
+            # check if disk is missing
+            if not asd.get('port'):
+                raise DiskNotFoundException('Disk is missing')
+            # put, get and delete the object with a single request. A failing command skips the others: a broken ASD is not asked again
+            named_params = {'host': ip_address, 'port': str(asd.get('port')), 'long-id': disk_asd_id}
+            calls = [{'command': 'asd-set', 'named_params': named_params, 'extra_params': [key, value]},
+                     {'command': 'asd-multi-get', 'named_params': named_params, 'extra_params': [key], 'to_json': False},
+                     {'command': 'asd-delete', 'named_params': named_params, 'extra_params': [key]}]
+            # The node semaphore is acquired first: a probe waiting for its node does not hold back the probes of the other nodes
+            with node_semaphore, probe_semaphore:
+                (set_result, fetched_object, delete_result), durations = AlbaCLI.run_batch(calls=calls, with_durations=True, stop_on_error=True)
+            if isinstance(set_result, AlbaException):
+                raise set_result
+            if isinstance(fetched_object, AlbaException):
+                raise fetched_object
+            # check if put/get is successful
+            if 'None' in fetched_object:
+                # test failed!
+                raise ObjectNotFoundException(fetched_object)
+            # test successful!
+            outcome.append(('working', 'success', 'ASD test with DISK_ID {0} succeeded!'.format(disk_asd_id)))
+            if isinstance(delete_result, AlbaException):
+                raise delete_result
+            if None not in durations:
+                latencies = dict(zip(['set', 'get', 'delete'], durations))
+                latencies['total'] = sum(durations)
+        except ObjectNotFoundException:
+            # @todo validate with other ops. #asds is important
+            outcome.append(('broken', 'warning', 'ASD test with disk-id {0} failed on node {1}!'.format(disk_asd_id, ip_address)))
+        except (AlbaException, DiskNotFoundException) as ex:
+            # @todo validate with other ops. #asds is important
+            outcome.append(('broken', 'warning', 'ASD test with DISK_ID {0} failed  on node {1} with {2}'.format(disk_asd_id, ip_address, str(ex))))
+        return outcome, latencies
+
     @staticmethod
     @expose_to_cli(MODULE, 'proxy-test', HealthCheckCLIRunner.ADDON_TYPE)
     def check_if_proxies_work(result_handler):
@@ -146,167 +260,652 @@ class AlbaHealthCheck(object):
         :return: None
         :rtype: NoneType
         """
-        namespace_params = {'bucket_count': (list, None),
-                            'logical': (int, None),
-                            'storage': (int, None),
-                            'storage_per_osd': (list, None)}
-
         result_handler.info('Checking the ALBA proxies.', add_to_result=False)
 
         amount_of_presets_not_working = []
-        # ignore possible subprocess output
-        fnull = open(os.devnull, 'w')
         # try put/get/verify on all available proxies on the local node
         local_proxies = ServiceHelper.get_local_proxy_services()
         if len(local_proxies) == 0:
             result_handler.info('Found no proxies.', add_to_result=False)
             return amount_of_presets_not_working
-        for service in local_proxies:
+        # The presets of all proxies are tested concurrently. The messages are buffered and reported in order, as if everything was tested one after the other
+        proxies = [AlbaHealthCheck._run_buffered(result_handler, AlbaHealthCheck._get_proxy_presets, service, amount_of_presets_not_working) for service in local_proxies]
+        tests = []
+        for _, proxy, _ in proxies:
+            if proxy is not None:
+                service, ip, abm_config, preset_names = proxy
+                tests.extend((service, ip, abm_config, preset_name) for preset_name in preset_names)
+        # The same test object is uploaded by all tests. Every test downloads it to a file of its own in the same directory
+        temp_dir = tempfile.mkdtemp(prefix='ovs-hc-')
+        temp_file_loc = os.path.join(temp_dir, AlbaHealthCheck.TEMP_FILE_NAME)
+        try:
+            test_object = (temp_file_loc, AlbaHealthCheck._create_test_object(temp_file_loc, AlbaHealthCheck.TEMP_FILE_SIZE))
+            outcomes = ConcurrencyHelper.map(lambda test: AlbaHealthCheck._run_buffered(result_handler, AlbaHealthCheck._check_proxy_preset, *(test + (test_object, amount_of_presets_not_working))),
+                                             tests, result_handler.context.settings.get('max_concurrent_proxy_tests', AlbaHealthCheck.MAX_CONCURRENT_PROXY_TESTS))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        for records, proxy, exc_info in proxies:
+            result_handler.replay_test(records=records)
+            if exc_info is not None:
+                raise exc_info[0], exc_info[1], exc_info[2]
+            for _ in proxy[3]:
+                records, _, exc_info = outcomes.pop(0)
+                result_handler.replay_test(records=records)
+                if exc_info is not None:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+
+    @staticmethod
+    def _run_buffered(result_handler, function, *args):
+        """
+        Executes a function which reports to a result handler of its own. Allows reporting the messages later on, in the required order
+        :param result_handler: logging object the messages will be reported to
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param function: function to execute. Receives the buffering result handler as first argument
+        :type function: callable
+        :return: the buffered messages (see HCResults.replay_test), the return value of the function and the exception info when it raised
+        :rtype: tuple(list[dict], object, tuple)
+        """
+        buffer_handler = HCResults(unattended=True, context=result_handler.context)
+        return_value = None
+        exc_info = None
+        try:
+            return_value = function(HCResults.HCResultCollector(buffer_handler, 'buffer'), *args)
+        except Exception:
+            exc_info = sys.exc_info()
+        return buffer_handler.get_test_records('buffer'), return_value, exc_info
+
+    @staticmethod
+    def _create_test_object(path, size):
+        """
+        Writes a file of random data. The data is generated and hashed per chunk, the file is never read back
+        :param path: path of the file to write
+        :type path: str
+        :param size: size of the file in bytes
+        :type size: int
+        :return: md5 hash of the file
+        :rtype: str
+        """
+        md5 = hashlib.md5()
+        with open(path, 'wb') as output_file:
+            remaining = size
+            while remaining > 0:
+                chunk = os.urandom(min(remaining, AlbaHealthCheck.TEMP_FILE_CHUNK_SIZE))
+                md5.update(chunk)
+                output_file.write(chunk)
+                remaining -= len(chunk)
+        return md5.hexdigest()
+
+    @staticmethod
+    def _get_file_hash(path):
+        """
+        Hashes a file per chunk, the file is never loaded in memory as a whole
+        :param path: path of the file to hash
+        :type path: str
+        :return: md5 hash of the file
+        :rtype: str
+        """
+        md5 = hashlib.md5()
+        with open(path, 'rb') as input_file:
+            for chunk in iter(lambda: input_file.read(AlbaHealthCheck.TEMP_FILE_CHUNK_SIZE), ''):
+                md5.update(chunk)
+        return md5.hexdigest()
+
+    @staticmethod
+    def _get_proxy_presets(result_handler, service, amount_of_presets_not_working):
+        """
+        Lists the presets which can be tested through a proxy
+        :param result_handler: logging object
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param service: the proxy service
+        :type service: ovs.dal.hybrids.service.Service
+        :param amount_of_presets_not_working: list the names of the proxies that do not work are added to
+        :type amount_of_presets_not_working: list
+        :return: the proxy service, its ip, the config of its abm and the names of its presets in use. Only the names when the proxy cannot be tested
+        :rtype: tuple
+        """
+        try:
+            result_handler.info('Checking ALBA proxy {0}.'.format(service.name), add_to_result=False)
+            ip = service.alba_proxy.storagedriver.storage_ip
+            # Encapsulating try to determine test output
             try:
-                result_handler.info('Checking ALBA proxy {0}.'.format(service.name), add_to_result=False)
-                ip = service.alba_proxy.storagedriver.storage_ip
-                # Encapsulating try to determine test output
-                try:
-                    # Determine what to what backend the proxy is connected
-                    proxy_client_cfg = AlbaCLI.run(command='proxy-client-cfg', named_params={'host': ip, 'port': service.ports[0]})
-                except AlbaException:
-                    result_handler.failure('Fetching proxy info has failed. Please verify if {0}:{1} is the correct address for proxy {2}.'.format(ip, service.ports[0], service.name))
+                # Determine what to what backend the proxy is connected
+                proxy_client_cfg = AlbaCLI.run(command='proxy-client-cfg', named_params={'host': ip, 'port': service.ports[0]})
+            except AlbaException:
+                result_handler.failure('Fetching proxy info has failed. Please verify if {0}:{1} is the correct address for proxy {2}.'.format(ip, service.ports[0], service.name))
+                return None, None, None, []
+            # Fetch arakoon information
+            abm_name = proxy_client_cfg.get('cluster_id')
+            # Check if proxy config is correctly setup
+            if abm_name is None:
+                raise ConfigNotMatchedException('Proxy config for proxy {0} does not have the correct format on node {1} with port {2}.'.format(service.name, ip, service.ports[0]))
+            abm_config = Configuration.get_configuration_path('/ovs/vpools/{0}/proxies/{1}/config/abm' .format(service.alba_proxy.storagedriver.vpool.guid, service.alba_proxy.guid))
+            # The commands executed through the proxy only change the cached output of its abm
+            AlbaCLICache.register_proxy(ip, service.ports[0], abm_config)
+
+            # Determine presets / backend
+            try:
+                presets = AlbaCLI.run(command='list-presets', config=abm_config)
+            except AlbaException:
+                result_handler.failure('Listing the presets has failed. Please check the arakoon config path. We used {0}'.format(abm_config))
+                return None, None, None, []
+
+            preset_names = []
+            for preset in presets:
+                # If preset is not in use, test will fail so add a skip
+                if preset['in_use'] is False:
+                    result_handler.skip('Preset {0} is not in use and will not be checked'.format(preset['name']))
                     continue
-                # Fetch arakoon information
-                abm_name = proxy_client_cfg.get('cluster_id')
-                # Check if proxy config is correctly setup
-                if abm_name is None:
-                    raise ConfigNotMatchedException('Proxy config for proxy {0} does not have the correct format on node {1} with port {2}.'.format(service.name, ip, service.ports[0]))
-                abm_config = Configuration.get_configuration_path('/ovs/vpools/{0}/proxies/{1}/config/abm' .format(service.alba_proxy.storagedriver.vpool.guid, service.alba_proxy.guid))
-
-                # Determine presets / backend
+                preset_names.append(preset['name'])
+            return service, ip, abm_config, preset_names
+        except ConfigNotMatchedException as ex:
+            amount_of_presets_not_working.append(service.name)
+            result_handler.failure('Proxy {0} has some problems. Got {1} as error'.format(service.name, ex))
+            return None, None, None, []
+
+    @staticmethod
+    def _check_proxy_preset(result_handler, service, ip, abm_config, preset_name, test_object, amount_of_presets_not_working):
+        """
+        Creates a namespace with the preset through the proxy and puts, gets and verifies an object in it
+        Can be executed concurrently: every execution uses its own namespace and downloads to a file of its own
+        :param result_handler: logging object
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param service: the proxy service
+        :type service: ovs.dal.hybrids.service.Service
+        :param ip: ip the proxy listens on
+        :type ip: str
+        :param abm_config: path of the configuration file for the abm of the backend of the proxy
+        :type abm_config: str
+        :param preset_name: name of the preset to test
+        :type preset_name: str
+        :param test_object: path and md5 hash of the object to upload (see _create_test_object)
+        :type test_object: tuple(str, str)
+        :param amount_of_presets_not_working: list the names of the presets that do not work are added to
+        :type amount_of_presets_not_working: list
+        :return: None
+        :rtype: NoneType
+        """
+        namespace_params = {'bucket_count': (list, None),
+                            'logical': (int, None),
+                            'storage': (int, None),
+                            'storage_per_osd': (list, None)}
+        temp_file_loc, hash_original = test_object
+        object_key = 'ovs-healthcheck-obj-{0}'.format(str(uuid.uuid4()))
+        temp_file_fetched_loc = os.path.join(os.path.dirname(temp_file_loc), '{0}-{1}'.format(object_key, AlbaHealthCheck.TEMP_FILE_FETCHED_NAME))
+        # Generate new namespace name using the preset. The persistent namespace is named after the preset only
+        namespace_key_prefix = AlbaHealthCheck.PROXY_NAMESPACE_KEY.format(preset_name, result_handler.context.machine_id)
+        persistent = AlbaHealthCheck._use_persistent_namespace(result_handler.context.settings, service, preset_name)
+        if persistent is True:
+            namespace_key = namespace_key_prefix
+        else:
+            namespace_key = '{0}_{1}'.format(namespace_key_prefix, uuid.uuid4())
+            AlbaHealthCheck._claim_namespaces([namespace_key])
+        # Encapsulation try for cleanup
+        try:
+            if persistent is False or AlbaHealthCheck._is_namespace_removed(abm_config, namespace_key) is True:
                 try:
-                    presets = AlbaCLI.run(command='list-presets', config=abm_config)
-                except AlbaException:
-                    result_handler.failure('Listing the presets has failed. Please check the arakoon config path. We used {0}'.format(abm_config))
-                    continue
+                    AlbaHealthCheck._create_namespace(ip, service.ports[0], abm_config, namespace_key, preset_name)
+                except AlbaException as ex:
+                    # The persistent namespace might have been created by a proxy of another vPool in the meantime
+                    if persistent is False or ex.alba_command != 'proxy-create-namespace' or AlbaHealthCheck._is_namespace_removed(abm_config, namespace_key) is True:
+                        raise
+                result_handler.success('Namespace successfully created on proxy {0} with preset {1}!'.format(service.name, preset_name))
+            else:
+                result_handler.success('Namespace {0} is available on proxy {1} with preset {2}!'.format(namespace_key, service.name, preset_name))
+            namespace_info = AlbaCLI.run(command='show-namespace', config=abm_config, extra_params=[namespace_key])
+            Toolbox.verify_required_params(required_params=namespace_params, actual_params=namespace_info)
+            result_handler.success('Namespace successfully fetched on proxy {0} with preset {1}!'.format(service.name, preset_name))
 
-                for preset in presets:
-                    # If preset is not in use, test will fail so add a skip
-                    if preset['in_use'] is False:
-                        result_handler.skip('Preset {0} is not in use and will not be checked'.format(preset['name']))
-                        continue
-                    preset_name = preset['name']
-                    # Encapsulation try for cleanup
-                    try:
-                        # Generate new namespace name using the preset
-                        namespace_key_prefix = 'ovs-healthcheck-ns-{0}-{1}'.format(preset_name, AlbaHealthCheck.LOCAL_ID)
-                        namespace_key = '{0}_{1}'.format(namespace_key_prefix, uuid.uuid4())
-                        object_key = 'ovs-healthcheck-obj-{0}'.format(str(uuid.uuid4()))
-                        # Create namespace
-                        AlbaCLI.run(command='proxy-create-namespace',
-                                    named_params={'host': ip, 'port': service.ports[0]},
-                                    extra_params=[namespace_key, preset_name])
-                        # Wait until fully created
-                        namespace_start_time = time.time()
-                        for index in xrange(2):
-                            # Running twice because the first one could give a false positive as the osds will alert the nsm
-                            # and the nsm would respond with got messages but these were not the ones we are after
-                            AlbaCLI.run(command='deliver-messages', config=abm_config)
-                        while True:
-                            if time.time() - namespace_start_time > AlbaHealthCheck.NAMESPACE_TIMEOUT:
-                                raise RuntimeError('Creation namespace has timed out after {0}s'.format(time.time() - namespace_start_time))
-                            list_ns_osds_output = AlbaCLI.run(command='list-ns-osds', config=abm_config, extra_params=[namespace_key])
-                            # Example output: [[0, [u'Active']], [3, [u'Active']]]
-                            namespace_ready = True
-                            for osd_info in list_ns_osds_output:  # If there are no osd_info records, uploading will fail so covered by HC
-                                osd_state = osd_info[1][0]
-                                if osd_state != 'Active':
-                                    namespace_ready = False
-                            if namespace_ready is True:
-                                break
-                        result_handler.success('Namespace successfully created on proxy {0} with preset {1}!'.format(service.name, preset_name))
-                        namespace_info = AlbaCLI.run(command='show-namespace', config=abm_config, extra_params=[namespace_key])
-                        Toolbox.verify_required_params(required_params=namespace_params, actual_params=namespace_info)
-                        result_handler.success('Namespace successfully fetched on proxy {0} with preset {1}!'.format(service.name, preset_name))
-
-                        # Put test object to given dir
-                        with open(AlbaHealthCheck.TEMP_FILE_LOC, 'wb') as output_file:
-                            output_file.write(os.urandom(AlbaHealthCheck.TEMP_FILE_SIZE))
-                        AlbaCLI.run(command='proxy-upload-object',
-                                    named_params={'host': ip, 'port': service.ports[0]},
-                                    extra_params=[namespace_key, AlbaHealthCheck.TEMP_FILE_LOC, object_key])
-                        result_handler.success('Successfully uploaded the object to namespace {0}'.format(namespace_key))
-                        # download object
-                        AlbaCLI.run(command='proxy-download-object',
-                                    named_params={'host': ip, 'port': service.ports[0]},
-                                    extra_params=[namespace_key, object_key, AlbaHealthCheck.TEMP_FILE_FETCHED_LOC])
-                        result_handler.success('Successfully downloaded the object to namespace {0}'.format(namespace_key))
-                        # check if files exists - issue #57
-                        if not(os.path.isfile(AlbaHealthCheck.TEMP_FILE_FETCHED_LOC) and os.path.isfile(AlbaHealthCheck.TEMP_FILE_LOC)):
-                            # creation of object failed
-                            raise ObjectNotFoundException(ValueError('Creation of object has failed'))
-                        hash_original = hashlib.md5(open(AlbaHealthCheck.TEMP_FILE_LOC, 'rb').read()).hexdigest()
-                        hash_fetched = hashlib.md5(open(AlbaHealthCheck.TEMP_FILE_FETCHED_LOC, 'rb').read()).hexdigest()
-
-                        if hash_original == hash_fetched:
-                            result_handler.success('Fetched object {0} from namespace {1} on proxy {2} with preset {3} matches the created object!'.format(object_key, namespace_key, service.name, preset_name))
+            AlbaCLI.run(command='proxy-upload-object',
+                        named_params={'host': ip, 'port': service.ports[0]},
+                        extra_params=[namespace_key, temp_file_loc, object_key])
+            result_handler.success('Successfully uploaded the object to namespace {0}'.format(namespace_key))
+            # download object
+            AlbaCLI.run(command='proxy-download-object',
+                        named_params={'host': ip, 'port': service.ports[0]},
+                        extra_params=[namespace_key, object_key, temp_file_fetched_loc])
+            result_handler.success('Successfully downloaded the object to namespace {0}'.format(namespace_key))
+            # check if files exists - issue #57
+            if not(os.path.isfile(temp_file_fetched_loc) and os.path.isfile(temp_file_loc)):
+                # creation of object failed
+                raise ObjectNotFoundException(ValueError('Creation of object has failed'))
+            # An object of another size cannot match, it does not have to be hashed
+            if os.path.getsize(temp_file_fetched_loc) == os.path.getsize(temp_file_loc) and AlbaHealthCheck._get_file_hash(temp_file_fetched_loc) == hash_original:
+                result_handler.success('Fetched object {0} from namespace {1} on proxy {2} with preset {3} matches the created object!'.format(object_key, namespace_key, service.name, preset_name))
+            else:
+                result_handler.failure('Fetched object {0} from namespace {1} on proxy {2} with preset {3} does not match the created object!'.format(object_key, namespace_key, service.name, preset_name))
+            if persistent is True:
+                # Only the object is rotated, the namespace is kept
+                try:
+                    AlbaCLI.run(command='proxy-delete-object',
+                                named_params={'host': ip, 'port': service.ports[0]},
+                                extra_params=[namespace_key, object_key])
+                except AlbaException as ex:
+                    result_handler.warning('Failed to delete object {0} from namespace {1} on proxy {2}. Got {3}'.format(object_key, namespace_key, service.name, ex))
+
+        except ObjectNotFoundException as ex:
+            amount_of_presets_not_working.append(preset_name)
+            result_handler.failure('Failed to put object on namespace {0} failed on proxy {1}with preset {2} With error {3}'.format(namespace_key, service.name, preset_name, ex))
+        except AlbaException as ex:
+            if ex.alba_command == 'proxy-create-namespace':
+                result_handler.failure('Create namespace has failed with {0} on namespace {1} with proxy {2} with preset {3}'.format(str(ex), namespace_key, service.name, preset_name))
+            elif ex.alba_command == 'show-namespace':
+                result_handler.failure('Show namespace has failed with {0} on namespace {1} with proxy {2} with preset {3}'.format(str(ex), namespace_key, service.name, preset_name))
+            elif ex.alba_command == 'proxy-upload-object':
+                result_handler.failure('Uploading the object has failed with {0} on namespace {1} with proxy {2} with preset {3}'.format(str(ex), namespace_key, service.name, preset_name))
+            elif ex.alba_command == 'proxy-download-object':
+                result_handler.failure('Downloading the object has failed with {0} on namespace {1} with proxy {2} with preset {3}'.format(str(ex), namespace_key, service.name, preset_name))
+        finally:
+            # Delete the fetched object, the created namespace and preset
+            if os.path.exists(temp_file_fetched_loc):
+                os.remove(temp_file_fetched_loc)
+            # Leftovers are removed by the next run which creates and deletes a namespace
+            if persistent is False:
+                namespaces_to_remove = []
+                try:
+                    namespace_names = [namespace['name'] for namespace in AlbaCLI.run(command='list-namespaces', config=abm_config)]
+                    # Namespaces of presets being tested by other threads are left alone
+                    namespaces_to_remove = AlbaHealthCheck._claim_namespaces([namespace_name for namespace_name in namespace_names if namespace_name.startswith(namespace_key_prefix + '_')],
+                                                                             own_namespaces=[namespace_key])
+                    for namespace_name in namespaces_to_remove:
+                        if namespace_name == namespace_key:
+                            result_handler.info('Deleting namespace {0}.'.format(namespace_name))
                         else:
-                            result_handler.failure('Fetched object {0} from namespace {1} on proxy {2} with preset {3} does not match the created object!'.format(object_key, namespace_key, service.name, preset_name))
-
-                    except ObjectNotFoundException as ex:
-                        amount_of_presets_not_working.append(preset_name)
-                        result_handler.failure('Failed to put object on namespace {0} failed on proxy {1}with preset {2} With error {3}'.format(namespace_key, service.name, preset_name, ex))
-                    except AlbaException as ex:
-                        if ex.alba_command == 'proxy-create-namespace':
-                            result_handler.failure('Create namespace has failed with {0} on namespace {1} with proxy {2} with preset {3}'.format(str(ex), namespace_key, service.name, preset_name))
-                        elif ex.alba_command == 'show-namespace':
-                            result_handler.failure('Show namespace has failed with {0} on namespace {1} with proxy {2} with preset {3}'.format(str(ex), namespace_key, service.name, preset_name))
-                        elif ex.alba_command == 'proxy-upload-object':
-                            result_handler.failure('Uploading the object has failed with {0} on namespace {1} with proxy {2} with preset {3}'.format(str(ex), namespace_key, service.name, preset_name))
-                        elif ex.alba_command == 'proxy-download-object':
-                            result_handler.failure('Downloading the object has failed with {0} on namespace {1} with proxy {2} with preset {3}'.format(str(ex), namespace_key, service.name, preset_name))
+                            result_handler.warning('Deleting namespace {0} which was leftover from a previous run.'.format(namespace_name))
+                        AlbaHealthCheck._delete_proxy_test_namespace(result_handler, service, ip, abm_config, namespace_name)
+                finally:
+                    AlbaHealthCheck._release_namespaces(set(namespaces_to_remove + [namespace_key]))
+                # As are the persistent namespaces which are no longer used
+                try:
+                    orphaned_namespaces = AlbaHealthCheck._claim_namespaces(AlbaHealthCheck._get_orphaned_persistent_namespaces(result_handler.context.settings, abm_config, namespace_names, result_handler.context.machine_id))
+                    try:
+                        for namespace_name in orphaned_namespaces:
+                            result_handler.warning('Deleting persistent namespace {0} which is no longer used.'.format(namespace_name))
+                            AlbaHealthCheck._delete_proxy_test_namespace(result_handler, service, ip, abm_config, namespace_name)
                     finally:
-                        # Delete the created namespace and preset
-                        subprocess.call(['rm', str(AlbaHealthCheck.TEMP_FILE_LOC)], stdout=fnull, stderr=subprocess.STDOUT)
-                        subprocess.call(['rm', str(AlbaHealthCheck.TEMP_FILE_FETCHED_LOC)], stdout=fnull, stderr=subprocess.STDOUT)
-                        namespaces = AlbaCLI.run(command='list-namespaces', config=abm_config)
-                        namespaces_to_remove = []
-                        proxy_named_params = {'host': ip, 'port': service.ports[0]}
-                        for namespace in namespaces:
-                            if namespace['name'].startswith(namespace_key_prefix):
-                                namespaces_to_remove.append(namespace['name'])
-                        for namespace_name in namespaces_to_remove:
-                            if namespace_name == namespace_key:
-                                result_handler.info('Deleting namespace {0}.'.format(namespace_name))
-                            else:
-                                result_handler.warning('Deleting namespace {0} which was leftover from a previous run.'.format(namespace_name))
-
-                            AlbaCLI.run(command='proxy-delete-namespace',
-                                        named_params=proxy_named_params,
-                                        extra_params=[namespace_name])
-
-                            namespace_delete_start = time.time()
-                            while True:
-                                try:
-                                    AlbaCLI.run(command='show-namespace', config=abm_config, extra_params=[namespace_name])  # Will fail if the namespace does not exist
-                                except AlbaException:
-                                    result_handler.success('Namespace {0} successfully removed.'.format(namespace_name))
-                                    break
-                                if time.time() - namespace_delete_start > AlbaHealthCheck.NAMESPACE_TIMEOUT:
-                                    raise RuntimeError('Delete namespace has timed out after {0}s'.format(time.time() - namespace_start_time))
-
-                            # be tidy, and make the proxy forget the namespace
-                            try:
-                                AlbaCLI.run(command='proxy-statistics',
-                                            named_params=proxy_named_params,
-                                            extra_params=['--forget', namespace_name])
-                            except:
-                                result_handler.warning('Failed to make proxy forget namespace {0}.'.format(namespace_name))
-
-            except subprocess.CalledProcessError as ex:
-                # this should stay for the deletion of the remaining files
-                amount_of_presets_not_working.append(service.name)
-                result_handler.failure('Proxy {0} has some problems. Got {1} as error'.format(service.name, ex))
-
-            except ConfigNotMatchedException as ex:
-                amount_of_presets_not_working.append(service.name)
-                result_handler.failure('Proxy {0} has some problems. Got {1} as error'.format(service.name, ex))
+                        AlbaHealthCheck._release_namespaces(orphaned_namespaces)
+                except Exception as ex:
+                    result_handler.warning('Failed to remove the persistent namespaces which are no longer used on proxy {0}. Got {1}'.format(service.name, ex))
+
+    @staticmethod
+    def _delete_proxy_test_namespace(result_handler, service, ip, abm_config, namespace_name):
+        """
+        Deletes a namespace of the proxy test and makes the proxy forget it
+        :param result_handler: logging object
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param service: the proxy service
+        :type service: ovs.dal.hybrids.service.Service
+        :param ip: ip the proxy listens on
+        :type ip: str
+        :param abm_config: path of the configuration file for the abm of the backend of the proxy
+        :type abm_config: str
+        :param namespace_name: name of the namespace
+        :type namespace_name: str
+        :return: None
+        :rtype: NoneType
+        """
+        AlbaHealthCheck._delete_namespace(ip, service.ports[0], abm_config, namespace_name)
+        result_handler.success('Namespace {0} successfully removed.'.format(namespace_name))
+
+        # be tidy, and make the proxy forget the namespace
+        try:
+            AlbaCLI.run(command='proxy-statistics',
+                        named_params={'host': ip, 'port': service.ports[0]},
+                        extra_params=['--forget', namespace_name])
+        except:
+            result_handler.warning('Failed to make proxy forget namespace {0}.'.format(namespace_name))
+
+    @staticmethod
+    def _get_orphaned_persistent_namespaces(settings, abm_config, namespace_names, machine_id):
+        """
+        Lists the persistent namespaces of the proxy test of this cluster which are no longer used: those of this node when persistent namespaces are disabled
+        and those of presets which are no longer in use
+        The backend can be shared with other clusters: only namespaces of the nodes of this cluster are considered
+        :param settings: the healthcheck settings
+        :type settings: dict
+        :param abm_config: path of the configuration file for the abm
+        :type abm_config: str
+        :param namespace_names: names of all namespaces of the abm
+        :type namespace_names: list[str]
+        :param machine_id: machine id of this node
+        :type machine_id: str
+        :return: the names of the orphaned namespaces
+        :rtype: list[str]
+        """
+        persistent_namespaces = [namespace_name for namespace_name in namespace_names
+                                 if namespace_name.startswith(AlbaHealthCheck.PROXY_NAMESPACE_PREFIX) and AlbaHealthCheck.TEMPORARY_NAMESPACE_SUFFIX.search(namespace_name) is None]
+        if len(persistent_namespaces) == 0:
+            return []
+        persistent_enabled = settings.get('proxy_test_persistent_namespaces', False) is True
+        preset_names = [preset['name'] for preset in AlbaCLI.run(command='list-presets', config=abm_config) if preset['in_use'] is True]
+        machine_ids = [storagerouter.machine_id for storagerouter in StoragerouterHelper.get_storagerouters()]
+        orphaned_namespaces = []
+        for namespace_name in persistent_namespaces:
+            for node_machine_id in machine_ids:
+                if not namespace_name.endswith('-' + node_machine_id):
+                    continue
+                preset_name = namespace_name[len(AlbaHealthCheck.PROXY_NAMESPACE_PREFIX):-len(node_machine_id) - 1]
+                # The setting of the other nodes is unknown, their namespaces are kept as long as they can be used
+                if preset_name not in preset_names or (node_machine_id == machine_id and persistent_enabled is False):
+                    orphaned_namespaces.append(namespace_name)
+                break
+        return orphaned_namespaces
+
+    @staticmethod
+    def _use_persistent_namespace(settings, service, preset_name):
+        """
+        Determines whether the preset is tested with the persistent namespace or with a namespace which is created and deleted
+        With persistent namespaces enabled, a namespace is still created and deleted once every proxy_test_namespace_cycle_interval
+        :param settings: the healthcheck settings
+        :type settings: dict
+        :param service: the proxy service
+        :type service: ovs.dal.hybrids.service.Service
+        :param preset_name: name of the preset
+        :type preset_name: str
+        :return: True when the persistent namespace is used
+        :rtype: bool
+        """
+        if settings.get('proxy_test_persistent_namespaces', False) is not True:
+            return False
+        interval = settings.get('proxy_test_namespace_cycle_interval', AlbaHealthCheck.NAMESPACE_CYCLE_INTERVAL)
+        # Adding fails when the key exists: only one run per interval gets to create and delete a namespace
+        return not CacheHelper.add(item=time.time(), key='proxy-test-namespace-cycle-{0}-{1}'.format(service.name, preset_name), expire_time=interval)
+
+    @staticmethod
+    def _create_namespace(ip, port, abm_config, namespace_name, preset_name):
+        """
+        Creates a namespace through a proxy and waits until it is active
+        :param ip: ip the proxy listens on
+        :type ip: str
+        :param port: port the proxy listens on
+        :type port: int
+        :param abm_config: path of the configuration file for the abm
+        :type abm_config: str
+        :param namespace_name: name of the namespace
+        :type namespace_name: str
+        :param preset_name: name of the preset to create the namespace with
+        :type preset_name: str
+        :return: None
+        :rtype: NoneType
+        """
+        AlbaCLI.run(command='proxy-create-namespace',
+                    named_params={'host': ip, 'port': port},
+                    extra_params=[namespace_name, preset_name])
+        # Wait until fully created
+        for index in xrange(2):
+            # Running twice because the first one could give a false positive as the osds will alert the nsm
+            # and the nsm would respond with got messages but these were not the ones we are after
+            AlbaCLI.run(command='deliver-messages', config=abm_config)
+        poller = AlbaHealthCheck._get_namespace_poller()
+        namespace_ready = poller.poll(AlbaHealthCheck._is_namespace_active, abm_config, namespace_name)
+        CheckMetrics.add_wait_time(CheckMetrics.NAMESPACE_CREATION_WAIT, poller.elapsed)
+        if namespace_ready is None:
+            raise RuntimeError('Creation namespace has timed out after {0}s'.format(round(poller.elapsed, 2)))
+
+    @staticmethod
+    def _delete_namespace(ip, port, abm_config, namespace_name):
+        """
+        Deletes a namespace through a proxy and waits until it is removed
+        :param ip: ip the proxy listens on
+        :type ip: str
+        :param port: port the proxy listens on
+        :type port: int
+        :param abm_config: path of the configuration file for the abm
+        :type abm_config: str
+        :param namespace_name: name of the namespace
+        :type namespace_name: str
+        :return: None
+        :rtype: NoneType
+        """
+        AlbaCLI.run(command='proxy-delete-namespace',
+                    named_params={'host': ip, 'port': port},
+                    extra_params=[namespace_name])
+        poller = AlbaHealthCheck._get_namespace_poller()
+        namespace_removed = poller.poll(AlbaHealthCheck._is_namespace_removed, abm_config, namespace_name)
+        CheckMetrics.add_wait_time(CheckMetrics.NAMESPACE_DELETION_WAIT, poller.elapsed)
+        if namespace_removed is None:
+            raise RuntimeError('Delete namespace has timed out after {0}s'.format(round(poller.elapsed, 2)))
+
+    @staticmethod
+    def _get_namespace_poller():
+        """
+        Gets a poller to wait for a namespace to be created or removed
+        :return: the poller
+        :rtype: ovs.extensions.healthcheck.helpers.poller.Poller
+        """
+        return Poller(timeout=AlbaHealthCheck.NAMESPACE_TIMEOUT,
+                      interval=AlbaHealthCheck.NAMESPACE_POLL_INTERVAL,
+                      max_interval=AlbaHealthCheck.NAMESPACE_MAX_POLL_INTERVAL,
+                      jitter=AlbaHealthCheck.NAMESPACE_POLL_JITTER)
+
+    @staticmethod
+    def _is_namespace_active(abm_config, namespace_name):
+        """
+        Checks whether the namespace is active on all of its osds
+        :param abm_config: path of the configuration file for the abm
+        :type abm_config: str
+        :param namespace_name: name of the namespace
+        :type namespace_name: str
+        :return: True when the namespace is active, None when it is not (yet)
+        :rtype: bool
+        """
+        list_ns_osds_output = AlbaCLI.run(command='list-ns-osds', config=abm_config, extra_params=[namespace_name])
+        # Example output: [[0, [u'Active']], [3, [u'Active']]]
+        for osd_info in list_ns_osds_output:  # If there are no osd_info records, uploading will fail so covered by HC
+            osd_state = osd_info[1][0]
+            if osd_state != 'Active':
+                return None
+        return True
+
+    @staticmethod
+    def _is_namespace_removed(abm_config, namespace_name):
+        """
+        Checks whether the namespace no longer exists
+        :param abm_config: path of the configuration file for the abm
+        :type abm_config: str
+        :param namespace_name: name of the namespace
+        :type namespace_name: str
+        :return: True when the namespace no longer exists, None when it still does
+        :rtype: bool
+        """
+        try:
+            AlbaCLI.run(command='show-namespace', config=abm_config, extra_params=[namespace_name])  # Will fail if the namespace does not exist
+        except AlbaException:
+            return True
+        return None
+
+    @staticmethod
+    def _claim_namespaces(namespace_names, own_namespaces=None):
+        """
+        Claims namespaces for the calling thread. A namespace can only be claimed once, until it is released
+        :param namespace_names: names of the namespaces to claim
+        :type namespace_names: list[str]
+        :param own_namespaces: namespaces which were claimed by the calling thread before. These are returned as well
+        :type own_namespaces: list[str]
+        :return: the names of the claimed namespaces, in order
+        :rtype: list[str]
+        """
+        own_namespaces = own_namespaces or []
+        claimed = []
+        with AlbaHealthCheck._namespaces_lock:
+            for namespace_name in namespace_names:
+                if namespace_name in own_namespaces:
+                    claimed.append(namespace_name)
+                elif namespace_name not in AlbaHealthCheck._claimed_namespaces:
+                    AlbaHealthCheck._claimed_namespaces.add(namespace_name)
+                    claimed.append(namespace_name)
+        return claimed
+
+    @staticmethod
+    def _release_namespaces(namespace_names):
+        """
+        Releases claimed namespaces (see _claim_namespaces)
+        :param namespace_names: names of the namespaces to release
+        :type namespace_names: iterable
+        :return: None
+        :rtype: NoneType
+        """
+        with AlbaHealthCheck._namespaces_lock:
+            AlbaHealthCheck._claimed_namespaces.difference_update(namespace_names)
+
+    @staticmethod
+    @on_request_only
+    @expose_to_cli(MODULE, 'proxy-benchmark', HealthCheckCLIRunner.ADDON_TYPE)
+    def benchmark_proxies(result_handler):
+        """
+        Measures the throughput and latency of all Alba Proxies on the local machine
+        Objects of every configured size are uploaded and downloaded through every proxy, with every preset in use
+        Only executed when requested by name: ovs healthcheck alba proxy-benchmark
+        :param result_handler: logging object
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :return: None
+        :rtype: NoneType
+        """
+        settings = dict(AlbaHealthCheck.PROXY_BENCHMARK_SETTINGS)
+        settings.update(result_handler.context.settings.get('proxy_benchmark', {}))
+        result_handler.info('Benchmarking the ALBA proxies.', add_to_result=False)
+        local_proxies = ServiceHelper.get_local_proxy_services()
+        if len(local_proxies) == 0:
+            return result_handler.skip('Found no proxies.')
+        # Concurrent benchmarks would influence each other's results and remove each other's namespaces as leftovers
+        lock = SingleExecution(AlbaHealthCheck.PROXY_BENCHMARK_LOCK)
+        if lock.try_acquire() is False:
+            return result_handler.skip('Another proxy benchmark is running on this node.')
+        try:
+            # Results by proxy, by preset
+            benchmarks = {}
+            for service in local_proxies:
+                proxy_service, ip, abm_config, preset_names = AlbaHealthCheck._get_proxy_presets(result_handler, service, [])
+                if proxy_service is None:
+                    continue
+                # The presets are benchmarked one after the other, they would influence each other's results
+                for preset_name in preset_names:
+                    try:
+                        benchmarks.setdefault(service.name, {})[preset_name] = AlbaHealthCheck._benchmark_proxy_preset(result_handler, service, ip, abm_config, preset_name, settings)
+                    except (AlbaException, RuntimeError) as ex:
+                        result_handler.failure('Benchmarking proxy {0} with preset {1} has failed. Got {2}'.format(service.name, preset_name, ex))
+            result_handler.add_data(key='proxy_benchmark', value=benchmarks)
+        finally:
+            lock.release()
+
+    @staticmethod
+    def _benchmark_proxy_preset(result_handler, service, ip, abm_config, preset_name, settings):
+        """
+        Uploads and downloads objects of every configured size to a new namespace with the preset through the proxy
+        The latencies include starting the alba cli
+        :param result_handler: logging object
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param service: the proxy service
+        :type service: ovs.dal.hybrids.service.Service
+        :param ip: ip the proxy listens on
+        :type ip: str
+        :param abm_config: path of the configuration file for the abm of the backend of the proxy
+        :type abm_config: str
+        :param preset_name: name of the preset to benchmark
+        :type preset_name: str
+        :param settings: object_sizes (bytes), object_count (objects per size) and concurrency (concurrent uploads or downloads)
+        :type settings: dict
+        :return: throughput and latency percentiles of the uploads and downloads, by object size
+        :rtype: dict
+        """
+        # The proxy test runs in other processes as well, it does not know which benchmark namespaces are still in use
+        namespace_key_prefix = AlbaHealthCheck.PROXY_BENCHMARK_NAMESPACE_KEY.format(preset_name, result_handler.context.machine_id)
+        namespace_name = '{0}_{1}'.format(namespace_key_prefix, uuid.uuid4())
+        named_params = {'host': ip, 'port': service.ports[0]}
+        AlbaHealthCheck._remove_benchmark_leftovers(result_handler, service, ip, abm_config, namespace_key_prefix)
+        AlbaHealthCheck._claim_namespaces([namespace_name])
+        temp_dir = tempfile.mkdtemp(prefix='ovs-hc-')
+        created = False
+        results = {}
+        try:
+            AlbaHealthCheck._create_namespace(ip, service.ports[0], abm_config, namespace_name, preset_name)
+            created = True
+            for object_size in settings['object_sizes']:
+                object_loc = os.path.join(temp_dir, 'object-{0}'.format(object_size))
+                AlbaHealthCheck._create_test_object(object_loc, object_size)
+                object_keys = ['ovs-healthcheck-obj-{0}'.format(uuid.uuid4()) for _ in xrange(settings['object_count'])]
+
+                def _upload(object_key):
+                    AlbaCLI.run(command='proxy-upload-object', named_params=named_params, extra_params=[namespace_name, object_loc, object_key])
+
+                def _download(object_key):
+                    fetched_loc = os.path.join(temp_dir, object_key)
+                    AlbaCLI.run(command='proxy-download-object', named_params=named_params, extra_params=[namespace_name, object_key, fetched_loc])
+                    os.remove(fetched_loc)
+
+                results[str(object_size)] = {}
+                for operation, function in [('upload', _upload), ('download', _download)]:
+                    statistics = AlbaHealthCheck._benchmark_operation(function, object_keys, object_size, settings['concurrency'])
+                    results[str(object_size)][operation] = statistics
+                    result_handler.success('Proxy {0} with preset {1}: {2} {3}s of {4} bytes at {5} MB/s (p50 {6}s, p95 {7}s, p99 {8}s)'
+                                           .format(service.name, preset_name, len(object_keys), operation, object_size, statistics['mb_per_s'],
+                                                   statistics['p50'], statistics['p95'], statistics['p99']))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            try:
+                if created is True:
+                    AlbaHealthCheck._delete_namespace(ip, service.ports[0], abm_config, namespace_name)
+            except (AlbaException, RuntimeError) as ex:
+                result_handler.warning('Failed to remove namespace {0} on proxy {1}. Got {2}'.format(namespace_name, service.name, ex))
+            finally:
+                AlbaHealthCheck._release_namespaces([namespace_name])
+        return results
+
+    @staticmethod
+    def _remove_benchmark_leftovers(result_handler, service, ip, abm_config, namespace_key_prefix):
+        """
+        Removes the namespaces of interrupted benchmarks of a preset on this node
+        Only one benchmark runs on a node at a time (see benchmark_proxies)
+        :param result_handler: logging object
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param service: the proxy service
+        :type service: ovs.dal.hybrids.service.Service
+        :param ip: ip the proxy listens on
+        :type ip: str
+        :param abm_config: path of the configuration file for the abm of the backend of the proxy
+        :type abm_config: str
+        :param namespace_key_prefix: name of the benchmark namespaces of the preset on this node, without the _<uuid> suffix
+        :type namespace_key_prefix: str
+        :return: None
+        :rtype: NoneType
+        """
+        namespace_names = [namespace['name'] for namespace in AlbaCLI.run(command='list-namespaces', config=abm_config)]
+        leftovers = AlbaHealthCheck._claim_namespaces([namespace_name for namespace_name in namespace_names if namespace_name.startswith(namespace_key_prefix + '_')])
+        try:
+            for namespace_name in leftovers:
+                result_handler.warning('Deleting namespace {0} which was leftover from a previous benchmark.'.format(namespace_name))
+                try:
+                    AlbaHealthCheck._delete_namespace(ip, service.ports[0], abm_config, namespace_name)
+                except (AlbaException, RuntimeError) as ex:
+                    result_handler.warning('Failed to remove namespace {0} on proxy {1}. Got {2}'.format(namespace_name, service.name, ex))
+        finally:
+            AlbaHealthCheck._release_namespaces(leftovers)
+
+    @staticmethod
+    def _benchmark_operation(function, object_keys, object_size, concurrency):
+        """
+        Executes an operation for every object and measures the throughput and the latency of the operation
+        :param function: the operation. Receives the key of the object
+        :type function: callable
+        :param object_keys: keys of the objects
+        :type object_keys: list[str]
+        :param object_size: size of every object in bytes
+        :type object_size: int
+        :param concurrency: amount of operations executed at the same time
+        :type concurrency: int
+        :return: the throughput in MB/s and the p50, p95 and p99 latency in seconds
+        :rtype: dict
+        """
+        def _timed(object_key):
+            operation_start = time.time()
+            function(object_key)
+            return operation_start, time.time()
+
+        timings = ConcurrencyHelper.map(_timed, object_keys, concurrency)
+        # Measured from the start of the first operation until the end of the last one, starting the threads is not included
+        duration = max(end for _, end in timings) - min(start for start, _ in timings)
+        statistics = dict((key, round(value, 4)) for key, value in StatisticsHelper.get_percentiles([end - start for start, end in timings], [50, 95, 99]).iteritems())
+        statistics['mb_per_s'] = round(object_size * len(object_keys) / max(duration, 1e-6) / 1000 ** 2, 2)
+        return statistics
 
     @staticmethod
     def _get_all_responding_backends(result_handler):
@@ -318,28 +917,21 @@ class AlbaHealthCheck(object):
         :rtype: list[dict]
         """
         result = []
+        topology = BackendTopology.get()
         for alba_backend in BackendHelper.get_albabackends():
             # check if backend would be available for vpool
             try:
-                # collect OSDs connected to a backend
-                osds = []
-                for local_stack in alba_backend.local_stack.itervalues():
-                    for osd_stack in local_stack.itervalues():
-                        for osd in osd_stack['osds'].itervalues():
-                            if alba_backend.guid != osd.get('claimed_by'):
-                                continue
-                            else:
-                                osds.append(osd)
-
+                scaling = alba_backend.scaling
                 # create result
                 result.append({
                     'name': alba_backend.name,
                     'alba_id': alba_backend.alba_id,
-                    'is_available_for_vpool': any(preset for preset in alba_backend.presets if preset.get('is_available') is True),
+                    # Only used for local backends, the availability of global backends is not checked
+                    'is_available_for_vpool': scaling == 'LOCAL' and any(preset for preset in alba_backend.presets if preset.get('is_available') is True),
                     'guid': alba_backend.guid,
                     'backend_guid': alba_backend.backend_guid,
-                    'disks': osds,
-                    'type': alba_backend.scaling
+                    'disks': topology.get_osds_by_backend(alba_backend.guid),
+                    'type': scaling
                 })
             except RuntimeError as ex:
                 result_handler.warning('Error occurred while unpacking alba backend {0}. Got {1}.'.format(alba_backend.name, ex))
@@ -365,34 +957,27 @@ class AlbaHealthCheck(object):
             result_handler.success('We found {0} backend(s)!'.format(len(alba_backends)))
 
             result_handler.info('Checking the ALBA ASDs.', add_to_result=False)
-            for backend in alba_backends:
-                backend_name = backend['name']
-                # check disks of backend, ignore global backends
-                if backend['type'] != 'LOCAL':
-                    result_handler.skip('Alba backend {0} is a global backend.'.format(backend_name), add_to_result=False)
+            # The backends are evaluated concurrently: a backend which does not respond only delays the check until the deadline
+            timeout = result_handler.context.settings.get('backend_timeout', AlbaHealthCheck.BACKEND_TIMEOUT)
+            probe_semaphores = AlbaHealthCheck._get_probe_semaphores(result_handler, [asd for backend in alba_backends for asd in backend['disks']])
+            # A backend of which the evaluation of a previous run still hangs is skipped: hanging evaluations would hold on to all alba cli workers
+            outcomes = ConcurrencyHelper.map_with_deadline(lambda backend: AlbaHealthCheck._run_buffered(result_handler, AlbaHealthCheck._check_backend, backend, probe_semaphores),
+                                                           alba_backends, timeout, key=lambda backend: ('backend-test', backend['guid']))
+            asd_latencies = {}
+            for backend, outcome in zip(alba_backends, outcomes):
+                if outcome is ConcurrencyHelper.TIMED_OUT:
+                    result_handler.warning('Could not fetch the asd information for alba backend {0} within {1}s'.format(backend['name'], timeout))
                     continue
-
-                config = Configuration.get_configuration_path('/ovs/arakoon/{0}-abm/config'.format(backend_name))
-                try:
-                    result_disks = AlbaHealthCheck._check_backend_asds(result_handler, backend['disks'], backend_name, config)
-                except Exception:
-                    result_handler.warning('Could not fetch the asd information for alba backend {0}'.format(backend_name))
+                if outcome is ConcurrencyHelper.STILL_RUNNING:
+                    result_handler.warning('Skipped alba backend {0}: the evaluation of a previous run did not finish yet'.format(backend['name']))
                     continue
-                working_disks = result_disks['working']
-                defective_disks = result_disks['broken']
-                # check if backend is available for vPOOL attachment / use
-                if backend['is_available_for_vpool']:
-                    if len(defective_disks) == 0:
-                        result_handler.success('Alba backend {0} should be available for VPool use. All asds are working fine!'.format(backend_name))
-                    else:
-                        result_handler.warning('Alba backend {0} should be available for VPool use with {1} asds, but there are {2} defective asds: {3}'
-                                               .format(backend_name, len(working_disks), len(defective_disks), ', '.join(defective_disks)))
-                else:
-                    if len(working_disks) == 0 and len(defective_disks) == 0:
-                        result_handler.skip('Alba backend {0} is not available for vPool use, there are no asds assigned to this backend!'.format(backend_name))
-                    else:
-                        result_handler.failure('Alba backend {0} is not available for vPool use, preset requirements not satisfied! There are {1} working asds AND {2} '
-                                               'defective asds!'.format(backend_name, len(working_disks), len(defective_disks)))
+                records, latency, exc_info = outcome
+                result_handler.replay_test(records=records)
+                if exc_info is not None:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                if latency is not None:
+                    asd_latencies[backend['name']] = latency
+            result_handler.add_data(key='asd_latency', value=asd_latencies)
         except NotFoundException as ex:
             result_handler.failure('Failed to fetch the object with exception: {0}'.format(ex))
         except ConnectionFailedException as ex:
@@ -400,6 +985,47 @@ class AlbaHealthCheck(object):
         except (ArakoonNotFound, ArakoonNoMaster, ArakoonNoMasterResult) as e:
             result_handler.failure('Seems like a arakoon has some problems: {0}'.format(e))
 
+    @staticmethod
+    def _check_backend(result_handler, backend, probe_semaphores):
+        """
+        Checks the ASDs of a backend and whether the backend can be used
+        :param result_handler: logging object
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param backend: information about the alba backend (see _get_all_responding_backends)
+        :type backend: dict
+        :param probe_semaphores: semaphores bounding the concurrent ASD probes of all backends (see _get_probe_semaphores)
+        :type probe_semaphores: tuple(dict, threading.BoundedSemaphore)
+        :return: the ASD latencies of the backend (see _check_asd_latencies). None when the ASDs were not checked
+        :rtype: dict
+        """
+        backend_name = backend['name']
+        # check disks of backend, ignore global backends
+        if backend['type'] != 'LOCAL':
+            result_handler.skip('Alba backend {0} is a global backend.'.format(backend_name), add_to_result=False)
+            return None
+
+        try:
+            result_disks = AlbaHealthCheck._check_backend_asds(result_handler, backend['disks'], backend_name, probe_semaphores)
+        except Exception:
+            result_handler.warning('Could not fetch the asd information for alba backend {0}'.format(backend_name))
+            return None
+        working_disks = result_disks['working']
+        defective_disks = result_disks['broken']
+        # check if backend is available for vPOOL attachment / use
+        if backend['is_available_for_vpool']:
+            if len(defective_disks) == 0:
+                result_handler.success('Alba backend {0} should be available for VPool use. All asds are working fine!'.format(backend_name))
+            else:
+                result_handler.warning('Alba backend {0} should be available for VPool use with {1} asds, but there are {2} defective asds: {3}'
+                                       .format(backend_name, len(working_disks), len(defective_disks), ', '.join(defective_disks)))
+        else:
+            if len(working_disks) == 0 and len(defective_disks) == 0:
+                result_handler.skip('Alba backend {0} is not available for vPool use, there are no asds assigned to this backend!'.format(backend_name))
+            else:
+                result_handler.failure('Alba backend {0} is not available for vPool use, preset requirements not satisfied! There are {1} working asds AND {2} '
+                                       'defective asds!'.format(backend_name, len(working_disks), len(defective_disks)))
+        return result_disks['latency']
+
     @staticmethod
     @cluster_check
     @expose_to_cli(MODULE, 'disk-safety-test', HealthCheckCLIRunner.ADDON_TYPE)
@@ -412,97 +1038,138 @@ class AlbaHealthCheck(object):
         :rtype: NoneType
         """
         results = AlbaHealthCheck.get_disk_safety(result_handler)
+        max_hours_zero_disk_safety = result_handler.context.settings.get('max_hours_zero_disk_safety', AlbaHealthCheck.MAX_HOURS_ZERO_DISK_SAFETY)
+        now = time.time()
         for backend_name, policies in results.iteritems():
             result_handler.info('Checking disk safety on backend: {0}'.format(backend_name), add_to_result=False)
             for policy_prefix, policy_details in policies.iteritems():
                 # '1,2' is policy_prefix and value is policy_details
-                # {'1,2': {'max_disk_safety': 2, 'current_disk_safety': {<namespaces in safety buckets>} }
-                result_handler.info('Checking policy {0} with max. disk safety {1}'.format(policy_prefix, policy_details['max_disk_safety']), add_to_result=False)
-                if len(policy_details['current_disk_safety'].values()) == 0:
+                # {'1,2': {'max_disk_safety': 2, 'current_disk_safety': {<namespace counts and least safe namespaces by safety>} }
+                max_disk_safety = policy_details['max_disk_safety']
+                current_disk_safety = policy_details['current_disk_safety']
+                result_handler.info('Checking policy {0} with max. disk safety {1}'.format(policy_prefix, max_disk_safety), add_to_result=False)
+                if len(current_disk_safety) == 0:
                     result_handler.skip('No data/namespaces found on backend {0}.'.format(backend_name))
                     continue
                 # if there is only 1 bucket category that is equal to the max_disk_safety, all your data is safe
-                if len(policy_details['current_disk_safety']) == 1 and policy_details['max_disk_safety'] in policy_details['current_disk_safety']:
+                if len(current_disk_safety) == 1 and max_disk_safety in current_disk_safety:
                     # all data is safe!
-                    result_handler.success('All data is safe on backend {0} with {1} namespace(s)'.format(backend_name, len(policy_details['current_disk_safety'][policy_details['max_disk_safety']])))
-                else:
-                    # some data is not or less safe!
-                    for disk_safety, namespaces in policy_details['current_disk_safety'].iteritems():
-                        if disk_safety == policy_details['max_disk_safety']:
-                            result_handler.success('The disk safety of {0} namespace(s) is/are totally safe!'.format(len(namespaces)))
-                        elif disk_safety != 0:
-                            # avoid failure override
-                            output = ',\n'.join(['{0} with {1}% of its objects'.format(ns['namespace'], str(ns['amount_in_bucket'])) for ns in namespaces])
-                            result_handler.warning('The disk safety of {0} namespace(s) is {1}, max. disk safety is {2}: \n{3}'
-                                                   .format(len(namespaces), disk_safety, policy_details['max_disk_safety'], output))
-                        else:
-                            # @TODO: after x amount of hours in disk safety 0 put in error, else put in warning
-                            output = ',\n'.join(['{0} with {1}% of its objects'.format(ns['namespace'], str(ns['amount_in_bucket'])) for ns in namespaces])
-                            result_handler.failure('The disk safety of {0} namespace(s) is/are ZERO: \n{1}'.format(len(namespaces), output))
+                    result_handler.success('All data is safe on backend {0} with {1} namespace(s)'.format(backend_name, current_disk_safety[max_disk_safety]['namespace_count']))
+                    continue
+                # some data is not or less safe!
+                for disk_safety, details in sorted(current_disk_safety.iteritems(), reverse=True):
+                    if disk_safety >= max_disk_safety:
+                        result_handler.success('The disk safety of {0} namespace(s) is/are totally safe!'.format(details['namespace_count']))
+                        continue
+                    output = ',\n'.join(['{0} with {1:.5f}% of its objects{2}'.format(ns['namespace'], ns['amount_in_bucket'], '' if ns['since'] is None else ' for {0:.1f} hour(s)'.format((now - ns['since']) / 3600.0))
+                                          for ns in details['namespaces']])
+                    if details['namespace_count'] > len(details['namespaces']):
+                        output += '\n(and {0} more namespace(s))'.format(details['namespace_count'] - len(details['namespaces']))
+                    if disk_safety > 0:
+                        # avoid failure override
+                        result_handler.warning('The disk safety of {0} namespace(s) is {1}, max. disk safety is {2}: \n{3}'
+                                               .format(details['namespace_count'], disk_safety, max_disk_safety, output))
+                    elif details['since'] is not None and (now - details['since']) / 3600.0 < max_hours_zero_disk_safety:
+                        # Allow the maintenance to repair the namespaces before failing
+                        result_handler.warning('The disk safety of {0} namespace(s) is/are ZERO since {1:.1f} hour(s), failing after {2} hour(s): \n{3}'
+                                               .format(details['namespace_count'], (now - details['since']) / 3600.0, max_hours_zero_disk_safety, output))
+                    else:
+                        duration = '' if details['since'] is None else ' since {0:.1f} hour(s)'.format((now - details['since']) / 3600.0)
+                        result_handler.failure('The disk safety of {0} namespace(s) is/are ZERO{1}: \n{2}'.format(details['namespace_count'], duration, output))
 
     @classmethod
     def get_disk_safety(cls, result_handler):
         """
         Fetch safety of every namespace in every backend
+        - namespace_count is the amount of namespaces with objects at the disk safety
+        - namespaces lists the least safe namespaces at the disk safety (see DiskSafetyAggregator)
+        - since is the timestamp at which the namespaces reached the disk safety (see DiskSafetyTimeline)
         - amount_in_bucket is in %
         - max_disk_safety is the max. key that should be available in current_disk_safety
         Output example: {'mybackend02': {'1,2': {'max_disk_safety': 2, 'current_disk_safety':
-        {2: {'namespace': u'b4eef27e-ef54-4fe8-8658-cdfbda7ceae4_000000065', 'amount_in_bucket': 100}}}}, 'mybackend':
+        {2: {'namespace_count': 1, 'namespaces': [], 'since': None}}}}, 'mybackend':
         {'1,2': {'max_disk_safety': 2, 'current_disk_safety':
-        {2: {'namespace': u'b4eef27e-ef54-4fe8-8658-cdfbda7ceae4_000000065', 'amount_in_bucket': 100}}}},
+        {1: {'namespace_count': 1, 'since': 1500000000, 'namespaces': [{'namespace': u'b4eef27e-ef54-4fe8-8658-cdfbda7ceae4_000000065', 'amount_in_bucket': 100.0, 'since': 1500000000}]}}}},
         'mybackend-global': {'1,2': {'max_disk_safety': 2, 'current_disk_safety':
-        {1: {'namespace': u'e88c88c9-632c-4975-b39f-e9993e352560', 'amount_in_bucket': 100}}}}}
+        {0: {'namespace_count': 1, 'since': 1500000000, 'namespaces': [{'namespace': u'e88c88c9-632c-4975-b39f-e9993e352560', 'amount_in_bucket': 100.0, 'since': 1500000000}]}}}}}
         :param result_handler: logging object
         :type result_handler: ovs.extensions.healthcheck.result.HCResults
         :return: Safety of every namespace in every backend
         :rtype: dict
         """
+        top_size = result_handler.context.settings.get('disk_safety_top_namespaces', DiskSafetyAggregator.DEFAULT_TOP_SIZE)
+        timeout = result_handler.context.settings.get('backend_timeout', cls.BACKEND_TIMEOUT)
+        alba_backends = BackendHelper.get_albabackends()
+        # The backends are fetched concurrently: a backend which does not respond only delays the check until the deadline
+        # A backend of which the fetch of a previous run still hangs is skipped: hanging fetches would hold on to all alba cli workers
+        outcomes = ConcurrencyHelper.map_with_deadline(lambda alba_backend: cls._run_buffered(result_handler, cls._get_backend_disk_safety, alba_backend, top_size),
+                                                       alba_backends, timeout, key=lambda alba_backend: ('disk-safety', alba_backend.guid))
         disk_safety_overview = {}
-        for alba_backend in BackendHelper.get_albabackends():
+        for alba_backend, outcome in zip(alba_backends, outcomes):
             disk_safety_overview[alba_backend.name] = {}
-            config = Configuration.get_configuration_path('ovs/arakoon/{0}-abm/config'.format(alba_backend.name))
-            # Fetch alba info
-            try:
-                # @TODO add this to extra_params to include corrupt asds. Currently there is a bug with it
-                # Ticket: https://github.com/openvstorage/alba/issues/441
-                # extra_params=['--include-errored-as-dead']
-                namespaces = AlbaCLI.run(command='get-disk-safety', config=config)
-                cache_eviction_prefix_preset_pairs = AlbaCLI.run(command='get-maintenance-config', config=config)['cache_eviction_prefix_preset_pairs']
-                presets = AlbaCLI.run(command='list-presets', config=config)
-            except AlbaException as ex:
-                result_handler.exception('Could not fetch alba information for backend {0} Message: {1}'.format(alba_backend.name, ex))
-                # Do not execute further
+            if outcome is ConcurrencyHelper.TIMED_OUT:
+                result_handler.exception('Could not fetch alba information for backend {0} within {1}s'.format(alba_backend.name, timeout))
                 continue
-
-            # collect in_use presets & their policies
-            for preset in presets:
-                if not preset['in_use']:
-                    continue
-                for policy in preset['policies']:
-                    disk_safety_overview[alba_backend.name]['{0},{1}'.format(str(policy[0]), str(policy[1]))] = {'current_disk_safety': {}, 'max_disk_safety': policy[1]}
-
-            # collect namespaces
-            ignorable_namespaces = [cls.BASE_NAMESPACE_KEY] + cache_eviction_prefix_preset_pairs.keys()
-            test_worthy_namespaces = (item for item in namespaces if not item['namespace'].startswith(tuple(ignorable_namespaces)))
-            for namespace in test_worthy_namespaces:
-                # calc total objects in namespace
-                total_count = 0
-                for bucket_safety in namespace['bucket_safety']:
-                    total_count += bucket_safety['count']
-
-                for bucket_safety in namespace['bucket_safety']:
-                    # calc safety bucket
-                    calculated_disk_safety = bucket_safety['remaining_safety']
-                    safety = '{0},{1}'.format(str(bucket_safety['bucket'][0]), str(bucket_safety['bucket'][1]))
-                    current_disk_safety = disk_safety_overview[alba_backend.name][safety]['current_disk_safety']
-                    to_be_added_namespace = {'namespace': namespace['namespace'],
-                                             'amount_in_bucket': "%.5f" % (float(bucket_safety['count'])/float(total_count)*100)}
-                    if calculated_disk_safety in current_disk_safety:
-                        current_disk_safety[calculated_disk_safety].append(to_be_added_namespace)
-                    else:
-                        current_disk_safety[calculated_disk_safety] = [to_be_added_namespace]
+            if outcome is ConcurrencyHelper.STILL_RUNNING:
+                result_handler.exception('Could not fetch alba information for backend {0}: the fetch of a previous run did not finish yet'.format(alba_backend.name))
+                continue
+            records, overview, exc_info = outcome
+            result_handler.replay_test(records=records)
+            if exc_info is not None:
+                raise exc_info[0], exc_info[1], exc_info[2]
+            if overview is not None:
+                disk_safety_overview[alba_backend.name] = overview
         return disk_safety_overview
 
+    @classmethod
+    def _get_backend_disk_safety(cls, result_handler, alba_backend, top_size):
+        """
+        Fetch safety of every namespace of a backend
+        :param result_handler: logging object
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param alba_backend: the backend
+        :type alba_backend: ovs.dal.hybrids.albabackend.AlbaBackend
+        :param top_size: amount of namespaces to list per policy and disk safety
+        :type top_size: int
+        :return: Safety of every namespace by policy (see get_disk_safety). None when the information could not be fetched
+        :rtype: dict
+        """
+        config = Configuration.get_configuration_path('ovs/arakoon/{0}-abm/config'.format(alba_backend.name))
+        # Fetch alba info
+        try:
+            # @TODO add this to extra_params to include corrupt asds. Currently there is a bug with it
+            # Ticket: https://github.com/openvstorage/alba/issues/441
+            # extra_params=['--include-errored-as-dead']
+            namespaces = AlbaCLI.run(command='get-disk-safety', config=config)
+            cache_eviction_prefix_preset_pairs = AlbaCLI.run(command='get-maintenance-config', config=config)['cache_eviction_prefix_preset_pairs']
+            presets = AlbaCLI.run(command='list-presets', config=config)
+        except AlbaException as ex:
+            result_handler.exception('Could not fetch alba information for backend {0} Message: {1}'.format(alba_backend.name, ex))
+            # Do not execute further
+            return None
+
+        timeline = DiskSafetyTimeline(alba_backend.guid)
+        aggregator = DiskSafetyAggregator(top_size, timeline)
+        # collect in_use presets & their policies
+        for preset in presets:
+            if not preset['in_use']:
+                continue
+            for policy in preset['policies']:
+                aggregator.add_policy(policy)
+
+        # collect namespaces
+        ignorable_namespaces = tuple([cls.BASE_NAMESPACE_KEY] + cache_eviction_prefix_preset_pairs.keys())
+        for namespace in namespaces:
+            if not namespace['namespace'].startswith(ignorable_namespaces):
+                aggregator.add_namespace(namespace['namespace'], namespace['bucket_safety'])
+        del namespaces  # The output of get-disk-safety can be large, it is no longer needed
+        timeline.save()
+        if timeline.intact is False:
+            # Without the timeline, it is unknown for how long the namespaces are at disk safety zero (see check_disk_safety)
+            result_handler.warning('Could not keep track of the disk safety of backend {0} in the volatile store. Namespaces at disk safety zero are reported as failure'
+                                   .format(alba_backend.name))
+        return aggregator.get_overview()
+
     # @todo: incorporate asd-manager code to check the service
     @staticmethod
     @expose_to_cli(MODULE, 'processes-test', HealthCheckCLIRunner.ADDON_TYPE)
@@ -515,17 +1182,31 @@ class AlbaHealthCheck(object):
         :rtype: NoneType
         """
         result_handler.info('Checking LOCAL ALBA services: ', add_to_result=False)
-        client = SSHClient(AlbaHealthCheck.LOCAL_SR)
+        client = SSHClient(result_handler.context.storagerouter)
         service_manager = ServiceFactory.get_manager()
         services = [service for service in service_manager.list_services(client=client) if service.startswith(AlbaHealthCheck.MODULE)]
         if len(services) == 0:
             result_handler.skip('Found no LOCAL ALBA services.')
             return
+        flapping_settings = ServiceHelper.get_flapping_settings(result_handler.context.settings)
+        statuses = ServiceHelper.get_service_statuses(services, client)
+        flapping_unknown = []
         for service_name in services:
-            if service_manager.get_service_status(service_name, client) == 'active':
-                result_handler.success('Service {0} is running!'.format(service_name))
-            else:
+            status = statuses[service_name]
+            if status['state'] != 'active':
                 result_handler.failure('Service {0} is NOT running! '.format(service_name))
+                continue
+            flapping = ServiceHelper.is_flapping(status, flapping_settings['max_restarts'], flapping_settings['window'])
+            if flapping is True:
+                result_handler.warning('Service {0} is running but restarted {1} times, last restart {2}s ago'
+                                       .format(service_name, status['restarts'], int(time.time() - status['active_since'])))
+            else:
+                result_handler.success('Service {0} is running!'.format(service_name))
+                if flapping is None:
+                    flapping_unknown.append(service_name)
+        if len(flapping_unknown) > 0:
+            result_handler.skip(ServiceHelper.FLAPPING_UNKNOWN_MESSAGE.format(', '.join(flapping_unknown)))
+        result_handler.add_data(key='services', value=statuses)
 
     @staticmethod
     @expose_to_cli(MODULE, 'proxy-port-test', HealthCheckCLIRunner.ADDON_TYPE)
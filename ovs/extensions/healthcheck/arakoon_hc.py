@@ -29,9 +29,8 @@ from StringIO import StringIO
 from ovs.extensions.db.arakooninstaller import ArakoonClusterConfig
 from ovs_extensions.db.arakoon.pyrakoon.pyrakoon.compat import ArakoonNotFound, ArakoonNoMaster, ArakoonNoMasterResult
 from ovs.extensions.generic.configuration import Configuration
-from ovs.extensions.generic.system import System
 from ovs.extensions.healthcheck.expose_to_cli import expose_to_cli, HealthCheckCLIRunner
-from ovs.extensions.healthcheck.decorators import cluster_check
+from ovs.extensions.healthcheck.decorators import cluster_check, main_thread_only
 from ovs.extensions.healthcheck.helpers.network import NetworkHelper
 from ovs.extensions.healthcheck.helpers.service import ServiceHelper
 from ovs.extensions.healthcheck.helpers.storagerouter import StoragerouterHelper
@@ -46,7 +45,6 @@ class ArakoonHealthCheck(object):
     MODULE = 'arakoon'
     # oldest tlx files may not older than x days. If they are - failed collapse
     MAX_COLLAPSE_AGE = 2
-    LOCAL_SR = System.get_my_storagerouter()
     INTEGRITY_TIMEOUT = 10
 
     @staticmethod
@@ -75,14 +73,14 @@ class ArakoonHealthCheck(object):
             arakoon_config = ArakoonClusterConfig(str(cluster))
             master_node_ids = [node.name for node in arakoon_config.nodes]
 
-            if ArakoonHealthCheck.LOCAL_SR.machine_id not in master_node_ids:
+            if result_handler.context.storagerouter.machine_id not in master_node_ids:
                 continue
             # add node that is available for arakoon cluster
             nodes_per_cluster_result = {}
             missing_nodes_per_cluster = {}
             missing_tlog_per_cluster = {}
 
-            tlog_dir = arakoon_config.export_dict()[ArakoonHealthCheck.LOCAL_SR.machine_id]['tlog_dir']
+            tlog_dir = arakoon_config.export_dict()[result_handler.context.storagerouter.machine_id]['tlog_dir']
             for node_id in master_node_ids:
                 machine = StoragerouterHelper.get_by_machine_id(node_id)
                 if machine is None:
@@ -130,7 +128,7 @@ class ArakoonHealthCheck(object):
             config = ConfigParser.RawConfigParser()
             config.readfp(StringIO(e))
             for section in config.sections():
-                if section == ArakoonHealthCheck.LOCAL_SR.machine_id:
+                if section == result_handler.context.storagerouter.machine_id:
                     process_name = "arakoon-{0}".format(arakoon_cluster)
                     arakoon_ports[process_name] = [int(config.get(section, 'client_port')), int(config.get(section, 'messaging_port'))]  # cast port strings to int
                     break
@@ -158,7 +156,7 @@ class ArakoonHealthCheck(object):
         :rtype: NoneType
         """
         result_handler.info('Checking PORT CONNECTIONS of arakoon nodes.', add_to_result=False)
-        ip = ArakoonHealthCheck.LOCAL_SR.ip
+        ip = result_handler.context.storagerouter.ip
         for service in ServiceHelper.get_local_arakoon_services():
             for port in service.ports:
                 result = NetworkHelper.check_port_connection(port, ip)
@@ -194,7 +192,7 @@ class ArakoonHealthCheck(object):
 
         for cluster_name, arakoon_nodes in arakoon_clusters.iteritems():
             for node_id, tlog_dir in arakoon_nodes.iteritems():
-                if node_id != ArakoonHealthCheck.LOCAL_SR.machine_id:
+                if node_id != result_handler.context.storagerouter.machine_id:
                     continue
                 try:
                     files = os.listdir(tlog_dir)
@@ -264,6 +262,7 @@ class ArakoonHealthCheck(object):
 
     @staticmethod
     @cluster_check
+    @main_thread_only
     @expose_to_cli('arakoon', 'integrity-test', HealthCheckCLIRunner.ADDON_TYPE)
     def verify_integrity(result_handler, arakoon_clusters=None):
         """
@@ -302,7 +301,7 @@ class ArakoonHealthCheck(object):
         result_handler.info('Starting Arakoon integrity test', add_to_result=False)
         # verify integrity of arakoon clusters
         for cluster_name, cluster_info in arakoon_clusters.iteritems():
-            if ArakoonHealthCheck.LOCAL_SR.machine_id not in cluster_info:
+            if result_handler.context.storagerouter.machine_id not in cluster_info:
                 continue
             verify_arakoon(str(cluster_name))
 
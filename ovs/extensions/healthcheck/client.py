@@ -0,0 +1,101 @@
+# Copyright (C) 2017 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Client module for the healthcheck daemon
+Only depends on the standard library: answering a request through the daemon should not pay for the framework imports
+"""
+import os
+import sys
+import json
+import socket
+
+
+class HealthCheckClient(object):
+    """
+    Queries the healthcheck daemon (see ovs.extensions.healthcheck.daemon) over its unix socket
+    """
+    SOCKET_PATH = '/var/run/ovs-healthcheck.sock'
+    TIMEOUT = 10  # Seconds to wait for the daemon to answer
+    NO_DAEMON_FLAG = '--no-daemon'
+    # Requests the daemon does not answer. These are always executed by the CLI
+    LOCAL_FLAGS = ['--help', '--profile']
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def run(args, socket_path=SOCKET_PATH):
+        """
+        Lets the daemon answer the request and prints the answer
+        :param args: arguments passed on by bash
+        :type args: list
+        :param socket_path: location of the socket of the daemon
+        :type socket_path: str
+        :return: the results & recap when the daemon answered the request, None when the CLI has to execute the request
+        :rtype: dict
+        """
+        if HealthCheckClient.NO_DAEMON_FLAG in args or any(flag in args for flag in HealthCheckClient.LOCAL_FLAGS):
+            return None
+        if not os.path.exists(socket_path):
+            return None
+        try:
+            answer = HealthCheckClient.request(args, socket_path)
+        except (socket.error, ValueError):
+            return None  # The daemon is not responding, fall back to the CLI
+        if answer.get('fallback') is True:
+            return None
+        sys.stdout.write(answer['output'])
+        sys.stdout.flush()
+        return answer['result']
+
+    @staticmethod
+    def request(args, socket_path=SOCKET_PATH):
+        """
+        Sends a request to the daemon
+        :param args: arguments passed on by bash
+        :type args: list
+        :param socket_path: location of the socket of the daemon
+        :type socket_path: str
+        :return: answer of the daemon
+        :rtype: dict
+        """
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.settimeout(HealthCheckClient.TIMEOUT)
+        try:
+            client.connect(socket_path)
+            client.sendall(json.dumps({'args': list(args)}) + '\n')
+            client.shutdown(socket.SHUT_WR)
+            chunks = []
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            client.close()
+        return json.loads(''.join(chunks))
+
+    @staticmethod
+    def remove_client_flags(args):
+        """
+        Removes the flags which are only meant for the client
+        :param args: arguments passed on by bash
+        :type args: list
+        :return: the remaining arguments
+        :rtype: list
+        """
+        return [arg for arg in args if arg != HealthCheckClient.NO_DAEMON_FLAG]
@@ -0,0 +1,138 @@
+# Copyright (C) 2017 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Cluster module for the health check
+"""
+import json
+from multiprocessing.pool import ThreadPool
+from ovs.extensions.generic.sshclient import SSHClient
+from ovs.extensions.healthcheck.expose_to_cli import HealthCheckCLIRunner, ModuleNotRecognizedException
+from ovs.extensions.healthcheck.helpers.context import NodeContext
+from ovs.extensions.healthcheck.helpers.storagerouter import StoragerouterHelper
+from ovs.extensions.healthcheck.logger import Logger
+from ovs.extensions.healthcheck.result import HCResults, Severities
+
+
+class ClusterRunner(object):
+    """
+    Executes the healthcheck on all storagerouters at the same time and merges their results into a single report
+    Every storagerouter executes its node checks. The cluster checks are executed once, by the node running the ClusterRunner
+    """
+    logger = Logger('healthcheck-cluster')
+    CLUSTER_FLAG = '--cluster'
+    CLUSTER_KEY = 'cluster'  # Key of the results of the cluster checks in the report
+    COMMAND = ['ovs', 'healthcheck']
+    SEVERITY_METHODS = {'error': 'failure'}  # Reporting methods of HCResults which are not named after the severity type
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def run_method(*args):
+        """
+        Executes the given method on all storagerouters (ovs healthcheck --cluster [module] [method] [options])
+        :return: results by host & recap
+        :rtype: dict
+        """
+        args, jobs = HealthCheckCLIRunner._extract_jobs([arg for arg in args if arg != ClusterRunner.CLUSTER_FLAG])
+        args = HealthCheckCLIRunner._keep_old_argument_style(args)
+        args, flags = HealthCheckCLIRunner._extract_flags(args)
+        module_name, method_name, help_requested, args = HealthCheckCLIRunner.extract_arguments(*args)
+        try:
+            found_method_data = HealthCheckCLIRunner._get_method_data(module_name, method_name, HealthCheckCLIRunner.ADDON_TYPE)
+        except ModuleNotRecognizedException:
+            found_method_data = []
+        if help_requested is True or len(found_method_data) == 0:
+            # Let the CLI print the appropriate help
+            return HealthCheckCLIRunner.run_method(*([module_name, method_name] + (['--help'] if help_requested is True else [])))
+
+        result_handler = HCResults(flags['unattended'], flags['to_json'], context=NodeContext.new_run(), to_ndjson=flags['to_ndjson'])
+        storagerouters = StoragerouterHelper.get_storagerouters()
+        remote_command = ClusterRunner.COMMAND + [module_name, method_name, '--to-json', '--skip-cluster-checks']
+        if jobs != HealthCheckCLIRunner.DEFAULT_JOBS:
+            remote_command.append('--jobs={0}'.format(jobs))
+        result_handler.info('Executing the healthcheck on {0} storagerouters'.format(len(storagerouters)))
+
+        # The remote runs are waiting on ssh so one thread per storagerouter is used
+        pool = ThreadPool(processes=max(1, len(storagerouters)))
+        try:
+            pending = [(storagerouter, pool.apply_async(ClusterRunner._run_remote, (storagerouter, remote_command))) for storagerouter in storagerouters]
+            # Execute the cluster checks while the storagerouters are executing their node checks
+            cluster_method_pointers = [method for method in (HealthCheckCLIRunner._load_method(function_data) for function_data in found_method_data)
+                                       if getattr(method, 'cluster_check', False) is True]
+            cluster_result_handler = HCResults(unattended=True, context=result_handler.context)
+            HealthCheckCLIRunner._run_checks(cluster_method_pointers, cluster_result_handler, jobs)
+            report = {ClusterRunner.CLUSTER_KEY: cluster_result_handler.result_dict}
+            for storagerouter, async_result in pending:
+                while not async_result.ready():
+                    async_result.wait(1)  # Waiting with a timeout keeps the main thread responsive to a KeyboardInterrupt
+                report[storagerouter.name] = async_result.get()
+        except KeyboardInterrupt:
+            pool.terminate()
+            raise
+        pool.close()
+        pool.join()
+        return ClusterRunner.get_results(result_handler, report, flags['to_json'])
+
+    @staticmethod
+    def _run_remote(storagerouter, command):
+        """
+        Executes the healthcheck on a storagerouter
+        :param storagerouter: storagerouter to execute the healthcheck on
+        :type storagerouter: ovs.dal.hybrids.storagerouter.StorageRouter
+        :param command: healthcheck command to execute
+        :type command: list
+        :return: the results of the storagerouter. None when the healthcheck could not be executed
+        :rtype: dict
+        """
+        try:
+            output = SSHClient(storagerouter, username='root').run(command)
+            return json.loads(output)
+        except Exception:
+            ClusterRunner.logger.exception('Could not execute the healthcheck on {0}'.format(storagerouter.name))
+            return None
+
+    @staticmethod
+    def get_results(result_handler, report, to_json=False):
+        """
+        Reports the state of every test of every storagerouter
+        :param result_handler: result parser
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param report: results by host. The results of the cluster checks are stored under CLUSTER_KEY
+        :type report: dict
+        :param to_json: print the report as json
+        :type to_json: bool
+        :return: results by host & recap
+        :rtype: dict
+        """
+        for host, host_results in sorted(report.iteritems()):
+            if host_results is None:
+                result_handler.exception('{0}: could not execute the healthcheck'.format(host), add_to_result=False)
+                continue
+            for test_name, test_result in sorted(host_results.iteritems()):
+                severity = Severities.get_severity_by_print_value(test_result['state'])
+                if result_handler.unattended is True:
+                    print '{0} {1} {2}'.format(host, test_name, test_result['state'])
+                report_method = getattr(result_handler, ClusterRunner.SEVERITY_METHODS.get(severity.type, severity.type))
+                report_method('{0}: {1}'.format(host, test_name), add_to_result=False)
+        if to_json is True:
+            print json.dumps(report, indent=4, sort_keys=True)
+        recap = dict((key, result_handler.counters[key]) for key in ['SUCCESS', 'FAILED', 'SKIPPED', 'WARNING', 'EXCEPTION'])
+        result_handler.info('Recap of the cluster wide Health Check!')
+        result_handler.info('======================')
+        result_handler.info('SUCCESS={SUCCESS} FAILED={FAILED} SKIPPED={SKIPPED} WARNING={WARNING} EXCEPTION={EXCEPTION}'.format(**recap))
+        return {'result': report, 'recap': recap}
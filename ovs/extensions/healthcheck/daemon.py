@@ -0,0 +1,333 @@
+# Copyright (C) 2017 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Daemon module for the healthcheck
+"""
+import os
+import json
+import time
+import Queue
+import socket
+import threading
+from multiprocessing.pool import ThreadPool
+from StringIO import StringIO
+from ovs.extensions.healthcheck.client import HealthCheckClient
+from ovs.extensions.healthcheck.expose_to_cli import HealthCheckCLIRunner, ModuleNotRecognizedException
+from ovs.extensions.healthcheck.helpers.context import NodeContext
+from ovs.extensions.healthcheck.logger import Logger
+from ovs.extensions.healthcheck.result import HCResults
+from ovs.extensions.healthcheck.scheduler import CheckScheduler
+
+
+class HealthCheckDaemon(object):
+    """
+    Resident healthcheck. Executes every check at its own interval and answers the requests of HealthCheckClient with the latest results
+    The imports, the framework clients and the discovered checks are kept for the lifetime of the process
+    The checks are scheduled by a thread of their own. Every due check is handed to a pool of `jobs` threads on its own, so a long check
+    does not delay the others. A check is not executed again while it is still running. Checks marked with main_thread_only (signal based
+    timeouts) are queued for the main thread, which executes them one after the other
+    Requests are answered by other threads
+    """
+    logger = Logger('healthcheck-daemon')
+    DAEMON_FLAG = '--daemon'
+    MAX_REQUEST_SIZE = 64 * 1024
+    HEADER_REFRESH_INTERVAL = 3600  # Seconds
+    DEFAULT_JOBS = 4  # A long check should not keep the short checks from being executed at their interval
+    MAIN_THREAD_POLL_INTERVAL = 1  # Seconds. Waiting for a queued check without a timeout can't be interrupted
+
+    def __init__(self, socket_path=HealthCheckClient.SOCKET_PATH, scheduler=None, jobs=DEFAULT_JOBS):
+        """
+        Initialize the daemon
+        :param socket_path: location of the unix socket to serve on
+        :type socket_path: str
+        :param scheduler: decides when the checks are executed. Defaults to executing every check every minute
+        :type scheduler: ovs.extensions.healthcheck.scheduler.CheckScheduler
+        :param jobs: amount of checks that are executed at the same time
+        :type jobs: int
+        """
+        self.socket_path = socket_path
+        self.scheduler = scheduler or CheckScheduler()
+        self.jobs = jobs
+
+        self._method_pointers = []
+        self._cluster_test_names = set()
+        self._on_request_test_names = set()
+        # Latest results by test name: {'records': list, 'metrics': dict, 'timestamp': float}
+        self._tests = {}
+        self._tests_lock = threading.Lock()
+        # Test names of the checks which are being executed or waiting for a thread of the pool
+        self._running_test_names = set()
+        self._check_finished = threading.Event()
+        # Checks marked with main_thread_only and the context they were scheduled in. None when the scheduling has stopped
+        self._main_thread_checks = Queue.Queue()
+        self._stopping = threading.Event()
+        self._server = None
+        # Lines of the header preceding the results (see HealthCheckCLIRunner.get_header). Fetching them is too expensive for every request
+        self._header = None
+        self._header_refreshed = None
+
+    @staticmethod
+    def run_daemon(*args):
+        """
+        Starts the daemon as requested by bash (ovs healthcheck --daemon [--jobs N])
+        :return: None
+        :rtype: NoneType
+        """
+        args, jobs = HealthCheckCLIRunner._extract_jobs([arg for arg in args if arg != HealthCheckDaemon.DAEMON_FLAG], HealthCheckDaemon.DEFAULT_JOBS)
+        HealthCheckDaemon(scheduler=CheckScheduler.from_settings(NodeContext.get_current().settings), jobs=jobs).start()
+
+    def start(self):
+        """
+        Starts serving requests and executing the checks. Only returns when interrupted
+        :return: None
+        :rtype: NoneType
+        """
+        # Load all checks once, the modules remain imported
+        method_data = HealthCheckCLIRunner._get_method_data(addon_type=HealthCheckCLIRunner.ADDON_TYPE)
+        method_pointers = [HealthCheckCLIRunner._load_method(function_data) for function_data in method_data]
+        # Checks marked with on_request_only are never scheduled, requesting them by name falls back to the CLI
+        self._method_pointers = [method for method in method_pointers if getattr(method, 'on_request_only', False) is False]
+        self._on_request_test_names = set(CheckScheduler.get_test_name(method) for method in method_pointers if getattr(method, 'on_request_only', False) is True)
+        self._cluster_test_names = set(CheckScheduler.get_test_name(method) for method in self._method_pointers if getattr(method, 'cluster_check', False) is True)
+        self.refresh_header()
+        self._server = self._bind()
+        server_thread = threading.Thread(target=self._serve, name='healthcheck-daemon-server')
+        server_thread.daemon = True
+        server_thread.start()
+        self.logger.info('Serving on {0}. Scheduling {1} checks'.format(self.socket_path, len(self._method_pointers)))
+        pool = ThreadPool(processes=max(1, self.jobs))
+        scheduler_thread = threading.Thread(target=self._schedule, args=(pool,), name='healthcheck-daemon-scheduler')
+        scheduler_thread.daemon = True
+        scheduler_thread.start()
+        try:
+            # Signal based timeouts only work in the main thread
+            while True:
+                try:
+                    queued_check = self._main_thread_checks.get(timeout=self.MAIN_THREAD_POLL_INTERVAL)
+                except Queue.Empty:
+                    continue
+                if queued_check is None:
+                    raise RuntimeError('The scheduling of the checks has stopped')
+                self.run_check(*queued_check)
+        except KeyboardInterrupt:
+            self.logger.info('Caught keyboard interrupt. Stopping')
+        finally:
+            self._stopping.set()
+            self._check_finished.set()
+            # Running threads can't be stopped. The daemonic workers are discarded when the process exits
+            pool.terminate()
+            server, self._server = self._server, None
+            server.close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def _schedule(self, pool):
+        """
+        Hands every due check to the pool or queues it for the main thread, until the daemon stops
+        :param pool: pool executing the checks which are not marked with main_thread_only
+        :type pool: multiprocessing.pool.ThreadPool
+        :return: None
+        :rtype: NoneType
+        """
+        try:
+            while self._stopping.is_set() is False:
+                self._check_finished.clear()
+                if time.time() - self._header_refreshed >= self.HEADER_REFRESH_INTERVAL:
+                    self.refresh_header()
+                due_method_pointers = self.scheduler.get_due(self._get_idle_method_pointers())
+                if len(due_method_pointers) > 0:
+                    self.scheduler.mark_started(due_method_pointers)
+                    context = NodeContext.new_run()
+                    with self._tests_lock:
+                        self._running_test_names.update(CheckScheduler.get_test_name(method) for method in due_method_pointers)
+                    for method_pointer in due_method_pointers:
+                        if getattr(method_pointer, 'main_thread_only', False) is True:
+                            self._main_thread_checks.put((method_pointer, context))
+                        else:
+                            pool.apply_async(self.run_check, (method_pointer, context))
+                # Woken up when a check finishes: it might already be due again
+                self._check_finished.wait(max(0, min(self.scheduler.get_time_until_due(self._get_idle_method_pointers()),
+                                                     self._header_refreshed + self.HEADER_REFRESH_INTERVAL - time.time())))
+        except Exception:
+            self.logger.exception('Could not schedule the checks')
+            self._main_thread_checks.put(None)  # Stops the daemon
+
+    def refresh_header(self):
+        """
+        Fetches the header preceding the results. The previous header is kept when it cannot be fetched
+        :return: None
+        :rtype: NoneType
+        """
+        self._header_refreshed = time.time()
+        try:
+            self._header = HealthCheckCLIRunner.get_header()
+        except Exception:
+            self.logger.exception('Could not fetch the header')
+
+    def run_check(self, method_pointer, context):
+        """
+        Executes a single check which was marked as running and stores its results
+        :param method_pointer: check to execute
+        :type method_pointer: function
+        :param context: context of the run the check was scheduled in
+        :type context: ovs.extensions.healthcheck.helpers.context.NodeContext
+        :return: None
+        :rtype: NoneType
+        """
+        test_name = CheckScheduler.get_test_name(method_pointer)
+        try:
+            result_handler = HCResults(unattended=True, context=context)
+            HealthCheckCLIRunner._run_check(method_pointer, result_handler)
+            self._store_results(result_handler)
+        finally:
+            with self._tests_lock:
+                self._running_test_names.discard(test_name)
+            self._check_finished.set()
+
+    def _get_idle_method_pointers(self):
+        """
+        Lists the checks which are not running
+        :return: the checks which are not running
+        :rtype: list[function]
+        """
+        with self._tests_lock:
+            return [method for method in self._method_pointers if CheckScheduler.get_test_name(method) not in self._running_test_names]
+
+    def _store_results(self, result_handler):
+        """
+        Stores the results of the executed checks. The results of the other checks are kept
+        :param result_handler: result parser the checks were executed with
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :return: None
+        :rtype: NoneType
+        """
+        finished = time.time()
+        with self._tests_lock:
+            for test_name, metrics in result_handler.test_metrics.iteritems():
+                self._tests[test_name] = {'records': result_handler.get_test_records(test_name),
+                                          'metrics': metrics,
+                                          'timestamp': finished}
+
+    def handle_request(self, args):
+        """
+        Answers a request with the latest results of the requested checks
+        :param args: arguments passed on by bash
+        :type args: list
+        :return: the output and the results & recap. {'fallback': True} when the CLI has to execute the request
+        :rtype: dict
+        """
+        fallback = {'fallback': True}
+        args, _ = HealthCheckCLIRunner._extract_jobs(args)  # The daemon decides the amount of jobs
+        args = HealthCheckCLIRunner._keep_old_argument_style(args)
+        args, flags = HealthCheckCLIRunner._extract_flags(args)
+        module_name, method_name, help_requested, args = HealthCheckCLIRunner.extract_arguments(*args)
+        if help_requested is True or flags['profile'] is True:
+            return fallback
+        try:
+            found_method_data = HealthCheckCLIRunner._get_method_data(module_name, method_name, HealthCheckCLIRunner.ADDON_TYPE)
+        except ModuleNotRecognizedException:
+            return fallback
+        test_names = ['{0}-{1}'.format(function_data['method_module_name'], function_data['method_name']) for function_data in found_method_data]
+        if flags['skip_cluster_checks'] is True:
+            test_names = [test_name for test_name in test_names if test_name not in self._cluster_test_names]
+        if method_name == HealthCheckCLIRunner._WILDCARD:
+            test_names = [test_name for test_name in test_names if test_name not in self._on_request_test_names]
+        header = self._header
+        with self._tests_lock:
+            if header is None or len(test_names) == 0 or any(test_name not in self._tests for test_name in test_names):
+                return fallback  # Not all requested checks have been executed yet
+            tests = dict((test_name, self._tests[test_name]) for test_name in test_names)
+
+        output = StringIO()
+        result_handler = HCResults(flags['unattended'], flags['to_json'], context=NodeContext.get_current(), stream=output, to_ndjson=flags['to_ndjson'])
+        HealthCheckCLIRunner.print_header(result_handler, header)
+        now = time.time()
+        for test_name in test_names:
+            test = tests[test_name]
+            age = int(now - test['timestamp'])
+            result_handler.info('Results of {0} are {1}s old'.format(test_name, age), add_to_result=False)
+            result_handler.replay_test(test_name, test['records'], test['metrics'])
+            if test_name in result_handler.result_dict:
+                result_handler.result_dict[test_name]['age'] = age
+        result = HealthCheckCLIRunner.get_results(result_handler, module_name, method_name)
+        return {'output': output.getvalue(), 'result': result}
+
+    def _bind(self):
+        """
+        Binds the unix socket. A socket left behind by a previous daemon is replaced
+        :return: the listening socket
+        :rtype: socket.socket
+        """
+        if os.path.exists(self.socket_path):
+            try:
+                HealthCheckClient.request(['--help'], self.socket_path)
+            except (socket.error, ValueError):
+                os.remove(self.socket_path)  # Stale socket
+            else:
+                raise RuntimeError('Another healthcheck daemon is serving on {0}'.format(self.socket_path))
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen(16)
+        return server
+
+    def _serve(self):
+        """
+        Accepts connections and answers each of them in a separate thread
+        :return: None
+        :rtype: NoneType
+        """
+        server = self._server
+        while True:
+            try:
+                connection, _ = server.accept()
+            except socket.error:
+                if self._server is None:
+                    return  # Stopped
+                self.logger.exception('Could not accept a connection')
+                continue
+            handler = threading.Thread(target=self._answer, args=(connection,), name='healthcheck-daemon-request')
+            handler.daemon = True
+            handler.start()
+
+    def _answer(self, connection):
+        """
+        Reads a request from the connection and writes the answer
+        :param connection: connection with a client
+        :type connection: socket.socket
+        :return: None
+        :rtype: NoneType
+        """
+        try:
+            connection.settimeout(HealthCheckClient.TIMEOUT)
+            chunks = []
+            size = 0
+            while size < self.MAX_REQUEST_SIZE:
+                chunk = connection.recv(4096)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+            try:
+                answer = self.handle_request(json.loads(''.join(chunks))['args'])
+            except Exception:
+                self.logger.exception('Could not answer request')
+                answer = {'fallback': True}
+            connection.sendall(json.dumps(answer))
+        except socket.error:
+            self.logger.exception('Could not communicate with the client')
+        finally:
+            connection.close()
@@ -15,54 +15,53 @@
 # but WITHOUT ANY WARRANTY of any kind.
 import inspect
 import time
+import uuid
 from functools import wraps
-from ovs_extensions.generic.filemutex import file_mutex
-from ovs_extensions.generic.filemutex import NoLockAvailableException as NoFileLockAvailableException
-from ovs.extensions.generic.system import System
-from ovs.extensions.generic.volatilemutex import volatile_mutex
-from ovs_extensions.generic.volatilemutex import NoLockAvailableException as NoVolatileLockAvailableException
 from ovs.extensions.healthcheck.helpers.cache import CacheHelper
+from ovs.extensions.healthcheck.helpers.context import NodeContext
+from ovs.extensions.healthcheck.helpers.lock import SingleExecution
+from ovs.extensions.healthcheck.helpers.poller import Poller
+from ovs.extensions.healthcheck.metrics import CheckMetrics
 from ovs.extensions.healthcheck.result import HCResults
 
+CLUSTER_RESULTS_TIMEOUT = 300  # Seconds the nodes that lose the lock wait for the results of a cluster check
+CLUSTER_RESULTS_TTL = 600  # Seconds the results of a cluster check are kept in the volatile store
+CLUSTER_RESULTS_POLL_INTERVAL = 0.1  # Seconds, doubled after every poll
+CLUSTER_RESULTS_MAX_POLL_INTERVAL = 5
 
-def ensure_single_with_callback(key, callback=None, lock_type='local'):
+
+def ensure_single_with_callback(key, callback=None, lock_type='local', provide_executor_info=False):
     """
     Ensure only a single execution of the method
+    The executor publishes its ip, hostname and a unique execution id. The callback receives these as keyword arguments
+    When provide_executor_info is set, the method receives them as the executor_info keyword argument
+    The time spent waiting on the executor is registered as lock wait time of the check (see CheckMetrics)
     The cluster check could have some raceconditions when the following conditions are met:
     - Decorated method takes longer than 60s (volatilemutex limit is 60s) (memcache is unstable in keeping data);
-    - The second acquire enters the callback and fetches the key from memcache while the key has not been set by the first (see below for fix).
+    - The second acquire enters the callback and fetches the key from memcache while the key has not been set by the first.
+      The follower waits for the key with a backing off poll (see SingleExecution.wait_for_executor_info)
     """
     def wrapper(func):
         @wraps(func)
         def wrapped(*args, **kwargs):
-            if lock_type == 'local':
-                _mutex = file_mutex(key)
-            elif lock_type == 'cluster':
-                _mutex = volatile_mutex(key)
-            else:
-                raise ValueError('Lock type {0} is not supported!'.format(lock_type))
+            single_execution = SingleExecution(key, lock_type)
+            start = time.time()
             try:
-                _mutex.acquire(wait=0.005)
-                local_sr = System.get_my_storagerouter()
-                CacheHelper.set(key=key, item={'ip': local_sr.ip, 'hostname': local_sr.name}, expire_time=60)
-                return func(*args, **kwargs)
-            except (NoFileLockAvailableException, NoVolatileLockAvailableException):
+                if single_execution.try_acquire() is True:
+                    CheckMetrics.add_wait_time(CheckMetrics.LOCK_WAIT, time.time() - start)
+                    local_sr = NodeContext.get_current().storagerouter
+                    executor_info = {'ip': local_sr.ip, 'hostname': local_sr.name, 'execution_id': str(uuid.uuid4())}
+                    single_execution.publish_executor_info(executor_info)
+                    if provide_executor_info is True:
+                        kwargs['executor_info'] = executor_info
+                    return func(*args, **kwargs)
                 if callback is None:
                     return
                 else:
-                    executor_info = None
-                    start = time.time()
-                    while executor_info is None:
-                        # Calculated guesswork. If a callback function would be expected, the acquire has happened for another executor  the volatilekey should be set eventually
-                        # However by setting it after the acquire, the callback executor and original method executor can race between fetch and set
-                        # A better implementation would be relying on the fwk ensure_single_decorator as they check for various races themselves
-                        # This is just a poor mans, temporary implementation
-                        if start - time.time() > 5:
-                            raise ValueError('Timed out after 5 seconds while fetching the information about the executor.')
-                        try:
-                            executor_info = CacheHelper.get(key=key)
-                        except:
-                            pass
+                    try:
+                        executor_info = single_execution.wait_for_executor_info()
+                    finally:
+                        CheckMetrics.add_wait_time(CheckMetrics.LOCK_WAIT, time.time() - start)
                     callback_func = callback.__func__ if isinstance(callback, staticmethod) else callback
                     argnames = inspect.getargspec(callback_func)[0]
                     arguments = list(args)
@@ -80,7 +79,7 @@ def ensure_single_with_callback(key, callback=None, lock_type='local'):
                             kwargs['result_handler'] = result_handler
                     return callback_func(*tuple(arguments), **kwargs)
             finally:
-                _mutex.release()
+                single_execution.release()
         return wrapped
     return wrapper
 
@@ -88,18 +87,52 @@ def ensure_single_with_callback(key, callback=None, lock_type='local'):
 def cluster_check(func):
     """
     Decorator to separate cluster checks
+    Cluster checks are marked so they can be executed once for the whole cluster (see ClusterRunner)
+    The executor publishes the results of the check. The nodes that lose the lock report these results instead of executing the check
     :return:
     """
-    def set_result_success(ip, hostname, result_handler, *args, **kwargs):
+    results_key = 'ovs-healthcheck_cluster_wide_{0}_results'.format(func.__name__)
+
+    def report_executor_results(ip, hostname, result_handler, execution_id=None, *args, **kwargs):
         """
+        Waits for the executor to publish its results and reports them
         :return:
         """
-        result_handler.success('Call is being executed by {0} - {1}.'.format(hostname, ip))
+        def get_published_results():
+            try:
+                published_results = CacheHelper.get(key=results_key)
+            except Exception:
+                return None
+            if published_results is None or published_results['execution_id'] != execution_id:
+                return None  # Not published yet or the results of a previous execution
+            return published_results
+
+        published = None
+        if execution_id is not None:
+            poller = Poller(CLUSTER_RESULTS_TIMEOUT, interval=CLUSTER_RESULTS_POLL_INTERVAL, max_interval=CLUSTER_RESULTS_MAX_POLL_INTERVAL)
+            published = poller.poll(get_published_results)
+            CheckMetrics.add_wait_time(CheckMetrics.LOCK_WAIT, poller.elapsed)
+        if published is None:
+            result_handler.warning('Call is being executed by {0} - {1}. Its results were not published within {2}s.'.format(hostname, ip, CLUSTER_RESULTS_TIMEOUT))
+            return
+        result_handler.info('Call was executed by {0} - {1}. Reporting its results.'.format(hostname, ip), add_to_result=False)
+        result_handler.replay_test(records=published['records'])
 
-    @ensure_single_with_callback('ovs-healthcheck_cluster_wide_{0}'.format(func.__name__), callback=set_result_success, lock_type='cluster')
+    @ensure_single_with_callback('ovs-healthcheck_cluster_wide_{0}'.format(func.__name__), callback=report_executor_results, lock_type='cluster', provide_executor_info=True)
     @wraps(func)
     def wrapped(*args, **kwargs):
-        return func(*args, **kwargs)
+        executor_info = kwargs.pop('executor_info')
+        result_handler = kwargs.get('result_handler')
+        if result_handler is None:
+            result_handler = next((arg for arg in args if isinstance(arg, HCResults.HCResultCollector)), None)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if result_handler is not None:
+                CacheHelper.set(key=results_key,
+                                item={'execution_id': executor_info['execution_id'], 'records': result_handler.get_test_records()},
+                                expire_time=CLUSTER_RESULTS_TTL)
+    wrapped.cluster_check = True
     return wrapped
 
 
@@ -120,3 +153,23 @@ def node_check(func):
     def wrapped(*args, **kwargs):
         return func(*args, **kwargs)
     return wrapped
+
+
+def main_thread_only(func):
+    """
+    Decorator to mark checks that can not be executed in a worker thread (eg. checks relying on signal based timeouts)
+    These checks are always executed by the main thread when running with multiple jobs
+    :return:
+    """
+    func.main_thread_only = True
+    return func
+
+
+def on_request_only(func):
+    """
+    Decorator to mark checks that are too expensive to be executed with every run (eg. benchmarks)
+    These checks are only executed when they are requested by name and are never scheduled by the daemon
+    :return:
+    """
+    func.on_request_only = True
+    return func
@@ -14,15 +14,21 @@
 # Open vStorage is distributed in the hope that it will be useful,
 # but WITHOUT ANY WARRANTY of any kind.
 
-import imp
 import os
+import imp
+import ast
+import json
+import time
+import cProfile
 import inspect
-from datetime import datetime, timedelta
+import tempfile
+from multiprocessing.pool import ThreadPool
+from ovs.extensions.healthcheck.helpers.context import NodeContext
 from ovs.extensions.healthcheck.helpers.helper import Helper
 from ovs.extensions.healthcheck.decorators import node_check
 from ovs.extensions.healthcheck.result import HCResults
-from ovs.extensions.storage.volatilefactory import VolatileFactory
 from ovs.extensions.healthcheck.logger import Logger
+from ovs.extensions.healthcheck.metrics import CheckMetrics
 
 
 class ModuleNotRecognizedException(Exception):
@@ -61,40 +67,72 @@ class CLIRunner(object):
     logger = Logger("healthcheck-ovs_clirunner")
     START_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
     CACHE_KEY = 'ovs_discover_method'
+    CACHE_DIR = '/var/cache/ovs-healthcheck'
+    INDEX_VERSION = 2  # Increment when the layout of the discovery index changes
     _WILDCARD = 'X'
+    _loaded_modules = {}
 
     def __init__(self):
         pass
 
     @classmethod
-    def _get_methods(cls, module_name=_WILDCARD, method_name=_WILDCARD, addon_type=None):
+    def _get_method_data(cls, module_name=_WILDCARD, method_name=_WILDCARD, addon_type=None):
         """
-        Gets method by the specified values
+        Gets the discovered information of the methods matching the specified values. Does not import anything
         :param module_name: module to which the method belong
         :type module_name: str
         :param method_name: name of the method
         :type method_name: str
         :param addon_type: type of the method, distinguishes different addons
         :type addon_type: str
-        :return: list of all found functions
-        rtype: list[function]
+        :return: list of the discovered information of all found functions
+        :rtype: list[dict]
         """
         result = []
         discovered_data = cls._discover_methods()
-        module_names = discovered_data.keys() if module_name == cls._WILDCARD else [module_name]
+        module_names = sorted(discovered_data.keys()) if module_name == cls._WILDCARD else [module_name]
         for module_name in module_names:
             if module_name not in discovered_data:
                 raise ModuleNotRecognizedException()
             for function_data in discovered_data[module_name]:
                 if addon_type != function_data['addon_type'] or (method_name != cls._WILDCARD and method_name != function_data['method_name']):
                     continue
-                mod = imp.load_source(function_data['module_name'], function_data['location'])
-                cl = getattr(mod, function_data['class'])()
-                result.append(getattr(cl, function_data['function']))
+                result.append(function_data)
                 if method_name == function_data['method_name']:
                     break
         return result
 
+    @classmethod
+    def _get_methods(cls, module_name=_WILDCARD, method_name=_WILDCARD, addon_type=None):
+        """
+        Gets method by the specified values. Only the files containing the requested methods are imported
+        :param module_name: module to which the method belong
+        :type module_name: str
+        :param method_name: name of the method
+        :type method_name: str
+        :param addon_type: type of the method, distinguishes different addons
+        :type addon_type: str
+        :return: list of all found functions
+        rtype: list[function]
+        """
+        return [cls._load_method(function_data) for function_data in cls._get_method_data(module_name, method_name, addon_type)]
+
+    @classmethod
+    def _load_method(cls, function_data):
+        """
+        Imports the file of a discovered method and returns the method
+        Every file is only loaded once, loading it again would re-execute the module
+        :param function_data: discovered information about the method
+        :type function_data: dict
+        :return: the exposed method
+        :rtype: function
+        """
+        location = function_data['location']
+        if location not in cls._loaded_modules:
+            cls._loaded_modules[location] = imp.load_source(str(function_data['module_name']), str(location))
+        cl = getattr(cls._loaded_modules[location], str(function_data['class']))()
+        return getattr(cl, str(function_data['function']))
+
     @classmethod
     def extract_arguments(cls, *args):
         """
@@ -123,19 +161,19 @@ class CLIRunner(object):
         """
         module_name, method_name, help_requested, args = cls.extract_arguments(*args)
         try:
-            found_method_pointers = cls._get_methods(module_name, method_name)
+            found_method_data = cls._get_method_data(module_name, method_name)
         except ModuleNotRecognizedException:
-            cls.print_help(cls._get_methods(), error_help=True)
+            cls.print_help(cls._get_method_data(), error_help=True)
             return
-        if len(found_method_pointers) == 0:  # Module found but no methods -> print help
-            cls.print_help(cls._get_methods(module_name), error_help=True)
+        if len(found_method_data) == 0:  # Module found but no methods -> print help
+            cls.print_help(cls._get_method_data(module_name), error_help=True)
             return
         if help_requested is True:
-            cls.print_help(found_method_pointers)
+            cls.print_help(found_method_data)
             return
         try:
-            for found_method in found_method_pointers:
-                found_method(*args)
+            for function_data in found_method_data:
+                cls._load_method(function_data)(*args)
         except KeyboardInterrupt:
             cls.logger.warning('Caught keyboard interrupt. Output may be incomplete!')
 
@@ -143,73 +181,219 @@ class CLIRunner(object):
     def _discover_methods(cls):
         """
         Discovers all methods with the expose_to_cli decorator
+        The python files are parsed instead of imported. The parsed information is stored in an index on the local disk
+        Only files whose modification time or size differs from the indexed values are parsed again
         :return: dict that contains the required info based on module_name and method_name
         :rtype: dict
         """
-        time_format = "%Y-%m-%d %H:%M:%S"
-        version_id = 1
-        start_path = cls.START_PATH
-        client = VolatileFactory.get_client()
-        cache_expirey_hours = 2  # Amount of hours the cache would expire
-
-        def build_cache():
-            """
-            Build a dict listing all discovered methods with @expose_to_cli
-            :return:  None
-            :rtype: NoneType
-            """
-            # Build cache
-            # Executed from lib, want to go to extensions/healthcheck
-            found_items = {'expires': (datetime.now() + timedelta(hours=cache_expirey_hours)).strftime(time_format)}
-            path = start_path
-            for root, dirnames, filenames in os.walk(path):
-                for filename in filenames:
-                    if not (filename.endswith('.py') and filename != '__init__.py'):
-                        continue
-                    name = filename.replace('.py', '')
-                    file_path = os.path.join(root, filename)
-                    # Import file
-                    mod = imp.load_source(name, file_path)
-                    for member in inspect.getmembers(mod):
-                        if not (inspect.isclass(member[1]) and member[1].__module__ == name and 'object' in [base.__name__ for base in member[1].__bases__]):
-                            continue
-                        for submember in inspect.getmembers(member[1]):
-                            if not hasattr(submember[1], 'expose_to_cli'):
-                                continue
-                            exposed_data = submember[1].expose_to_cli
-                            method_module_name = exposed_data['module_name']
-                            method_name = exposed_data['method_name']
-                            method_addon_type = exposed_data['addon_type'] if 'addon_type' in exposed_data else None
-                            if method_module_name not in found_items:
-                                found_items[method_module_name] = []
-                            # noinspection PyUnresolvedReferences
-                            found_items[method_module_name].append(
-                                {'method_name': method_name,
-                                 'module_name': name,
-                                 'function': submember[1].__name__,
-                                 'class': member[1].__name__,
-                                 'location': file_path,
-                                 'version': version_id,
-                                 'addon_type': method_addon_type}
-                            )
-            client.set(cls.CACHE_KEY, found_items)
-
-        exposed_methods = client.get(cls.CACHE_KEY)
-        # Search first to use old cache
-        if exposed_methods and datetime.strptime(exposed_methods['expires'], time_format) > datetime.now() + timedelta(hours=cache_expirey_hours):
-            del exposed_methods['expires']
-            return exposed_methods
-        build_cache()
-        exposed_methods = client.get(cls.CACHE_KEY)
-        del exposed_methods['expires']
+        index_location = os.path.join(cls.CACHE_DIR, '{0}.json'.format(cls.CACHE_KEY))
+        index = None
+        try:
+            with open(index_location) as index_file:
+                index = json.load(index_file)
+        except (IOError, ValueError):
+            pass
+        if not isinstance(index, dict) or index.get('version') != cls.INDEX_VERSION or index.get('start_path') != cls.START_PATH:
+            index = {'version': cls.INDEX_VERSION, 'start_path': cls.START_PATH, 'files': {}}
+
+        indexed_files = index['files']
+        discovered_files = {}
+        changed = False
+        for root, dirnames, filenames in os.walk(cls.START_PATH):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if not (filename.endswith('.py') and filename != '__init__.py'):
+                    continue
+                file_path = os.path.join(root, filename)
+                file_stat = os.stat(file_path)
+                file_data = indexed_files.get(file_path)
+                if file_data is None or file_data['mtime'] != file_stat.st_mtime or file_data['size'] != file_stat.st_size:
+                    file_data = {'mtime': file_stat.st_mtime,
+                                 'size': file_stat.st_size,
+                                 'methods': cls._discover_file(file_path)}
+                    changed = True
+                discovered_files[file_path] = file_data
+        if changed is True or len(discovered_files) != len(indexed_files):
+            index['files'] = discovered_files
+            cls._save_index(index_location, index)
+
+        exposed_methods = {}
+        for file_path in sorted(discovered_files):
+            for function_data in discovered_files[file_path]['methods']:
+                exposed_methods.setdefault(function_data['method_module_name'], []).append(function_data)
         return exposed_methods
 
     @classmethod
-    def print_help(cls, method_pointers=None, error_help=False):
+    def _discover_file(cls, file_path):
+        """
+        Parses a python file and lists all methods decorated with expose_to_cli
+        Falls back on importing the file when the arguments passed to the decorator can not be determined statically
+        :param file_path: path of the python file
+        :type file_path: str
+        :return: list of the discovered information of the exposed methods
+        :rtype: list[dict]
+        """
+        name = os.path.basename(file_path).replace('.py', '')
+        with open(file_path) as source_file:
+            source = source_file.read()
+        try:
+            tree = ast.parse(source, file_path)
+        except SyntaxError:
+            cls.logger.exception('Unable to parse {0} while discovering methods'.format(file_path))
+            return []
+
+        module_constants = cls._get_constants(tree.body)
+        class_constants = dict((node.name, cls._get_constants(node.body)) for node in tree.body if isinstance(node, ast.ClassDef))
+        found_items = []
+        for class_node in tree.body:
+            if not isinstance(class_node, ast.ClassDef):
+                continue
+            for function_node in class_node.body:
+                if not isinstance(function_node, ast.FunctionDef):
+                    continue
+                for decorator in function_node.decorator_list:
+                    if not (isinstance(decorator, ast.Call) and cls._get_name(decorator.func) == expose_to_cli.__name__):
+                        continue
+                    arguments = dict(zip(['module_name', 'method_name', 'addon_type'], decorator.args))
+                    arguments.update((keyword.arg, keyword.value) for keyword in decorator.keywords)
+                    try:
+                        exposed_data = dict((key, cls._resolve_node(value, class_constants[class_node.name], module_constants, class_constants))
+                                            for key, value in arguments.iteritems())
+                    except ValueError:
+                        cls.logger.info('Could not determine the exposed methods of {0} without importing it'.format(file_path))
+                        return cls._discover_file_by_import(file_path)
+                    found_items.append({'method_name': exposed_data['method_name'],
+                                        'method_module_name': exposed_data['module_name'],
+                                        'module_name': name,
+                                        'function': function_node.name,
+                                        'class': class_node.name,
+                                        'location': file_path,
+                                        'addon_type': exposed_data.get('addon_type'),
+                                        'doc': ast.get_docstring(function_node, clean=False)})
+        return found_items
+
+    @classmethod
+    def _discover_file_by_import(cls, file_path):
+        """
+        Imports a python file and lists all methods decorated with expose_to_cli
+        :param file_path: path of the python file
+        :type file_path: str
+        :return: list of the discovered information of the exposed methods
+        :rtype: list[dict]
+        """
+        name = os.path.basename(file_path).replace('.py', '')
+        mod = imp.load_source(name, file_path)
+        cls._loaded_modules[file_path] = mod
+        found_items = []
+        for member in inspect.getmembers(mod):
+            if not (inspect.isclass(member[1]) and member[1].__module__ == name and 'object' in [base.__name__ for base in member[1].__bases__]):
+                continue
+            for submember in inspect.getmembers(member[1]):
+                if not hasattr(submember[1], 'expose_to_cli'):
+                    continue
+                exposed_data = submember[1].expose_to_cli
+                found_items.append({'method_name': exposed_data['method_name'],
+                                    'method_module_name': exposed_data['module_name'],
+                                    'module_name': name,
+                                    'function': submember[1].__name__,
+                                    'class': member[1].__name__,
+                                    'location': file_path,
+                                    'addon_type': exposed_data.get('addon_type'),
+                                    'doc': submember[1].__doc__})
+        return found_items
+
+    @staticmethod
+    def _get_constants(nodes):
+        """
+        Lists all simple assignments of string values within a body of nodes (eg. MODULE = 'alba')
+        :param nodes: nodes of a module or class body
+        :type nodes: list[ast.AST]
+        :return: the name of every assigned variable and its value
+        :rtype: dict
+        """
+        constants = {}
+        for node in nodes:
+            if isinstance(node, ast.Assign) and isinstance(node.value, ast.Str):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        constants[target.id] = node.value.s
+        return constants
+
+    @staticmethod
+    def _get_name(node):
+        """
+        Returns the name of a Name or Attribute node
+        :param node: node to get the name for
+        :type node: ast.AST
+        :return: name of the node (None if the node has no name)
+        :rtype: str
+        """
+        if isinstance(node, ast.Name):
+            return node.id
+        if isinstance(node, ast.Attribute):
+            return node.attr
+        return None
+
+    @staticmethod
+    def _resolve_node(node, local_constants, module_constants, class_constants):
+        """
+        Statically resolves the value of an argument passed to expose_to_cli
+        Supports string literals, None, constants of the class or module and attributes of classes known to this module (eg. HealthCheckCLIRunner.ADDON_TYPE)
+        :param node: node representing the argument
+        :type node: ast.AST
+        :param local_constants: constants defined in the class of the decorated method
+        :type local_constants: dict
+        :param module_constants: constants defined in the module of the decorated method
+        :type module_constants: dict
+        :param class_constants: constants of all classes defined in the module, by class name
+        :type class_constants: dict
+        :raises ValueError: when the value can not be determined without importing
+        :return: value of the argument
+        :rtype: str
+        """
+        if isinstance(node, ast.Str):
+            return node.s
+        if isinstance(node, ast.Name):
+            if node.id == 'None':
+                return None
+            for constants in [local_constants, module_constants]:
+                if node.id in constants:
+                    return constants[node.id]
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+            if node.attr in class_constants.get(node.value.id, {}):
+                return class_constants[node.value.id][node.attr]
+            known_class = globals().get(node.value.id)
+            if inspect.isclass(known_class) and isinstance(getattr(known_class, node.attr, None), basestring):
+                return getattr(known_class, node.attr)
+        raise ValueError('Unable to resolve node {0}'.format(ast.dump(node)))
+
+    @classmethod
+    def _save_index(cls, index_location, index):
+        """
+        Stores the discovery index on the local disk. Failing to store the index only costs performance on the next run
+        :param index_location: path to store the index to
+        :type index_location: str
+        :param index: index to store
+        :type index: dict
+        :return: None
+        :rtype: NoneType
+        """
+        temp_location = '{0}.{1}'.format(index_location, os.getpid())
+        try:
+            if not os.path.exists(cls.CACHE_DIR):
+                os.makedirs(cls.CACHE_DIR)
+            with open(temp_location, 'w') as index_file:
+                json.dump(index, index_file)
+            os.rename(temp_location, index_location)  # Atomic replace so concurrent runs never read a partial index
+        except (IOError, OSError):
+            cls.logger.exception('Unable to store the discovery index at {0}'.format(index_location))
+
+    @classmethod
+    def print_help(cls, method_data=None, error_help=False):
         """
         Prints the possible methods that are exposed to the CLI
-        :param method_pointers: list of method pointers
-        :type method_pointers: list[function]
+        :param method_data: list of the discovered information of methods
+        :type method_data: list[dict]
         :param error_help: print extra help incase wrong arguments were suppplied
         :type error_help: bool
         :return: None
@@ -217,12 +401,12 @@ class CLIRunner(object):
         """
         if error_help is True:
             print 'Could not process your arguments.'
-        if len(method_pointers) == 0:
+        if len(method_data) == 0:
             # Nothing found for the search terms
             print 'Found no methods matching your search terms.'
-        elif len(method_pointers) == 1:
+        elif len(method_data) == 1:
             # Found only one method -> search term was module_name + method_name
-            print method_pointers[0].__doc__
+            print method_data[0]['doc']
             return
         print 'Possible optional arguments are:'
         # Multiple entries found means only the module_name was supplied
@@ -230,9 +414,9 @@ class CLIRunner(object):
         print 'ovs healthcheck MODULE {0} -- will run all checks for module'.format(CLIRunner._WILDCARD)
         # Sort based on module_name
         print_dict = {}
-        for method_pointer in method_pointers:
-            module_name = method_pointer.expose_to_cli['module_name']
-            method_name = method_pointer.expose_to_cli['method_name']
+        for function_data in method_data:
+            module_name = function_data['method_module_name']
+            method_name = function_data['method_name']
             if module_name in print_dict:
                 print_dict[module_name].append(method_name)
                 continue
@@ -249,7 +433,12 @@ class HealthCheckCLIRunner(CLIRunner):
     """
     logger = Logger("healthcheck-healthcheck_clirunner")
     START_PATH = os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)), 'healthcheck')
+    CACHE_KEY = 'ovs_healthcheck_discover_method'
     ADDON_TYPE = 'healthcheck'
+    DEFAULT_JOBS = 1  # Amount of checks that are executed at the same time
+    PROFILE_DIR = os.path.join(tempfile.gettempdir(), 'ovs-healthcheck-profiles')  # Location of the pstats dumps (--profile)
+    SLOWEST_TESTS_AMOUNT = 5  # Amount of slowest tests listed in the recap
+    FLAGS = ['--unattended', '--to-json', '--to-ndjson', '--profile', '--skip-cluster-checks']
 
     @staticmethod
     def _keep_old_argument_style(args):
@@ -259,7 +448,7 @@ class HealthCheckCLIRunner(CLIRunner):
         :return:
         """
         args = list(args)
-        possible_args = ['--help', '--unattended', '--to-json']
+        possible_args = ['--help'] + HealthCheckCLIRunner.FLAGS
         indexes = [args.index(arg) for arg in args if arg in possible_args]
         if len(indexes) > 0:
             if indexes[0] == 0:
@@ -275,6 +464,38 @@ class HealthCheckCLIRunner(CLIRunner):
                 args.insert(1, HealthCheckCLIRunner._WILDCARD)
         return args
 
+    @staticmethod
+    def _extract_jobs(args, default_jobs=DEFAULT_JOBS):
+        """
+        Removes the --jobs option from the arguments
+        Both '--jobs N' and '--jobs=N' are supported
+        :param args: all arguments passed by bash
+        :type args: list
+        :param default_jobs: amount of checks that can be executed at the same time when --jobs is not passed
+        :type default_jobs: int
+        :return: remaining arguments and the amount of checks that can be executed at the same time
+        :rtype: tuple(list, int)
+        """
+        args = list(args)
+        jobs = default_jobs
+        for index, arg in enumerate(args):
+            if arg == '--jobs':
+                if index + 1 >= len(args):
+                    raise ValueError('Option --jobs requires a value.')
+                jobs = args.pop(index + 1)
+                args.pop(index)
+                break
+            if arg.startswith('--jobs='):
+                jobs = args.pop(index).split('=', 1)[1]
+                break
+        try:
+            jobs = int(jobs)
+        except ValueError:
+            raise ValueError('Option --jobs expects an integer, got {0}.'.format(jobs))
+        if jobs < 1:
+            raise ValueError('Option --jobs expects a value of at least 1, got {0}.'.format(jobs))
+        return args, jobs
+
     @staticmethod
     def run_method(*args):
         """
@@ -282,48 +503,173 @@ class HealthCheckCLIRunner(CLIRunner):
         :return: results & recap
         :rtype: dict
         """
+        args, jobs = HealthCheckCLIRunner._extract_jobs(args)
         args = HealthCheckCLIRunner._keep_old_argument_style(args)
-        unattended = False
-        to_json = False
-        if '--unattended' in args:
-            args.remove('--unattended')
-            unattended = True
-        if '--to-json' in args:
-            args.remove('--to-json')
-            to_json = True
+        args, flags = HealthCheckCLIRunner._extract_flags(args)
         module_name, method_name, help_requested, args = HealthCheckCLIRunner.extract_arguments(*args)
-        result_handler = HCResults(unattended, to_json)
+        result_handler = HCResults(flags['unattended'], flags['to_json'], context=NodeContext.new_run(), to_ndjson=flags['to_ndjson'])
         try:
-            found_method_pointers = HealthCheckCLIRunner._get_methods(module_name, method_name, HealthCheckCLIRunner.ADDON_TYPE)
+            found_method_data = HealthCheckCLIRunner._get_method_data(module_name, method_name, HealthCheckCLIRunner.ADDON_TYPE)
         except ModuleNotRecognizedException:
-            HealthCheckCLIRunner.print_help(HealthCheckCLIRunner._get_methods(addon_type=HealthCheckCLIRunner.ADDON_TYPE), error_help=True)
+            HealthCheckCLIRunner.print_help(HealthCheckCLIRunner._get_method_data(addon_type=HealthCheckCLIRunner.ADDON_TYPE), error_help=True)
             return
-        if len(found_method_pointers) == 0:  # Module found but no methods -> print help
-            HealthCheckCLIRunner.print_help(HealthCheckCLIRunner._get_methods(module_name=module_name, addon_type=HealthCheckCLIRunner.ADDON_TYPE), error_help=True)
+        if len(found_method_data) == 0:  # Module found but no methods -> print help
+            HealthCheckCLIRunner.print_help(HealthCheckCLIRunner._get_method_data(module_name=module_name, addon_type=HealthCheckCLIRunner.ADDON_TYPE), error_help=True)
             return
         if help_requested is True:
-            HealthCheckCLIRunner.print_help(found_method_pointers)
+            HealthCheckCLIRunner.print_help(found_method_data)
             return
-        local_settings = Helper.get_local_settings()
-        for key, value in local_settings.iteritems():
-            result_handler.info('{0}: {1}'.format(key.replace('_', ' ').title(), value))
+        # Only import the files containing the requested checks
+        found_method_pointers = [HealthCheckCLIRunner._load_method(function_data) for function_data in found_method_data]
+        if method_name == HealthCheckCLIRunner._WILDCARD:  # Checks marked with on_request_only have to be requested by name
+            found_method_pointers = [method for method in found_method_pointers if getattr(method, 'on_request_only', False) is False]
+        if flags['skip_cluster_checks'] is True:  # The cluster checks are executed by another node (see ClusterRunner)
+            found_method_pointers = [method for method in found_method_pointers if getattr(method, 'cluster_check', False) is False]
         try:
-            result_handler.info('Starting OpenvStorage Healthcheck version {0}'.format(Helper.get_healthcheck_version()))
-            result_handler.info("======================")
-            for found_method in found_method_pointers:
-                test_name = '{0}-{1}'.format(found_method.expose_to_cli['module_name'], found_method.expose_to_cli['method_name'])
-                try:
-                    node_check(found_method)(result_handler.HCResultCollector(result=result_handler, test_name=test_name))  # Wrapped in nodecheck for callback
-                except KeyboardInterrupt:
-                    raise
-                except Exception as ex:
-                    result_handler.exception('Unhandled exception caught when executing {0}. Got {1}'.format(found_method.__name__, str(ex)))
-                    HealthCheckCLIRunner.logger.exception('Unhandled exception caught when executing {0}'.format(found_method.__name__))
+            HealthCheckCLIRunner.print_header(result_handler)
+            HealthCheckCLIRunner._run_checks(found_method_pointers, result_handler, jobs, flags['profile'])
             return HealthCheckCLIRunner.get_results(result_handler, module_name, method_name)
         except KeyboardInterrupt:
             HealthCheckCLIRunner.logger.warning('Caught keyboard interrupt. Output may be incomplete!')
             return HealthCheckCLIRunner.get_results(result_handler, module_name, method_name)
 
+    @staticmethod
+    def _extract_flags(args):
+        """
+        Extracts the flags from the arguments
+        :param args: arguments passed on by bash
+        :type args: list
+        :return: remaining arguments and the flags by name (eg. --to-json -> to_json), True when the flag was passed
+        :rtype: tuple(list, dict)
+        """
+        args = list(args)
+        flags = {}
+        for flag in HealthCheckCLIRunner.FLAGS:
+            flags[flag.lstrip('-').replace('-', '_')] = flag in args
+            if flag in args:
+                args.remove(flag)
+        return args, flags
+
+    @staticmethod
+    def get_header():
+        """
+        Gets the information about the node and the healthcheck which precedes the results of the checks
+        Fetching it queries the configuration management and the package manager
+        :return: the lines of the header
+        :rtype: list[str]
+        """
+        local_settings = Helper.get_local_settings()
+        header = ['{0}: {1}'.format(key.replace('_', ' ').title(), value) for key, value in local_settings.iteritems()]
+        header.append('Starting OpenvStorage Healthcheck version {0}'.format(Helper.get_healthcheck_version()))
+        header.append('======================')
+        return header
+
+    @staticmethod
+    def print_header(result_handler, header=None):
+        """
+        Reports the information about the node and the healthcheck which precedes the results of the checks
+        :param result_handler: result parser
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param header: the lines of the header (see get_header). Fetched when not passed
+        :type header: list[str]
+        :return: None
+        :rtype: NoneType
+        """
+        for line in header if header is not None else HealthCheckCLIRunner.get_header():
+            result_handler.info(line)
+
+    @staticmethod
+    def _run_checks(method_pointers, result_handler, jobs=DEFAULT_JOBS, profile=False):
+        """
+        Executes all given checks. When more than one job is requested, the checks are executed by a bounded pool of threads
+        Checks marked with main_thread_only are executed by the calling thread while the pool is processing the others
+        :param method_pointers: checks to execute
+        :type method_pointers: list[function]
+        :param result_handler: result parser
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param jobs: amount of checks that can be executed at the same time
+        :type jobs: int
+        :param profile: write a pstats dump for every check
+        :type profile: bool
+        :return: None
+        :rtype: NoneType
+        """
+        if jobs == 1:
+            for method_pointer in method_pointers:
+                HealthCheckCLIRunner._run_check(method_pointer, result_handler, profile)
+            return
+        parallel_methods = [method for method in method_pointers if getattr(method, 'main_thread_only', False) is False]
+        serial_methods = [method for method in method_pointers if getattr(method, 'main_thread_only', False) is True]
+        pool = ThreadPool(processes=max(1, min(jobs, len(parallel_methods))))
+        try:
+            pending = [pool.apply_async(HealthCheckCLIRunner._run_check, (method_pointer, result_handler, profile)) for method_pointer in parallel_methods]
+            for method_pointer in serial_methods:
+                HealthCheckCLIRunner._run_check(method_pointer, result_handler, profile)
+            for async_result in pending:
+                while not async_result.ready():
+                    async_result.wait(1)  # Waiting with a timeout keeps the main thread responsive to a KeyboardInterrupt
+        except KeyboardInterrupt:
+            # Running threads can't be stopped. The daemonic workers are discarded when the process exits
+            pool.terminate()
+            raise
+        pool.close()
+        pool.join()
+
+    @staticmethod
+    def _run_check(method_pointer, result_handler, profile=False):
+        """
+        Executes a single check. Exceptions thrown by the check are added to the results of the check
+        The execution metrics of the check are registered with the result handler
+        :param method_pointer: check to execute
+        :type method_pointer: function
+        :param result_handler: result parser
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :param profile: write a pstats dump of the check to PROFILE_DIR
+        :type profile: bool
+        :return: None
+        :rtype: NoneType
+        """
+        test_name = '{0}-{1}'.format(method_pointer.expose_to_cli['module_name'], method_pointer.expose_to_cli['method_name'])
+        collector = result_handler.HCResultCollector(result=result_handler, test_name=test_name)
+        profiler = cProfile.Profile() if profile is True else None
+        with CheckMetrics(test_name) as metrics:
+            try:
+                if profiler is None:
+                    node_check(method_pointer)(collector)  # Wrapped in nodecheck for callback
+                else:
+                    profiler.runcall(node_check(method_pointer), collector)
+            except KeyboardInterrupt:
+                raise
+            except Exception as ex:
+                # Recorded for the test but not added to its results, to keep the output of the checks unchanged
+                collector.exception('Unhandled exception caught when executing {0}. Got {1}'.format(method_pointer.__name__, str(ex)), add_to_result=False)
+                HealthCheckCLIRunner.logger.exception('Unhandled exception caught when executing {0}'.format(method_pointer.__name__))
+        result_handler.finish_test(test_name, metrics.to_dict())
+        if profiler is not None:
+            HealthCheckCLIRunner._dump_profile(profiler, test_name, result_handler)
+
+    @staticmethod
+    def _dump_profile(profiler, test_name, result_handler):
+        """
+        Writes the pstats dump of a check to PROFILE_DIR
+        :param profiler: profiler which executed the check
+        :type profiler: cProfile.Profile
+        :param test_name: name of the check
+        :type test_name: str
+        :param result_handler: result parser
+        :type result_handler: ovs.extensions.healthcheck.result.HCResults
+        :return: None
+        :rtype: NoneType
+        """
+        location = os.path.join(HealthCheckCLIRunner.PROFILE_DIR, '{0}-{1}.pstats'.format(test_name, time.strftime('%Y%m%d-%H%M%S')))
+        try:
+            if not os.path.exists(HealthCheckCLIRunner.PROFILE_DIR):
+                os.makedirs(HealthCheckCLIRunner.PROFILE_DIR)
+            profiler.dump_stats(location)
+            result_handler.info('Profile of test {0} written to {1}'.format(test_name, location), add_to_result=False)
+        except (IOError, OSError) as ex:
+            result_handler.warning('Could not write the profile of test {0} to {1}. Got {2}'.format(test_name, location, str(ex)), add_to_result=False)
+
     @staticmethod
     def get_results(result_handler, module_name, method_name):
         """
@@ -352,6 +698,12 @@ class HealthCheckCLIRunner(CLIRunner):
                             .format(result_handler.counters['SUCCESS'], result_handler.counters['FAILED'],
                                     result_handler.counters['SKIPPED'], result_handler.counters['WARNING'],
                                     result_handler.counters['EXCEPTION']))
+        slowest_tests = result_handler.get_slowest_tests(HealthCheckCLIRunner.SLOWEST_TESTS_AMOUNT)
+        if len(slowest_tests) > 0:
+            result_handler.info('Slowest tests:')
+            for test_name, metrics in slowest_tests:
+                result_handler.info('{0}: {1}s wall time, {2}s cpu time, {3}'.format(test_name, metrics['wall_time'], metrics['cpu_time'],
+                                                                                     ', '.join('{0} {1}'.format(amount, call_type.replace('_', ' ')) for call_type, amount in sorted(metrics['calls'].iteritems()))))
         # returns dict with minimal and detailed information
         return {'result': result, 'recap': {'SUCCESS': result_handler.counters['SUCCESS'],
                                             'FAILED': result_handler.counters['FAILED'],
@@ -17,14 +17,15 @@
 # but WITHOUT ANY WARRANTY of any kind.
 import os
 import psutil
+import time
 from ovs.extensions.generic.configuration import Configuration
 from ovs.extensions.generic.sshclient import SSHClient
-from ovs.extensions.generic.system import System
+from ovs.extensions.healthcheck.decorators import main_thread_only
 from ovs.extensions.healthcheck.expose_to_cli import expose_to_cli, HealthCheckCLIRunner
 from ovs.extensions.healthcheck.helpers.filesystem import FilesystemHelper
-from ovs.extensions.healthcheck.helpers.helper import Helper
 from ovs.extensions.healthcheck.helpers.network import NetworkHelper
 from ovs.extensions.healthcheck.helpers.rabbitmq import RabbitMQ
+from ovs.extensions.healthcheck.helpers.service import ServiceHelper
 from ovs.extensions.healthcheck.helpers.vpool import VPoolHelper
 from ovs.extensions.packages.packagefactory import PackageFactory
 from ovs.extensions.services.servicefactory import ServiceFactory
@@ -40,23 +41,23 @@ class OpenvStorageHealthCheck(object):
     A healthcheck for the Open vStorage framework
     """
     MODULE = 'ovs'
-    LOCAL_SR = System.get_my_storagerouter()
-    LOCAL_ID = System.get_my_machine_id()
 
     CELERY_CHECK_TIME = 7
 
     @staticmethod
     @expose_to_cli(MODULE, 'log-files-test', HealthCheckCLIRunner.ADDON_TYPE)
-    def check_size_of_log_files(result_handler, max_log_size=Helper.max_log_size):
+    def check_size_of_log_files(result_handler, max_log_size=None):
         """
         Checks the size of the initialized log files
         :param result_handler: logging object
         :type result_handler: ovs.extensions.healthcheck.result.HCResults
-        :param max_log_size: maximum log size of a log file (in MB)
+        :param max_log_size: maximum log size of a log file (in MB). Defaults to the max_check_log_size setting
         :type max_log_size: double
         :return: None
         :rtype: NoneType
         """
+        if max_log_size is None:
+            max_log_size = result_handler.context.settings['max_check_log_size']
         def get_log_files_by_path(start_path, recursive=True):
             files_to_check = []
             for entry in os.listdir(start_path):
@@ -121,10 +122,11 @@ class OpenvStorageHealthCheck(object):
         :rtype: NoneType
         """
         result_handler.info('Checking {0} ports'.format(key), add_to_result=False)
-        ip = OpenvStorageHealthCheck.LOCAL_SR.ip
-        if key not in Helper.extra_ports:
+        ip = result_handler.context.storagerouter.ip
+        extra_ports = result_handler.context.settings['extra_ports']
+        if key not in extra_ports:
             raise RuntimeError('Settings.json is incorrect! The extra ports to check do not have {0}'.format(key))
-        for port in Helper.extra_ports[key]:
+        for port in extra_ports[key]:
             result_handler.info('Checking port {0} of service {1}.'.format(port, key), add_to_result=False)
             result = NetworkHelper.check_port_connection(port, ip)
             if result:
@@ -143,7 +145,7 @@ class OpenvStorageHealthCheck(object):
         :rtype: NoneType
         """
         # Check Celery and RabbitMQ
-        if OpenvStorageHealthCheck.LOCAL_SR.node_type != 'MASTER':
+        if result_handler.context.storagerouter.node_type != 'MASTER':
             result_handler.skip('RabbitMQ is not running/active on this server!')
             return
         result_handler.info('Checking Celery.', add_to_result=False)
@@ -175,13 +177,13 @@ class OpenvStorageHealthCheck(object):
         :rtype: NoneType
         """
         result_handler.info('Checking OVS packages: ', add_to_result=False)
-        client = SSHClient(OpenvStorageHealthCheck.LOCAL_SR)
+        client = SSHClient(result_handler.context.storagerouter)
         # PackageManager.SDM_PACKAGE_NAMES for sdm
         package_manager = PackageFactory.get_manager()
         all_packages = list(package_manager.package_names)
-        extra_packages = list(Helper.packages)
+        extra_packages = list(result_handler.context.settings['package_list'])
         ee_relation = {'alba': 'alba-ee', 'arakoon': 'arakoon', 'volumedriver-no-dedup-server': 'volumedriver-ee-server'}  # Key = non-ee, value = ee
-        if OpenvStorageHealthCheck.LOCAL_SR.features['alba']['edition'] == 'community':
+        if result_handler.context.storagerouter.features['alba']['edition'] == 'community':
             required_packages = [package_name for package_name in all_packages if package_name in ee_relation.keys()]
         else:
             required_packages = [package_name for package_name in all_packages if package_name in ee_relation.values()]
@@ -215,27 +217,43 @@ class OpenvStorageHealthCheck(object):
         :rtype: NoneType
         """
         logger.info('Checking local ovs services.')
-        client = SSHClient(OpenvStorageHealthCheck.LOCAL_SR)
+        client = SSHClient(logger.context.storagerouter)
         service_manager = ServiceFactory.get_manager()
         services = [service for service in service_manager.list_services(client=client) if service.startswith(OpenvStorageHealthCheck.MODULE)]
         if len(services) == 0:
             logger.warning('Found no local ovs services.')
+        flapping_settings = ServiceHelper.get_flapping_settings(logger.context.settings)
+        statuses = ServiceHelper.get_service_statuses(services, client)
+        flapping_unknown = []
         for service_name in services:
-            if service_manager.get_service_status(service_name, client) == 'active':
-                logger.success('Service {0} is running!'.format(service_name))
-            else:
+            status = statuses[service_name]
+            if status['state'] != 'active':
                 logger.failure('Service {0} is not running, please check this.'.format(service_name))
+                continue
+            flapping = ServiceHelper.is_flapping(status, flapping_settings['max_restarts'], flapping_settings['window'])
+            if flapping is True:
+                logger.warning('Service {0} is running but restarted {1} times, last restart {2}s ago'
+                               .format(service_name, status['restarts'], int(time.time() - status['active_since'])))
+            else:
+                logger.success('Service {0} is running!'.format(service_name))
+                if flapping is None:
+                    flapping_unknown.append(service_name)
+        if len(flapping_unknown) > 0:
+            logger.skip(ServiceHelper.FLAPPING_UNKNOWN_MESSAGE.format(', '.join(flapping_unknown)))
+        logger.add_data(key='services', value=statuses)
 
     @staticmethod
     @timeout(CELERY_CHECK_TIME)
-    def _check_celery():
+    def _check_celery(storagerouter):
         """
         Preliminary/Simple check for Celery and RabbitMQ component
+        :param storagerouter: storagerouter to execute the celery task for
+        :type storagerouter: ovs.dal.hybrids.storagerouter.StorageRouter
         """
         # try if celery works smoothly
         try:
-            guid = OpenvStorageHealthCheck.LOCAL_SR.guid
-            machine_id = OpenvStorageHealthCheck.LOCAL_SR.machine_id
+            guid = storagerouter.guid
+            machine_id = storagerouter.machine_id
             obj = StorageRouterController.get_support_info.s(guid).apply_async(routing_key='sr.{0}'.format(machine_id)).get()
         except TimeoutError as ex:
             raise TimeoutError('{0}: Process is taking to long!'.format(ex.value))
@@ -245,6 +263,7 @@ class OpenvStorageHealthCheck(object):
             return False
 
     @staticmethod
+    @main_thread_only
     @expose_to_cli(MODULE, 'workers-test', HealthCheckCLIRunner.ADDON_TYPE)
     def check_ovs_workers(result_handler):
         """
@@ -259,7 +278,7 @@ class OpenvStorageHealthCheck(object):
         # checking celery
         try:
             # basic celery check
-            OpenvStorageHealthCheck._check_celery()
+            OpenvStorageHealthCheck._check_celery(result_handler.context.storagerouter)
             result_handler.success('The OVS-WORKERS are working smoothly!')
         except TimeoutError:
             # apparently the basic check failed, so we are going crazy
@@ -278,7 +297,7 @@ class OpenvStorageHealthCheck(object):
         :rtype: NoneType
         """
         result_handler.info('Checking if OWNERS are set correctly on certain maps.', add_to_result=False)
-        for dirname, owner_settings in Helper.owners_files.iteritems():
+        for dirname, owner_settings in result_handler.context.settings['owners_files'].iteritems():
             # check if directory/file exists
             if os.path.exists(dirname):
                 if owner_settings.get('user') == FilesystemHelper.get_owner_of_file(dirname) \
@@ -290,7 +309,7 @@ class OpenvStorageHealthCheck(object):
                 result_handler.skip('Directory {0} does not exists!'.format(dirname))
 
         result_handler.info('Checking if Rights are set correctly on certain maps.', add_to_result=False)
-        for dirname, rights in Helper.rights_dirs.iteritems():
+        for dirname, rights in result_handler.context.settings['rights_dirs'].iteritems():
             # check if directory/file exists
             if os.path.exists(dirname):
                 if FilesystemHelper.check_rights_of_file(dirname, rights):
@@ -373,7 +392,7 @@ class OpenvStorageHealthCheck(object):
 
         # Checking consistency of volumedriver vs. ovsdb and backwards
         for vp in VPoolHelper.get_vpools():
-            if vp.guid not in OpenvStorageHealthCheck.LOCAL_SR.vpools_guids:
+            if vp.guid not in result_handler.context.storagerouter.vpools_guids:
                 result_handler.skip('Skipping vPool {0} because it is not living here.'.format(vp.name))
                 continue
             result_handler.info('Checking consistency of volumedriver vs. ovsdb for {0}: '.format(vp.name), add_to_result=False)
@@ -426,8 +445,8 @@ class OpenvStorageHealthCheck(object):
         """
         # RabbitMQ check: cluster verification
         result_handler.info('Pre-check: verification of RabbitMQ cluster.', add_to_result=False)
-        if OpenvStorageHealthCheck.LOCAL_SR.node_type == 'MASTER':
-            r = RabbitMQ(ip=OpenvStorageHealthCheck.LOCAL_SR.ip)
+        if result_handler.context.storagerouter.node_type == 'MASTER':
+            r = RabbitMQ(ip=result_handler.context.storagerouter.ip)
             partitions = r.partition_status()
             if len(partitions) == 0:
                 result_handler.success('RabbitMQ has no partition issues!')
@@ -14,6 +14,7 @@
 # Open vStorage is distributed in the hope that it will be useful,
 # but WITHOUT ANY WARRANTY of any kind.
 from ovs.dal.lists.albanodelist import AlbaNodeList
+from ovs.extensions.healthcheck.metrics import CheckMetrics
 
 
 class AlbaNodeHelper(object):
@@ -28,4 +29,15 @@ class AlbaNodeHelper(object):
         :param alba_node_id: id of the alba node
         :return:
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
         return AlbaNodeList.get_albanode_by_node_id(alba_node_id)
+
+    @staticmethod
+    def get_albanodes():
+        """
+        Fetches all the alba nodes on the cluster
+        :return: alba nodes
+        :rtype: list
+        """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
+        return AlbaNodeList.get_albanodes()
@@ -39,12 +39,356 @@ Blocking ticket: https://github.com/openvstorage/alba/issues/477
 """
 import os
 import re
+import sys
+import copy
 import json
 import time
 import select
+import threading
 from subprocess import Popen, PIPE, CalledProcessError
+from ovs.extensions.healthcheck.helpers.albacli_worker import has_failed
+from ovs.extensions.healthcheck.helpers.context import NodeContext
 from ovs.extensions.healthcheck.helpers.exceptions import AlbaException
 from ovs.extensions.healthcheck.logger import Logger
+from ovs.extensions.healthcheck.metrics import CheckMetrics
+
+
+class AlbaCLIExecutor(object):
+    """
+    Executes ALBA CLI commands through long lived worker processes (see albacli_worker.py)
+    The healthcheck process is large: forking it for every command is expensive. The workers are small and fork the commands instead
+    Multiple commands can be passed in a single request. Every thread executing commands gets a worker of its own from the pool
+    At most MAX_WORKERS workers are running, threads wait for a worker once they are all busy. Workers idle for IDLE_TIMEOUT seconds are stopped
+    When no worker can be started, the commands are executed directly
+    """
+    WORKER_LOCATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'albacli_worker.py')
+    MAX_WORKERS = 32
+    IDLE_TIMEOUT = 300  # in seconds
+    logger = Logger('healthcheck-alba_cli')
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        """
+        Initialize the executor. Workers are started on first use
+        """
+        # Workers waiting for a request, most recently used last: (worker, idle since)
+        self._idle_workers = []
+        self._worker_count = 0  # Running workers, idle or busy
+        self._request_id = 0
+        self._lock = threading.Lock()
+        self._worker_released = threading.Condition(self._lock)
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Gets the executor shared by the whole process
+        :return: the executor
+        :rtype: AlbaCLIExecutor
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def execute(self, cmd_lists, stop_on_error=False):
+        """
+        Executes commands
+        :param cmd_lists: commands to execute
+        :type cmd_lists: list[list]
+        :param stop_on_error: do not execute the commands following a failed command
+        :type stop_on_error: bool
+        :return: exit code, output and duration of every executed command, in order. Contains an error when the command could not be started
+                 or when the worker stopped before answering. With stop_on_error, the commands following a failed command have no result
+        :rtype: list[dict]
+        """
+        try:
+            return self._execute_by_worker(cmd_lists, stop_on_error)
+        except (IOError, OSError) as ex:
+            # The request never reached a worker: none of the commands were executed
+            self.logger.warning('Could not use an alba cli worker, executing the commands directly. Got {0}'.format(ex))
+            executions = []
+            for cmd_list in cmd_lists:
+                executions.append(self.execute_directly(cmd_list))
+                if stop_on_error is True and has_failed(cmd_list, executions[-1]):
+                    break
+            return executions
+
+    @staticmethod
+    def execute_directly(cmd_list):
+        """
+        Executes a command in a child process of the current process
+        :param cmd_list: command to execute
+        :type cmd_list: list
+        :return: exit code, output and duration of the command. Contains an error when the command could not be started
+        :rtype: dict
+        """
+        start = time.time()
+        try:
+            if not hasattr(select, 'poll'):
+                import subprocess
+                subprocess._has_poll = False  # Damn 'monkey patching'
+            channel = Popen(cmd_list, stdout=PIPE, stderr=PIPE, universal_newlines=True)
+        except OSError as ose:
+            return {'error': str(ose)}
+        output, stderr = channel.communicate()
+        return {'returncode': channel.returncode, 'stdout': output, 'stderr': stderr, 'duration': time.time() - start}
+
+    def _execute_by_worker(self, cmd_lists, stop_on_error=False):
+        """
+        Lets a worker execute the commands
+        A worker is only returned to the pool after it answered. A worker which got interrupted is stopped
+        Raises IOError or OSError when the request could not be passed to a worker. Once it was, the commands are never executed again:
+        a worker which does not answer results in an error for every command, as they might have been executed (partially)
+        :param cmd_lists: commands to execute
+        :type cmd_lists: list[list]
+        :param stop_on_error: do not execute the commands following a failed command
+        :type stop_on_error: bool
+        :return: exit code, output and duration of every executed command, in order
+        :rtype: list[dict]
+        """
+        request_id, worker = self._acquire_worker()
+        answer = None
+        try:
+            if worker is None:
+                with open(os.devnull, 'w') as devnull:
+                    worker = Popen([sys.executable, self.WORKER_LOCATION], stdin=PIPE, stdout=PIPE, stderr=devnull, close_fds=True)
+            # The worker only handles complete lines: a request which could not be written completely is not executed
+            worker.stdin.write(json.dumps({'id': request_id, 'commands': cmd_lists, 'stop_on_error': stop_on_error}) + '\n')
+            worker.stdin.flush()
+            try:
+                line = worker.stdout.readline()
+                if not line:
+                    raise IOError('The alba cli worker stopped')
+                answer = json.loads(line)
+                if answer['id'] != request_id:
+                    raise ValueError('The alba cli worker answered request {0} instead of {1}'.format(answer['id'], request_id))
+            except (IOError, OSError, ValueError) as ex:
+                answer = None
+                self.logger.warning('The alba cli worker did not answer request {0}. Got {1}'.format(request_id, ex))
+                return [{'error': 'No answer from the alba cli worker, the command might have been executed: {0}'.format(ex)} for _ in cmd_lists]
+        finally:
+            self._release_worker(worker if answer is not None else None, worker)
+        return [dict((key, str(value) if isinstance(value, basestring) else value) for key, value in result.iteritems()) for result in answer['results']]
+
+    def _acquire_worker(self):
+        """
+        Gets an idle worker. Waits for a worker to become idle when MAX_WORKERS workers are busy
+        :return: the id of the request and the idle worker. No worker when a new worker has to be started
+        :rtype: tuple(int, subprocess.Popen)
+        """
+        with self._lock:
+            self._request_id += 1
+            request_id = self._request_id
+            while True:
+                while len(self._idle_workers) > 0:
+                    worker, _ = self._idle_workers.pop()
+                    if worker.poll() is None:
+                        return request_id, worker
+                    self._worker_count -= 1  # Stopped in the meantime
+                if self._worker_count < self.MAX_WORKERS:
+                    self._worker_count += 1  # Reserved for the worker which is about to be started
+                    return request_id, None
+                self._worker_released.wait(1)  # Waiting with a timeout keeps the thread responsive to a KeyboardInterrupt
+
+    def _release_worker(self, idle_worker, worker):
+        """
+        Returns a worker to the pool and stops the workers which were idle for too long
+        :param idle_worker: worker which answered and can be used again. None when it has to be stopped
+        :type idle_worker: subprocess.Popen
+        :param worker: the worker which was used. None when it could not be started
+        :type worker: subprocess.Popen
+        :return: None
+        :rtype: NoneType
+        """
+        now = time.time()
+        with self._lock:
+            if idle_worker is not None:
+                self._idle_workers.append((idle_worker, now))
+            else:
+                self._worker_count -= 1
+            # The least recently used workers are first
+            expired = 0
+            while expired < len(self._idle_workers) and now - self._idle_workers[expired][1] > self.IDLE_TIMEOUT:
+                expired += 1
+            stopped_workers = [expired_worker for expired_worker, _ in self._idle_workers[:expired]]
+            del self._idle_workers[:expired]
+            self._worker_count -= len(stopped_workers)
+            self._worker_released.notify_all()
+        if idle_worker is None and worker is not None and worker.poll() is None:
+            stopped_workers.append(worker)
+            worker.kill()
+        for stopped_worker in stopped_workers:
+            # Closing stdin makes an idle worker exit
+            try:
+                stopped_worker.stdin.close()
+                stopped_worker.wait()
+            except (IOError, OSError):
+                pass
+
+
+class AlbaCLICache(object):
+    """
+    Keeps the output of read-only ALBA CLI commands for the rest of the healthcheck run
+    Every cached command has its own TTL. A command which is not known to be read-only invalidates the cached output
+    of the same config. Proxy commands invalidate the cached output of the config of the abm of the proxy (see register_proxy),
+    other commands which are not executed against a config invalidate all cached output
+    Output is only cached when nothing it depends on was invalidated while the command was executing (see get_generation)
+    """
+    # Seconds to keep the output, by command
+    COMMAND_TTLS = {'list-presets': 30,
+                    'list-osds': 30,
+                    'list-namespaces': 30,
+                    'get-maintenance-config': 60,
+                    'proxy-client-cfg': 60}
+    # Commands which do not change anything but whose output has to be fresh
+    UNCACHED_READ_ONLY_COMMANDS = ['show-namespace', 'list-ns-osds', 'asd-multi-get', 'get-disk-safety', 'proxy-statistics', 'proxy-download-object']
+    # Commands which change the data of an ASD, not the state kept by the abm
+    ASD_COMMANDS = ['asd-set', 'asd-delete']
+
+    # Cached output by key: {'output': object, 'expires': float}
+    _entries = {}
+    # Config of the abm by proxy (host, port)
+    _proxy_configs = {}
+    # Incremented when all cached output is invalidated, and by config when the output of a config is invalidated
+    _generation = 0
+    _config_generations = {}
+    _context = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def get_key(command, config, named_params, extra_params, to_json):
+        """
+        Gets the key of a command. Commands which are not cached have no key
+        :return: the key. None when the output of the command is not cached
+        :rtype: tuple
+        """
+        if command not in AlbaCLICache.COMMAND_TTLS:
+            return None
+        return command, config, tuple(sorted(named_params.iteritems())), tuple(extra_params), to_json
+
+    @staticmethod
+    def get(key):
+        """
+        Gets the cached output of a command
+        :param key: key of the command (see get_key)
+        :type key: tuple
+        :return: whether the output was cached and a copy of the output
+        :rtype: tuple(bool, object)
+        """
+        with AlbaCLICache._lock:
+            AlbaCLICache._ensure_current_run()
+            entry = AlbaCLICache._entries.get(key)
+            if entry is None or entry['expires'] < time.time():
+                return False, None
+            return True, copy.deepcopy(entry['output'])
+
+    @staticmethod
+    def get_generation(config):
+        """
+        Gets the generation of the cached output of a config. Must be fetched before executing the command whose output is cached
+        :param config: the config the command is executed against
+        :type config: str
+        :return: the generation
+        :rtype: tuple(int, int)
+        """
+        with AlbaCLICache._lock:
+            AlbaCLICache._ensure_current_run()
+            return AlbaCLICache._generation, AlbaCLICache._config_generations.get(config, 0)
+
+    @staticmethod
+    def set(key, output, generation):
+        """
+        Caches the output of a command. The output is dropped when the cached output of its config was invalidated in the meantime
+        :param key: key of the command (see get_key)
+        :type key: tuple
+        :param output: output of the command
+        :type output: object
+        :param generation: generation of the config before the command was executed (see get_generation)
+        :type generation: tuple(int, int)
+        :return: None
+        :rtype: NoneType
+        """
+        with AlbaCLICache._lock:
+            AlbaCLICache._ensure_current_run()
+            if generation != (AlbaCLICache._generation, AlbaCLICache._config_generations.get(key[1], 0)):
+                return  # The output might already be outdated
+            AlbaCLICache._entries[key] = {'output': copy.deepcopy(output),
+                                          'expires': time.time() + AlbaCLICache.COMMAND_TTLS[key[0]]}
+
+    @staticmethod
+    def register_proxy(host, port, config):
+        """
+        Registers the config of the abm of a proxy. Commands executed through the proxy only invalidate the cached output of this config
+        :param host: host the proxy listens on
+        :type host: str
+        :param port: port the proxy listens on
+        :type port: int
+        :param config: the config of the abm of the proxy
+        :type config: str
+        :return: None
+        :rtype: NoneType
+        """
+        with AlbaCLICache._lock:
+            AlbaCLICache._ensure_current_run()
+            AlbaCLICache._proxy_configs[(str(host), str(port))] = config
+
+    @staticmethod
+    def invalidate(command, config, named_params=None):
+        """
+        Removes the cached output the command might have changed
+        :param command: the executed command
+        :type command: str
+        :param config: the config the command was executed against
+        :type config: str
+        :param named_params: the named parameters of the command
+        :type named_params: dict
+        :return: None
+        :rtype: NoneType
+        """
+        if command in AlbaCLICache.COMMAND_TTLS or command in AlbaCLICache.UNCACHED_READ_ONLY_COMMANDS or command in AlbaCLICache.ASD_COMMANDS:
+            return
+        with AlbaCLICache._lock:
+            AlbaCLICache._ensure_current_run()
+            if config is None and command.startswith('proxy-') and named_params is not None:
+                config = AlbaCLICache._proxy_configs.get((str(named_params.get('host')), str(named_params.get('port'))))
+            if config is None:
+                AlbaCLICache._generation += 1
+                AlbaCLICache._entries.clear()
+                return
+            AlbaCLICache._config_generations[config] = AlbaCLICache._config_generations.get(config, 0) + 1
+            for key in AlbaCLICache._entries.keys():
+                if key[1] == config:
+                    AlbaCLICache._entries.pop(key)
+
+    @staticmethod
+    def clear():
+        """
+        Removes all cached output
+        :return: None
+        :rtype: NoneType
+        """
+        with AlbaCLICache._lock:
+            AlbaCLICache._generation += 1
+            AlbaCLICache._entries.clear()
+
+    @staticmethod
+    def _ensure_current_run():
+        """
+        Drops the output cached by a previous run. Must be called while holding the lock
+        :return: None
+        :rtype: NoneType
+        """
+        context = NodeContext.get_current()
+        if AlbaCLICache._context is not context:
+            AlbaCLICache._context = context
+            AlbaCLICache._generation += 1
+            AlbaCLICache._entries.clear()
+            AlbaCLICache._proxy_configs.clear()
 
 
 class AlbaCLI(object):
@@ -54,7 +398,7 @@ class AlbaCLI(object):
     @staticmethod
     def run(command, config=None, named_params=None, extra_params=None, client=None, debug=False, to_json=True):
         """
-        Executes a command on ALBA
+        Executes a command on ALBA. The output of read-only commands is cached for the rest of the run (see AlbaCLICache)
         When --to-json is NOT passed:
             * An error occurs --> exitcode != 0
             * It worked --> exitcode == 0
@@ -86,7 +430,6 @@ class AlbaCLI(object):
         if extra_params is None:
             extra_params = []
 
-        logger = Logger('healthcheck-alba_cli')
         if os.environ.get('RUNNING_UNITTESTS') == 'True':
             # For the unittest, all commands are passed to a mocked Alba
             from ovs.extensions.plugins.tests.alba_mockups import VirtualAlbaBackend
@@ -94,43 +437,138 @@ class AlbaCLI(object):
             named_params.update({'extra_params': extra_params})
             return getattr(VirtualAlbaBackend, command.replace('-', '_'))(**named_params)
 
+        # Only the output of local executions is cached, a client might be connected to another cluster
+        cache_key = AlbaCLICache.get_key(command, config, named_params, extra_params, to_json) if client is None else None
+        if cache_key is not None:
+            cached, output = AlbaCLICache.get(cache_key)
+            if cached is True:
+                return output
+            generation = AlbaCLICache.get_generation(config)
+
+        cmd_list = AlbaCLI._build_command(command, config, named_params, extra_params, to_json)
+        execution = None
+        try:
+            if client is None:
+                execution = AlbaCLIExecutor.get_instance().execute([cmd_list])[0]
+            output = AlbaCLI._process(command, cmd_list, execution=execution, client=client, debug=debug, to_json=to_json)
+        finally:
+            AlbaCLICache.invalidate(command, config, named_params)
+        if cache_key is not None:
+            AlbaCLICache.set(cache_key, output, generation)
+        return output
+
+    @staticmethod
+    def run_batch(calls, debug=False, with_durations=False, stop_on_error=False):
+        """
+        Executes multiple commands on ALBA with a single request to the executor. The commands are executed in order
+        :param calls: keyword arguments of run for every command, eg: [{'command': 'asd-set', 'named_params': {...}, 'extra_params': [...]}]
+        :type calls: list[dict]
+        :param debug: Log additional output
+        :type debug: bool
+        :param with_durations: Also return the time every command took
+        :type with_durations: bool
+        :param stop_on_error: Do not execute the commands following a failing command
+        :type stop_on_error: bool
+        :return: the output of every command, in order. A failing command results in its AlbaException instead of its output, a command
+                 which was not executed because of stop_on_error is None
+                 When with_durations is passed: the outputs and the durations in seconds (None when the command could not be started)
+        :rtype: list | tuple(list, list)
+        """
+        results = []
+        durations = []
+        if os.environ.get('RUNNING_UNITTESTS') == 'True':
+            for call in calls:
+                start = time.time()
+                try:
+                    results.append(AlbaCLI.run(debug=debug, **call))
+                except AlbaException as ex:
+                    results.append(ex)
+                durations.append(time.time() - start)
+                if stop_on_error is True and isinstance(results[-1], AlbaException):
+                    break
+            results.extend([None] * (len(calls) - len(results)))
+            durations.extend([None] * (len(calls) - len(durations)))
+            return (results, durations) if with_durations is True else results
+
+        cmd_lists = [AlbaCLI._build_command(call['command'], call.get('config'), call.get('named_params') or {}, call.get('extra_params') or [], call.get('to_json', True))
+                     for call in calls]
+        try:
+            executions = AlbaCLIExecutor.get_instance().execute(cmd_lists, stop_on_error)
+        finally:
+            for call in calls:
+                AlbaCLICache.invalidate(call['command'], call.get('config'), call.get('named_params'))
+        for call, cmd_list, execution in zip(calls, cmd_lists, executions):
+            durations.append(execution.get('duration'))
+            try:
+                results.append(AlbaCLI._process(call['command'], cmd_list, execution=execution, debug=debug, to_json=call.get('to_json', True)))
+            except AlbaException as ex:
+                results.append(ex)
+        results.extend([None] * (len(calls) - len(results)))
+        durations.extend([None] * (len(calls) - len(durations)))
+        return (results, durations) if with_durations is True else results
+
+    @staticmethod
+    def _build_command(command, config, named_params, extra_params, to_json):
+        """
+        Builds the command line of an ALBA command
+        :return: the command line
+        :rtype: list
+        """
+        if to_json is True:
+            extra_options = ["--to-json"]
+        else:
+            extra_options = []
+        cmd_list = ['/usr/bin/alba', command] + extra_options
+        if config is not None:
+            cmd_list.append('--config={0}'.format(config))
+        for key, value in named_params.iteritems():
+            cmd_list.append('--{0}={1}'.format(key, value))
+        cmd_list.extend(extra_params)
+        return cmd_list
+
+    @staticmethod
+    def _process(command, cmd_list, execution=None, client=None, debug=False, to_json=True):
+        """
+        Processes the output of an ALBA command
+        :param command: The executed command, eg: 'list-namespaces'
+        :type command: str
+        :param cmd_list: The executed command line
+        :type cmd_list: list
+        :param execution: The result of the local execution (see AlbaCLIExecutor.execute)
+        :type execution: dict
+        :param client: A client on which to execute the command when it was not executed locally
+        :type client: ovs.extensions.generic.sshclient.SSHClient
+        :param debug: Log additional output
+        :type debug: bool
+        :param to_json: Parse the output as json
+        :type to_json: bool
+        :return: The output of the command
+        :rtype: dict
+        """
+        logger = Logger('healthcheck-alba_cli')
         debug_log = []
         try:
-            if to_json is True:
-                extra_options = ["--to-json"]
-            else:
-                extra_options = []
-            cmd_list = ['/usr/bin/alba', command] + extra_options
-            if config is not None:
-                cmd_list.append('--config={0}'.format(config))
-            for key, value in named_params.iteritems():
-                cmd_list.append('--{0}={1}'.format(key, value))
-            cmd_list.extend(extra_params)
             cmd_string = ' '.join(cmd_list)
             debug_log.append('Command: {0}'.format(cmd_string))
 
             start = time.time()
+            CheckMetrics.count_call(CheckMetrics.ALBA_CLI)
             try:
                 if client is None:
-                    try:
-                        if not hasattr(select, 'poll'):
-                            import subprocess
-                            subprocess._has_poll = False  # Damn 'monkey patching'
-                        channel = Popen(cmd_list, stdout=PIPE, stderr=PIPE, universal_newlines=True)
-                    except OSError as ose:
-                        raise CalledProcessError(1, cmd_string, str(ose))
-                    output, stderr = channel.communicate()
-                    output = re.sub(r'[^\x00-\x7F]+', '', output)
-                    stderr_debug = 'stderr: {0}'.format(stderr)
+                    if 'error' in execution:
+                        raise CalledProcessError(1, cmd_string, execution['error'])
+                    output = re.sub(r'[^\x00-\x7F]+', '', execution['stdout'])
+                    stderr_debug = 'stderr: {0}'.format(execution['stderr'])
                     stdout_debug = 'stdout: {0}'.format(output)
                     if debug is True:
                         logger.debug(stderr_debug)
                         logger.debug(stdout_debug)
                     debug_log.append(stderr_debug)
                     debug_log.append(stdout_debug)
-                    exit_code = channel.returncode
+                    exit_code = execution['returncode']
                     if exit_code != 0:  # Raise same error as check_output
                         raise CalledProcessError(exit_code, cmd_string, output)
+                    duration = execution['duration']
                 else:
                     if debug is True:
                         output, stderr = client.run(cmd_list, debug=True)
@@ -138,12 +576,12 @@ class AlbaCLI(object):
                     else:
                         output = client.run(cmd_list, debug=False).strip()
                     debug_log.append('stdout: {0}'.format(output))
+                    duration = time.time() - start
 
                 if to_json is True:
                     output = json.loads(output)
                 else:
                     return output
-                duration = time.time() - start
                 if duration > 0.5:
                     logger.warning('AlbaCLI call {0} took {1}s'.format(command, round(duration, 2)))
             except CalledProcessError as cpe:
@@ -0,0 +1,110 @@
+# Copyright (C) 2016 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Worker executing ALBA CLI commands for the AlbaCLIExecutor (see albacli.py)
+Reads requests from stdin and writes the answers to stdout, one json document per line:
+- request: {"id": 1, "commands": [["/usr/bin/alba", "list-osds", ...], ...], "stop_on_error": false}
+- answer: {"id": 1, "results": [{"returncode": 0, "stdout": "...", "stderr": "...", "duration": 0.1}, ...]}
+Requests are handled one at a time, the commands of a request are executed in order
+With stop_on_error, the commands following a failed command are not executed and have no result
+Only depends on the standard library: every command is forked from this small process instead of from the healthcheck
+"""
+import re
+import sys
+import json
+import time
+import select
+import subprocess
+
+
+def execute(cmd_list):
+    """
+    Executes a command
+    :param cmd_list: command to execute
+    :type cmd_list: list
+    :return: exit code, output and duration of the command. Contains an error when the command could not be started
+    :rtype: dict
+    """
+    start = time.time()
+    try:
+        process = subprocess.Popen(cmd_list, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    except OSError as ex:
+        return {'error': str(ex)}
+    stdout, stderr = process.communicate()
+    # Only ascii can be passed on safely as json
+    return {'returncode': process.returncode,
+            'stdout': re.sub(r'[^\x00-\x7F]+', '', stdout),
+            'stderr': re.sub(r'[^\x00-\x7F]+', '', stderr),
+            'duration': time.time() - start}
+
+
+def has_failed(cmd_list, result):
+    """
+    Determines whether a command failed
+    With --to-json, ALBA exits with 0 when executing the command failed: the failure is reported in the output
+    :param cmd_list: the executed command
+    :type cmd_list: list
+    :param result: the result of the command (see execute)
+    :type result: dict
+    :return: True when the command failed
+    :rtype: bool
+    """
+    if 'error' in result or result['returncode'] != 0:
+        return True
+    if '--to-json' in cmd_list:
+        try:
+            return json.loads(result['stdout'])['success'] is not True
+        except (ValueError, KeyError, TypeError):
+            return True
+    return False
+
+
+def execute_all(cmd_lists, stop_on_error=False):
+    """
+    Executes commands in order
+    :param cmd_lists: commands to execute
+    :type cmd_lists: list[list]
+    :param stop_on_error: do not execute the commands following a failed command
+    :type stop_on_error: bool
+    :return: the results of the executed commands (see execute), in order
+    :rtype: list[dict]
+    """
+    results = []
+    for cmd_list in cmd_lists:
+        result = execute(cmd_list)
+        results.append(result)
+        if stop_on_error is True and has_failed(cmd_list, result):
+            break
+    return results
+
+
+def main():
+    """
+    Handles requests until stdin is closed
+    :return: None
+    :rtype: NoneType
+    """
+    if not hasattr(select, 'poll'):
+        subprocess._has_poll = False
+    for line in iter(sys.stdin.readline, ''):
+        request = json.loads(line)
+        sys.stdout.write(json.dumps({'id': request['id'], 'results': execute_all(request['commands'], request.get('stop_on_error', False))}) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,7 @@
 # Open vStorage is distributed in the hope that it will be useful,
 # but WITHOUT ANY WARRANTY of any kind.
 from ovs.dal.lists.albabackendlist import AlbaBackendList
+from ovs.extensions.healthcheck.metrics import CheckMetrics
 
 
 class BackendHelper(object):
@@ -29,5 +30,6 @@ class BackendHelper(object):
         :return: alba backends
         :rtype: list
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
 
         return AlbaBackendList.get_albabackends()
@@ -20,9 +20,19 @@ from ovs.extensions.storage.volatilefactory import VolatileFactory
 
 class CacheHelper(object):
 
-    client = VolatileFactory.get_client()
+    _client = None
     prefix = 'health-check_'
 
+    @staticmethod
+    def _get_client():
+        """
+        Gets the volatile client. The client is only created on first use
+        :return: volatile client
+        """
+        if CacheHelper._client is None:
+            CacheHelper._client = VolatileFactory.get_client()
+        return CacheHelper._client
+
     @staticmethod
     def add(item, key=None, expire_time=0):
         """
@@ -36,7 +46,7 @@ class CacheHelper(object):
         _key = CacheHelper._generate_key(key=key)
         timestamp = int(time.time())
         value = {'item': item, 'time_added': timestamp, 'time_updated': timestamp}
-        return CacheHelper.client.add(key=_key, value=value, time=expire_time)
+        return CacheHelper._get_client().add(key=_key, value=value, time=expire_time)
 
     @staticmethod
     def set(item, key=None, expire_time=0):
@@ -50,8 +60,10 @@ class CacheHelper(object):
         _key = CacheHelper._generate_key(key=key)
         timestamp = int(time.time())
         value = {'item': item, 'time_added': timestamp, 'time_updated': timestamp}
-        CacheHelper.client.set(key=_key, value=value, time=expire_time)
-        return CacheHelper.get(key=key) == item
+        CacheHelper._get_client().set(key=_key, value=value, time=expire_time)
+        # The volatile store silently drops items it cannot keep (eg. larger than its item size limit)
+        stored_value = CacheHelper.get(key=key, raw=True)
+        return stored_value is not None and stored_value['item'] == item
 
     @staticmethod
     def update(item, key, expire_time=0):
@@ -66,8 +78,10 @@ class CacheHelper(object):
         retrieved_value = CacheHelper.get(key=key, raw=True)
         timestamp = int(time.time())
         value = {'item': item, 'time_added': retrieved_value['time_added'], 'time_updated': timestamp}
-        CacheHelper.client.set(key=_key, value=value, time=expire_time)
-        return CacheHelper.get(key=key) == item
+        CacheHelper._get_client().set(key=_key, value=value, time=expire_time)
+        # The volatile store silently drops items it cannot keep (eg. larger than its item size limit)
+        stored_value = CacheHelper.get(key=key, raw=True)
+        return stored_value is not None and stored_value['item'] == item
 
     @staticmethod
     def append(item, key=None, expire_time=0):
@@ -102,11 +116,11 @@ class CacheHelper(object):
         _key = CacheHelper._generate_key(key=key)
         if exists_hours is None:
             if raw:
-                return CacheHelper.client.get(_key)
+                return CacheHelper._get_client().get(_key)
             else:
-                return CacheHelper.client.get(_key)['item']
+                return CacheHelper._get_client().get(_key)['item']
         else:
-            value = CacheHelper.client.get(_key)
+            value = CacheHelper._get_client().get(_key)
             return time.time() < (value['time_added'] + datetime.timedelta(hours=int(exists_hours)).total_seconds())
 
     @staticmethod
@@ -117,7 +131,7 @@ class CacheHelper(object):
         :return: True if successful, False if not
         """
         _key = CacheHelper._generate_key(key=key)
-        CacheHelper.client.delete(_key)
+        CacheHelper._get_client().delete(_key)
 
     @staticmethod
     def _generate_key(key=None):
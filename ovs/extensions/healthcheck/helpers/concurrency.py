@@ -0,0 +1,177 @@
+# Copyright (C) 2017 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Concurrency helper module
+"""
+import sys
+import time
+import threading
+from multiprocessing.pool import ThreadPool
+from ovs.extensions.healthcheck.metrics import CheckMetrics
+
+
+class ConcurrencyHelper(object):
+    """
+    Executes work of a check in a bounded pool of threads
+    The external calls of the threads are attributed to the check which started them (see CheckMetrics)
+    """
+    TIMED_OUT = object()  # Result of a call which did not finish before the deadline (see map_with_deadline)
+    STILL_RUNNING = object()  # Result of an item of which the call of a previous map_with_deadline did not finish yet
+
+    # Keys of the calls of map_with_deadline which did not finish yet, by all threads
+    _running_keys = set()
+    _running_keys_lock = threading.Lock()
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def map(func, items, processes):
+        """
+        Calls func for every item, at most `processes` calls at the same time
+        :param func: function to call with a single item
+        :type func: callable
+        :param items: items to process
+        :type items: list
+        :param processes: maximum amount of concurrent calls
+        :type processes: int
+        :return: the results of func, in the order of the items
+        :rtype: list
+        """
+        if len(items) == 0:
+            return []
+        metrics = CheckMetrics.get_current()
+
+        def _call(item):
+            previous = metrics.activate() if metrics is not None else None
+            try:
+                return func(item)
+            finally:
+                if metrics is not None:
+                    CheckMetrics.restore(previous)
+
+        pool = ThreadPool(processes=max(1, min(processes, len(items))))
+        try:
+            async_result = pool.map_async(_call, items, chunksize=1)
+            while not async_result.ready():
+                async_result.wait(1)  # Waiting with a timeout keeps the calling thread responsive to a KeyboardInterrupt
+            results = async_result.get()
+        except KeyboardInterrupt:
+            pool.terminate()
+            raise
+        pool.close()
+        pool.join()
+        return results
+
+    @staticmethod
+    def map_with_deadline(func, items, timeout, key=None):
+        """
+        Calls func for every item, all at the same time, and waits at most `timeout` seconds for the calls to finish
+        Meant for a few slow calls (eg. one per backend) of which one hanging should not delay the others
+        Calls that did not finish in time are not interrupted: they continue in a daemon thread and their result is discarded
+        With a key, an item is not called again while its previous call is still running: calls which hang do not pile up
+        :param func: function to call with a single item
+        :type func: callable
+        :param items: items to process
+        :type items: list
+        :param timeout: seconds to wait for the calls to finish
+        :type timeout: float
+        :param key: function returning the key of an item, unique within the process (eg. the check and the backend guid)
+        :type key: callable
+        :return: the results of func, in the order of the items. TIMED_OUT for the calls which did not finish in time,
+                 STILL_RUNNING for the items which were not called as their previous call did not finish yet
+        :rtype: list
+        """
+        metrics = CheckMetrics.get_current()
+        results = [ConcurrencyHelper.TIMED_OUT] * len(items)
+        exc_infos = []
+
+        def _call(index, item, item_key):
+            previous = metrics.activate() if metrics is not None else None
+            try:
+                results[index] = func(item)
+            except Exception:
+                exc_infos.append(sys.exc_info())
+            finally:
+                if metrics is not None:
+                    CheckMetrics.restore(previous)
+                if item_key is not None:
+                    with ConcurrencyHelper._running_keys_lock:
+                        ConcurrencyHelper._running_keys.discard(item_key)
+
+        threads = []
+        for index, item in enumerate(items):
+            item_key = key(item) if key is not None else None
+            if item_key is not None:
+                with ConcurrencyHelper._running_keys_lock:
+                    if item_key in ConcurrencyHelper._running_keys:
+                        results[index] = ConcurrencyHelper.STILL_RUNNING
+                        continue
+                    ConcurrencyHelper._running_keys.add(item_key)
+            thread = threading.Thread(target=_call, args=(index, item, item_key), name='healthcheck-deadline-{0}'.format(index))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        deadline = time.time() + timeout
+        for thread in threads:
+            while thread.is_alive() and time.time() < deadline:
+                thread.join(min(1, max(0, deadline - time.time())))  # Joining with a timeout keeps the calling thread responsive to a KeyboardInterrupt
+        # Copies, the calls which did not finish in time might still store their outcome
+        results = list(results)
+        exc_infos = list(exc_infos)
+        if len(exc_infos) > 0:
+            exc_info = exc_infos[0]
+            raise exc_info[0], exc_info[1], exc_info[2]
+        return results
+
+    @staticmethod
+    def interleave(items, key):
+        """
+        Reorders items round-robin over their groups: the first item of every group, then the second item of every group, ...
+        Items are handed to the threads of map in order. Interleaving keeps the threads from all waiting on the semaphore of the same group
+        :param items: items to reorder
+        :type items: list
+        :param key: function returning the group of an item (eg. its node)
+        :type key: callable
+        :return: the indexes of the items, in the interleaved order
+        :rtype: list[int]
+        """
+        groups = []
+        group_by_key = {}
+        for index, item in enumerate(items):
+            item_key = key(item)
+            if item_key not in group_by_key:
+                group_by_key[item_key] = []
+                groups.append(group_by_key[item_key])
+            group_by_key[item_key].append(index)
+        order = []
+        for position in xrange(max(len(group) for group in groups) if len(groups) > 0 else 0):
+            order.extend(group[position] for group in groups if position < len(group))
+        return order
+
+    @staticmethod
+    def get_semaphores(keys, value):
+        """
+        Creates a semaphore for every key. Used to bound the concurrency per group of items (eg. per node)
+        :param keys: keys to create a semaphore for
+        :type keys: iterable
+        :param value: maximum amount of holders of every semaphore
+        :type value: int
+        :return: semaphore by key
+        :rtype: dict
+        """
+        return dict((key, threading.BoundedSemaphore(max(1, value))) for key in set(keys))
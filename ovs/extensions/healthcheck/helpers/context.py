@@ -0,0 +1,128 @@
+# Copyright (C) 2017 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Node context module
+"""
+import json
+import threading
+from ovs.extensions.generic.configuration import Configuration
+from ovs.extensions.generic.system import System
+
+
+class NodeContext(object):
+    """
+    Information about the node the healthcheck is running on
+    Nothing is resolved when the context is created. Every item is resolved once, on first use, and kept for the rest of the run
+    """
+    SETTINGS_LOC = "/opt/OpenvStorage/config/healthcheck/settings.json"
+    MESSAGEQUEUE_KEY = '/ovs/framework/messagequeue'
+
+    _current = None
+    _current_lock = threading.Lock()
+
+    def __init__(self):
+        """
+        Initialize an empty context
+        """
+        # Resolved items, by name
+        self._resolved = {}
+        # Checks can resolve items concurrently (see HealthCheckCLIRunner --jobs)
+        self._lock = threading.RLock()
+
+    @classmethod
+    def get_current(cls):
+        """
+        Gets the context of the current run. Creates one if no run has been started yet
+        :return: the context of the current run
+        :rtype: NodeContext
+        """
+        with cls._current_lock:
+            if cls._current is None:
+                cls._current = cls()
+            return cls._current
+
+    @classmethod
+    def new_run(cls):
+        """
+        Starts a new context for a new healthcheck run. Everything resolved by the previous context is resolved again on first use
+        :return: the context of the new run
+        :rtype: NodeContext
+        """
+        with cls._current_lock:
+            cls._current = cls()
+            return cls._current
+
+    def _resolve(self, name, resolver):
+        """
+        Resolves an item once
+        :param name: name of the item
+        :type name: str
+        :param resolver: function returning the value of the item
+        :type resolver: callable
+        :return: value of the item
+        """
+        with self._lock:
+            if name not in self._resolved:
+                self._resolved[name] = resolver()
+            return self._resolved[name]
+
+    @property
+    def storagerouter(self):
+        """
+        The storagerouter of this node
+        :rtype: ovs.dal.hybrids.storagerouter.StorageRouter
+        """
+        return self._resolve('storagerouter', System.get_my_storagerouter)
+
+    @property
+    def machine_id(self):
+        """
+        The machine id of this node
+        :rtype: str
+        """
+        return self._resolve('machine_id', System.get_my_machine_id)
+
+    @property
+    def settings(self):
+        """
+        The healthcheck settings (settings.json)
+        :rtype: dict
+        """
+        def _load_settings():
+            with open(NodeContext.SETTINGS_LOC) as settings_file:
+                return json.load(settings_file)['healthcheck']
+        return self._resolve('settings', _load_settings)
+
+    @property
+    def init_manager(self):
+        """
+        Name of the init manager of this node (eg. systemd or init)
+        :rtype: str
+        """
+        def _load_init_manager():
+            with open('/proc/1/comm') as comm_file:
+                return comm_file.read().strip()
+        return self._resolve('init_manager', _load_init_manager)
+
+    @property
+    def messagequeue(self):
+        """
+        The messagequeue configuration of the cluster (user, password, endpoints, metadata, ...)
+        Fetched with a single configuration call
+        :rtype: dict
+        """
+        return self._resolve('messagequeue', lambda: Configuration.get(NodeContext.MESSAGEQUEUE_KEY))
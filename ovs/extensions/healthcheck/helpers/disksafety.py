@@ -0,0 +1,251 @@
+# Copyright (C) 2017 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+
+"""
+Disk safety helper module
+"""
+import math
+import time
+import heapq
+from ovs.extensions.healthcheck.helpers.cache import CacheHelper
+
+
+class DiskSafetyAggregator(object):
+    """
+    Summarizes the disk safety of the namespaces of a backend (see 'alba get-disk-safety')
+    Only the amount of namespaces per policy and remaining safety and the least safe namespaces are kept,
+    the size of the summary does not depend on the amount of namespaces
+    """
+    DEFAULT_TOP_SIZE = 10
+
+    def __init__(self, top_size=DEFAULT_TOP_SIZE, timeline=None):
+        """
+        Initialize the aggregator
+        :param top_size: amount of namespaces to keep per policy and remaining safety
+        :type top_size: int
+        :param timeline: registers since when the namespaces are at their remaining safety. Optional
+        :type timeline: DiskSafetyTimeline
+        """
+        self.top_size = top_size
+        self.timeline = timeline
+        self.namespace_count = 0
+        # Max. disk safety by policy (eg. '1,2')
+        self._max_disk_safeties = {}
+        # Amount of namespaces by (k, m, remaining safety). Keyed on the values of the buckets, so counting does not format a policy key per bucket
+        self._counts = {}
+        # Min-heap of (amount_in_bucket, namespace, since) by policy and remaining safety
+        self._tops = {}
+        # Since when the first namespace is at the remaining safety, by policy and remaining safety
+        self._since = {}
+
+    @staticmethod
+    def get_policy_key(policy):
+        """
+        Gets the key of a policy
+        :param policy: the policy or the bucket of a namespace (k, m, ...)
+        :type policy: list
+        :return: the key, eg: '1,2'
+        :rtype: str
+        """
+        return '{0},{1}'.format(policy[0], policy[1])
+
+    def add_policy(self, policy):
+        """
+        Registers a policy of a preset in use. Policies without namespaces are listed without disk safety
+        :param policy: the policy (k, m, c, x)
+        :type policy: list
+        :return: None
+        :rtype: NoneType
+        """
+        self._max_disk_safeties[self.get_policy_key(policy)] = policy[1]
+
+    def add_namespace(self, namespace, bucket_safety):
+        """
+        Adds the disk safety of a namespace
+        :param namespace: name of the namespace
+        :type namespace: str
+        :param bucket_safety: the buckets of the namespace, as listed by 'alba get-disk-safety'
+        :type bucket_safety: list[dict]
+        :return: None
+        :rtype: NoneType
+        """
+        self.namespace_count += 1
+        counts = self._counts
+        unsafe_buckets = None
+        for bucket in bucket_safety:
+            # The max. disk safety of the policy of a bucket is its m
+            k_m = bucket['bucket']
+            remaining_safety = bucket['remaining_safety']
+            key = (k_m[0], k_m[1], remaining_safety)
+            counts[key] = counts.get(key, 0) + 1
+            if remaining_safety < k_m[1]:
+                if unsafe_buckets is None:
+                    unsafe_buckets = []
+                unsafe_buckets.append((self.get_policy_key(k_m), remaining_safety, bucket['count']))
+        if unsafe_buckets is None:
+            return  # Safe namespaces are only counted
+        since_by_safety = {}
+        if self.timeline is not None:
+            since_by_safety = self.timeline.update(namespace, set(remaining_safety for _, remaining_safety, _ in unsafe_buckets))
+        total_count = float(sum(bucket['count'] for bucket in bucket_safety))
+        for policy_key, remaining_safety, count in unsafe_buckets:
+            amount_in_bucket = count / total_count * 100 if total_count > 0 else 0.0
+            since = since_by_safety.get(remaining_safety)
+            key = (policy_key, remaining_safety)
+            if since is not None:
+                self._since[key] = min(since, self._since.get(key, since))
+            top = self._tops.setdefault(key, [])
+            if len(top) < self.top_size:
+                heapq.heappush(top, (amount_in_bucket, namespace, since))
+            elif amount_in_bucket > top[0][0]:
+                heapq.heapreplace(top, (amount_in_bucket, namespace, since))
+
+    def get_overview(self):
+        """
+        Gets the summary
+        - namespace_count is the amount of namespaces with (a part of) their objects at the remaining safety
+        - namespaces lists the namespaces with the largest part of their objects at the remaining safety, largest first.
+          Not listed for the max. disk safety
+        - amount_in_bucket is in %
+        - since is the timestamp at which the namespace (or the first of the namespaces) reached the remaining safety.
+          None without (intact) timeline and for the max. disk safety
+        Output example: {'1,2': {'max_disk_safety': 2, 'current_disk_safety':
+        {2: {'namespace_count': 1020, 'namespaces': [], 'since': None},
+         1: {'namespace_count': 2, 'since': 1500000000, 'namespaces': [{'namespace': 'e88c88c9-632c-4975-b39f-e9993e352560', 'amount_in_bucket': 12.5, 'since': 1500000000}, ...]}}}}
+        :return: the disk safety by policy
+        :rtype: dict
+        """
+        # Without a complete timeline, the timestamps cannot be trusted
+        timeline_intact = self.timeline is None or self.timeline.intact
+        counts_by_policy = dict((policy_key, {}) for policy_key in self._max_disk_safeties)
+        for (k, m, remaining_safety), namespace_count in self._counts.iteritems():
+            counts_by_policy.setdefault(self.get_policy_key((k, m)), {})[remaining_safety] = namespace_count
+        overview = {}
+        for policy_key, counts in counts_by_policy.iteritems():
+            current_disk_safety = {}
+            for remaining_safety, namespace_count in counts.iteritems():
+                top = sorted(self._tops.get((policy_key, remaining_safety), []), reverse=True)
+                current_disk_safety[remaining_safety] = {'namespace_count': namespace_count,
+                                                         'since': self._since.get((policy_key, remaining_safety)) if timeline_intact else None,
+                                                         'namespaces': [{'namespace': namespace, 'amount_in_bucket': round(amount_in_bucket, 5), 'since': since if timeline_intact else None}
+                                                                        for amount_in_bucket, namespace, since in top]}
+            overview[policy_key] = {'max_disk_safety': self._max_disk_safeties.get(policy_key, int(policy_key.split(',')[1])),
+                                    'current_disk_safety': current_disk_safety}
+        return overview
+
+
+class DiskSafetyTimeline(object):
+    """
+    Keeps track of since when the namespaces of a backend are at a remaining safety below their max. disk safety
+    The state is kept in the volatile store, so it is shared by all nodes executing the disk safety check.
+    Only the namespaces which are not safe are kept: {namespace: {remaining safety: timestamp}}
+    The state is spread over shards of at most (about) SHARD_SIZE namespaces, so every item stays below the item size limit of the volatile store.
+    The index key holds the amount of shards, a namespace is kept in the shard matching the hash of its name
+    """
+    CACHE_KEY = 'disk-safety-timeline-{0}'
+    SHARD_KEY = 'disk-safety-timeline-{0}-{1}'
+    SHARD_SIZE = 2000
+    EXPIRE_TIME = 7 * 24 * 60 * 60  # Seconds the state is kept when the backend is no longer checked
+
+    def __init__(self, backend_identifier, now=None):
+        """
+        Initialize the timeline with the state of the previous run
+        :param backend_identifier: identifies the backend (eg. its guid)
+        :type backend_identifier: str
+        :param now: timestamp of the current run. Defaults to the current time
+        :type now: float
+        """
+        self.backend_identifier = backend_identifier
+        self.key = self.CACHE_KEY.format(backend_identifier)
+        self.now = int(time.time() if now is None else now)
+        # False when the state of the previous run was lost (partially) or the state of the current run could not be stored
+        self.intact = True
+        self._previous_shards = []
+        self._time_updated = None
+        value = CacheHelper.get(key=self.key, raw=True)
+        if value is not None:
+            self._time_updated = value['time_updated']
+            for shard_index in xrange(value['item']):
+                shard = CacheHelper.get(key=self._get_shard_key(shard_index), raw=True)
+                if shard is None:
+                    self.intact = False  # Evicted or expired
+                    shard = {'item': {}, 'time_updated': None}
+                self._previous_shards.append(shard['item'])
+                if shard['time_updated'] is None or shard['time_updated'] < self._time_updated:
+                    self._time_updated = shard['time_updated']
+        self._previous_state = {}
+        for shard in self._previous_shards:
+            self._previous_state.update(shard)
+        self._state = {}
+
+    def _get_shard_key(self, shard_index):
+        """
+        Gets the key of a shard
+        :param shard_index: index of the shard
+        :type shard_index: int
+        :return: the key of the shard
+        :rtype: str
+        """
+        return self.SHARD_KEY.format(self.backend_identifier, shard_index)
+
+    def update(self, namespace, remaining_safeties):
+        """
+        Registers the remaining safeties of a namespace which is not safe in the current run
+        A remaining safety which was already registered in the previous run keeps its timestamp
+        :param namespace: name of the namespace
+        :type namespace: str
+        :param remaining_safeties: the remaining safeties below the max. disk safety of the buckets of the namespace
+        :type remaining_safeties: set
+        :return: timestamp at which the namespace reached every remaining safety, by remaining safety
+        :rtype: dict
+        """
+        previous = self._previous_state.get(namespace)
+        if previous is not None and set(previous) == remaining_safeties:
+            since_by_safety = previous  # Unchanged
+        else:
+            previous = previous or {}
+            since_by_safety = dict((remaining_safety, previous.get(remaining_safety, self.now)) for remaining_safety in remaining_safeties)
+        self._state[namespace] = since_by_safety
+        return since_by_safety
+
+    def save(self):
+        """
+        Stores the state of the current run. Namespaces which were not registered in the current run are safe again (or removed) and are dropped
+        Only the shards which changed are written, unless the state would otherwise expire
+        :return: True when the state was stored, False when the volatile store did not keep (a part of) it
+        :rtype: bool
+        """
+        shard_count = int(math.ceil(len(self._state) / float(self.SHARD_SIZE)))
+        shards = [{} for _ in xrange(shard_count)]
+        for namespace, since_by_safety in self._state.iteritems():
+            shards[hash(namespace) % shard_count][namespace] = since_by_safety
+        expiring = self._time_updated is None or self.now - self._time_updated > self.EXPIRE_TIME / 2
+        stored = True
+        for shard_index, shard in enumerate(shards):
+            if expiring is False and shard_count == len(self._previous_shards) and shard == self._previous_shards[shard_index]:
+                continue
+            stored &= CacheHelper.set(key=self._get_shard_key(shard_index), item=shard, expire_time=self.EXPIRE_TIME)
+        if shard_count != len(self._previous_shards) or (expiring is True and shard_count > 0):
+            stored &= CacheHelper.set(key=self.key, item=shard_count, expire_time=self.EXPIRE_TIME)
+            for shard_index in xrange(shard_count, len(self._previous_shards)):
+                CacheHelper.delete(key=self._get_shard_key(shard_index))
+            self._time_updated = self.now
+        self.intact = self.intact and stored
+        self._previous_shards = shards
+        self._previous_state = self._state
+        self._state = {}
+        return stored
@@ -19,13 +19,11 @@
 """
 Helper module
 """
-import json
 import platform
 import socket
-import subprocess
-from ovs.extensions.generic.system import System
 from ovs.extensions.generic.sshclient import SSHClient
 from ovs.extensions.generic.configuration import Configuration
+from ovs.extensions.healthcheck.helpers.context import NodeContext
 from ovs.extensions.packages.packagefactory import PackageFactory
 
 
@@ -34,22 +32,6 @@ class Helper(object):
     Helper module
     """
     MODULE = "utils"
-    SETTINGS_LOC = "/opt/OpenvStorage/config/healthcheck/settings.json"
-    RAW_INIT_MANAGER = str(subprocess.check_output('cat /proc/1/comm', shell=True)).strip()
-    LOCAL_SR = System.get_my_storagerouter()
-    LOCAL_ID = System.get_my_machine_id()
-
-    with open(SETTINGS_LOC) as settings_file:
-        settings = json.load(settings_file)
-
-    debug_mode = settings["healthcheck"]["debug_mode"]
-    enable_logging = settings["healthcheck"]["logging"]["enable"]
-    max_log_size = settings["healthcheck"]["max_check_log_size"]
-    packages = settings["healthcheck"]["package_list"]
-    extra_ports = settings["healthcheck"]["extra_ports"]
-    rights_dirs = settings["healthcheck"]["rights_dirs"]
-    owners_files = settings["healthcheck"]["owners_files"]
-    max_hours_zero_disk_safety = settings["healthcheck"]["max_hours_zero_disk_safety"]
 
     @staticmethod
     def get_healthcheck_version():
@@ -58,7 +40,7 @@ class Helper(object):
         :return: version number of the installed healthcheck
         :rtype: str
         """
-        client = SSHClient(System.get_my_storagerouter())
+        client = SSHClient(NodeContext.get_current().storagerouter)
         package_name = 'openvstorage-health-check'
         package_manager = PackageFactory.get_manager()
         packages = package_manager.get_installed_versions(client=client, package_names=[package_name])
@@ -71,10 +53,11 @@ class Helper(object):
         :return: local settings of the node
         :rtype: dict
         """
+        context = NodeContext.get_current()
         # Fetch all details
         local_settings = {'cluster_id': Configuration.get("/ovs/framework/cluster_id"),
                           'hostname': socket.gethostname(),
-                          'storagerouter_id': Helper.LOCAL_ID,
-                          'storagerouter_type': Helper.LOCAL_SR.node_type,
+                          'storagerouter_id': context.machine_id,
+                          'storagerouter_type': context.storagerouter.node_type,
                           'environment os': ' '.join(platform.linux_distribution())}
         return local_settings
@@ -0,0 +1,109 @@
+# Copyright (C) 2016 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+from ovs_extensions.generic.filemutex import file_mutex
+from ovs_extensions.generic.filemutex import NoLockAvailableException as NoFileLockAvailableException
+from ovs.extensions.generic.volatilemutex import volatile_mutex
+from ovs_extensions.generic.volatilemutex import NoLockAvailableException as NoVolatileLockAvailableException
+from ovs.extensions.healthcheck.helpers.cache import CacheHelper
+from ovs.extensions.healthcheck.helpers.poller import Poller
+
+
+class SingleExecution(object):
+    """
+    Leader/follower primitive on top of the file mutex (local) and the volatile mutex (cluster)
+    The process acquiring the mutex is the executor and publishes information about itself
+    The other processes follow: they wait for that information with a backing off poll instead of executing themselves
+    """
+    LOCK_TYPES = ['local', 'cluster']
+    EXECUTOR_INFO_TTL = 60  # The volatile mutex expires after 60 seconds
+    EXECUTOR_INFO_TIMEOUT = 5  # Seconds a follower waits for the information of the executor
+
+    def __init__(self, key, lock_type='local'):
+        """
+        Initialize a single execution
+        :param key: key of the mutex and of the information about the executor
+        :type key: str
+        :param lock_type: local (one execution per node) or cluster (one execution per cluster)
+        :type lock_type: str
+        """
+        if lock_type == 'local':
+            self._mutex = file_mutex(key)
+        elif lock_type == 'cluster':
+            self._mutex = volatile_mutex(key)
+        else:
+            raise ValueError('Lock type {0} is not supported!'.format(lock_type))
+        self.key = key
+        self.is_executor = False
+
+    def try_acquire(self, wait=0.005):
+        """
+        Tries to become the executor
+        :param wait: seconds to wait for the mutex
+        :type wait: float
+        :return: True when this process is the executor, False when it is a follower
+        :rtype: bool
+        """
+        try:
+            self._mutex.acquire(wait=wait)
+            self.is_executor = True
+        except (NoFileLockAvailableException, NoVolatileLockAvailableException):
+            self.is_executor = False
+        return self.is_executor
+
+    def publish_executor_info(self, executor_info):
+        """
+        Publishes the information about the executor for the followers
+        :param executor_info: information about the executor
+        :type executor_info: dict
+        :return: None
+        :rtype: NoneType
+        """
+        CacheHelper.set(key=self.key, item=executor_info, expire_time=self.EXECUTOR_INFO_TTL)
+
+    def wait_for_executor_info(self, timeout=EXECUTOR_INFO_TIMEOUT):
+        """
+        Waits for the executor to publish its information
+        The executor publishes after acquiring the mutex so a follower can be slightly early
+        :param timeout: seconds to wait
+        :type timeout: float
+        :return: information about the executor
+        :rtype: dict
+        """
+        executor_info = Poller(timeout).poll(self._get_executor_info)
+        if executor_info is None:
+            raise ValueError('Timed out after {0} seconds while fetching the information about the executor.'.format(timeout))
+        return executor_info
+
+    def _get_executor_info(self):
+        """
+        Gets the published information about the executor
+        :return: the information or None when nothing has been published yet
+        :rtype: dict
+        """
+        try:
+            return CacheHelper.get(key=self.key)
+        except Exception:
+            return None
+
+    def release(self):
+        """
+        Releases the mutex when this process is the executor
+        :return: None
+        :rtype: NoneType
+        """
+        if self.is_executor is True:
+            self._mutex.release()
+            self.is_executor = False
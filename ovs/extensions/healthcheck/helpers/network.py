@@ -16,6 +16,7 @@
 import shlex
 import socket
 import subprocess
+from ovs.extensions.healthcheck.metrics import CheckMetrics
 
 
 class NetworkHelper(object):
@@ -32,6 +33,7 @@ class NetworkHelper(object):
         :rtype: bool
         """
         # check if port is open
+        CheckMetrics.count_call(CheckMetrics.SOCKETS)
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         result = sock.connect_ex((ip, int(port_number)))
         if result == 0:
@@ -86,6 +88,7 @@ class NetworkHelper(object):
         :return: True if the DNS resolving works; False it doesn't work
         :rtype: bool
         """
+        CheckMetrics.count_call(CheckMetrics.SOCKETS)
         try:
             socket.gethostbyname(fqdn)
             return True
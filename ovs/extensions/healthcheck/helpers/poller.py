@@ -0,0 +1,73 @@
+# Copyright (C) 2016 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+import time
+import random
+
+
+class Poller(object):
+    """
+    Calls a function until it returns a result, sleeping between the calls
+    The sleep starts at the given interval and is multiplied by the backoff after every call, up to the maximum interval
+    With jitter, every sleep is shortened by a random fraction so concurrent pollers do not call at the same moments
+    Polling stops when the deadline is reached
+    """
+    def __init__(self, timeout, interval=0.05, max_interval=2.0, backoff=2.0, jitter=0.0):
+        """
+        Initialize a poller
+        :param timeout: seconds after which polling stops
+        :type timeout: float
+        :param interval: seconds to sleep after the first call
+        :type interval: float
+        :param max_interval: maximum seconds to sleep between two calls
+        :type max_interval: float
+        :param backoff: factor the sleep is multiplied with after every call
+        :type backoff: float
+        :param jitter: maximum fraction (0 - 1) a sleep is randomly shortened with
+        :type jitter: float
+        """
+        self.timeout = timeout
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        # Statistics of the last poll
+        self.elapsed = 0
+        self.attempts = 0
+
+    def poll(self, func, *args, **kwargs):
+        """
+        Calls the function until it returns something other than None
+        :param func: function to call. Receives all other arguments
+        :type func: callable
+        :return: the first result which is not None. None when the deadline was reached
+        """
+        start = time.time()
+        deadline = start + self.timeout
+        interval = self.interval
+        self.attempts = 0
+        try:
+            while True:
+                self.attempts += 1
+                result = func(*args, **kwargs)
+                if result is not None:
+                    return result
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                time.sleep(min(interval * (1 - random.uniform(0, self.jitter)), remaining))
+                interval = min(interval * self.backoff, self.max_interval)
+        finally:
+            self.elapsed = time.time() - start
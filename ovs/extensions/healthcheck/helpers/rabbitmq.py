@@ -21,17 +21,15 @@ import requests
 from requests import ConnectionError
 from StringIO import StringIO
 from ovs.dal.lists.storagerouterlist import StorageRouterList
-from ovs.extensions.generic.configuration import Configuration
 from ovs.extensions.generic.sshclient import SSHClient
+from ovs.extensions.healthcheck.helpers.context import NodeContext
+from ovs.extensions.healthcheck.metrics import CheckMetrics
 from ovs.extensions.services.servicefactory import ServiceFactory
 
 
 class RabbitMQ(object):
 
     NAME = 'rabbitmq-server'
-    USER = Configuration.get('/ovs/framework/messagequeue|user')
-    PASSWORD = Configuration.get('/ovs/framework/messagequeue|password')
-    INTERNAL = Configuration.get('/ovs/framework/messagequeue|metadata.internal')
 
     def __init__(self, ip):
         """
@@ -44,8 +42,13 @@ class RabbitMQ(object):
         if not RabbitMQ._check_rabbitmq_ip(ip):
             raise ValueError('RabbitMQ on {0} could not be found.'.format(ip))
 
+        messagequeue_config = NodeContext.get_current().messagequeue
+        self._user = messagequeue_config['user']
+        self._password = messagequeue_config['password']
+        self._internal = messagequeue_config['metadata']['internal']
+
         self.ip = ip
-        if RabbitMQ.INTERNAL:
+        if self._internal:
             self._storagerouter = StorageRouterList.get_by_ip(ip)
             self._client = SSHClient(ip, username='root')
 
@@ -126,7 +129,7 @@ class RabbitMQ(object):
         :rtype: tuple
         """
         api_output = self.api_request('/api/overview')
-        if api_output[0] == 404 and RabbitMQ.INTERNAL:
+        if api_output[0] == 404 and self._internal:
             status = self._service_manager.get_service_status('rabbitmq-server', self._client)[0]
             if not self.check_management_plugin():
                 if status:
@@ -136,7 +139,7 @@ class RabbitMQ(object):
                 if status:
                     return 'RUNNING', 'RabbitMQ is running. Restart RabbitMQ to enable the management plugin.'
                 return 'STOP', api_output[1]
-        elif api_output[0] == 404 and not RabbitMQ.INTERNAL:
+        elif api_output[0] == 404 and not self._internal:
             return 'STOP', 'RabbitMQ is not running or the management plugin is not installed.'
 
         return "RUNNING", json.loads(api_output[1].text)
@@ -148,7 +151,7 @@ class RabbitMQ(object):
         :return: True/False
         :rtype: bool
         """
-        if not RabbitMQ.INTERNAL:
+        if not self._internal:
             return 'UNKNOWN', "Unable to check the management plugin, this is not an internal RabbitMQ from ovs."
         output = self._client.run(['rabbitmq-plugins', 'list', '-E'])
         plugins = output.split('\n')
@@ -168,9 +171,10 @@ class RabbitMQ(object):
         :return: tuple with exit code and Response object
         :rtype: tuple
         """
+        CheckMetrics.count_call(CheckMetrics.SOCKETS)
         try:
             r = requests.get('http://{0}:15672{1}'.format(self.ip, path),
-                             auth=(RabbitMQ.USER, RabbitMQ.PASSWORD))
+                             auth=(self._user, self._password))
             return r.status_code, r
         except ConnectionError as ex:
             return 404, ex.message
@@ -185,7 +189,7 @@ class RabbitMQ(object):
         :return: True/False
         :rtype: bool
         """
-        endpoints = Configuration.get('/ovs/framework/messagequeue|endpoints')
+        endpoints = NodeContext.get_current().messagequeue['endpoints']
 
         if any(endpoint for endpoint in endpoints if ip in endpoint):
             return True
@@ -198,7 +202,7 @@ class RabbitMQ(object):
         :return: tuple with exit code and information
         :rtype: tuple
         """
-        if not RabbitMQ.INTERNAL:
+        if not self._internal:
             return 'UNKNOWN', "Unable to enable the management plugin, this is not an internal RabbitMQ from ovs."
         management_enabled = self.check_management_plugin()
 
@@ -223,7 +227,7 @@ class RabbitMQ(object):
         status = self.status()
         if status[0] != 'STOP':
             return status[0], "RabbitMQ already running."
-        if not RabbitMQ.INTERNAL:
+        if not self._internal:
             return 'UNKNOWN', "Unable to start, this is not an internal RabbitMQ from ovs."
         self._service_manager.start_service('rabbitmq-server', self._client)
         return self.status()
@@ -238,7 +242,7 @@ class RabbitMQ(object):
         status = self.status()
         if status[0] != 'RUNNING':
             return status[0], "RabbitMQ is not running."
-        if not RabbitMQ.INTERNAL:
+        if not self._internal:
             return 'UNKNOWN', "Unable to stop, this is not an internal RabbitMQ from ovs."
         self._service_manager.stop_service('rabbitmq-server', self._client)
         return self.status()
@@ -253,7 +257,7 @@ class RabbitMQ(object):
         status = self.status()
         if status[0] != 'RUNNING':
             print "RabbitMQ is not running. Trying to restart the service."
-        if not RabbitMQ.INTERNAL:
+        if not self._internal:
             return 'UNKNOWN', "Unable to restart, this is not an internal RabbitMQ from ovs."
         self._service_manager.restart_service('rabbitmq-server', self._client)
         return self.status()
@@ -13,19 +13,25 @@
 #
 # Open vStorage is distributed in the hope that it will be useful,
 # but WITHOUT ANY WARRANTY of any kind.
+import time
 from ovs.dal.datalist import DataList
 from ovs.dal.hybrids.service import Service
 from ovs.dal.hybrids.servicetype import ServiceType
 from ovs.dal.lists.servicelist import ServiceList
-from ovs.extensions.generic.system import System
+from ovs.extensions.healthcheck.helpers.context import NodeContext
+from ovs.extensions.healthcheck.metrics import CheckMetrics
+from ovs.extensions.services.servicefactory import ServiceFactory
 
 
 class ServiceHelper(object):
     """
     A service helper class
     """
-
-    LOCAL_SR = System.get_my_storagerouter()
+    SYSTEMD_PROPERTIES = ['Id', 'ActiveState', 'SubState', 'NRestarts', 'ActiveEnterTimestamp']
+    SYSTEMD_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+    FLAPPING_SETTINGS = {'max_restarts': 3,  # amount of restarts from which a service can be flapping
+                         'window': 3600}  # in seconds since the last (re)start
+    FLAPPING_UNKNOWN_MESSAGE = 'Could not verify whether service(s) {0} restart frequently: the restart count is only known under systemd 235 or newer.'
 
     def __init__(self):
         pass
@@ -37,6 +43,7 @@ class ServiceHelper(object):
 
         :return:
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
         return ServiceList.get_services()
 
     @staticmethod
@@ -48,6 +55,7 @@ class ServiceHelper(object):
         :return: Service object
         :rtype: ovs.dal.hybrids.service.service
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
         return Service(service_guid)
 
     @staticmethod
@@ -57,8 +65,9 @@ class ServiceHelper(object):
         :return: list of all services that run on this node
         :rtype: ovs.dal.lists.datalist.DataList
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
         return DataList(Service, {'type': DataList.where_operator.AND,
-                                  'items': [('storagerouter_guid', DataList.operator.EQUALS, ServiceHelper.LOCAL_SR.guid)]})
+                                  'items': [('storagerouter_guid', DataList.operator.EQUALS, NodeContext.get_current().storagerouter.guid)]})
 
     @staticmethod
     def get_local_arakoon_services():
@@ -67,8 +76,9 @@ class ServiceHelper(object):
         :return: list of all arakoon services that run on this node
         :rtype: ovs.dal.lists.datalist.DataList
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
         return DataList(Service, {'type': DataList.where_operator.AND,
-                                  'items': [('storagerouter_guid', DataList.operator.EQUALS, ServiceHelper.LOCAL_SR.guid),
+                                  'items': [('storagerouter_guid', DataList.operator.EQUALS, NodeContext.get_current().storagerouter.guid),
                                             ('type.name', DataList.operator.IN, [ServiceType.SERVICE_TYPES.ARAKOON,
                                                                                  ServiceType.SERVICE_TYPES.ALBA_MGR,
                                                                                  ServiceType.SERVICE_TYPES.NS_MGR])]})
@@ -80,9 +90,10 @@ class ServiceHelper(object):
         :return: list of all arakoon services that run on this node
         :rtype: ovs.dal.lists.datalist.DataList
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
         return DataList(Service, {'type': DataList.where_operator.AND,
                                   'items': [
-                                      ('storagerouter_guid', DataList.operator.EQUALS, ServiceHelper.LOCAL_SR.guid),
+                                      ('storagerouter_guid', DataList.operator.EQUALS, NodeContext.get_current().storagerouter.guid),
                                       ('type.name', DataList.operator.EQUALS, ServiceType.SERVICE_TYPES.ALBA_MGR)
                                   ]})
 
@@ -93,9 +104,10 @@ class ServiceHelper(object):
         :return: list of all alba proxy services that run on this node
         :rtype: ovs.dal.lists.datalist.DataList
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
         return DataList(Service, {'type': DataList.where_operator.AND,
                                   'items': [
-                                      ('storagerouter_guid', DataList.operator.EQUALS, ServiceHelper.LOCAL_SR.guid),
+                                      ('storagerouter_guid', DataList.operator.EQUALS, NodeContext.get_current().storagerouter.guid),
                                       ('type.name', DataList.operator.EQUALS, ServiceType.SERVICE_TYPES.MD_SERVER)
                                   ]})
 
@@ -106,8 +118,95 @@ class ServiceHelper(object):
         :return: list of all alba proxy services that run on this node
         :rtype: ovs.dal.lists.datalist.DataList
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
         return DataList(Service, {'type': DataList.where_operator.AND,
                                   'items': [
-                                      ('storagerouter_guid', DataList.operator.EQUALS, ServiceHelper.LOCAL_SR.guid),
+                                      ('storagerouter_guid', DataList.operator.EQUALS, NodeContext.get_current().storagerouter.guid),
                                       ('type.name', DataList.operator.EQUALS, ServiceType.SERVICE_TYPES.ALBA_PROXY)
                                   ]})
+
+    @staticmethod
+    def get_service_statuses(service_names, client):
+        """
+        Fetches the status of the given services. Under systemd, all services are queried with a single call
+        :param service_names: names of the services
+        :type service_names: list[str]
+        :param client: client on the node running the services
+        :type client: ovs.extensions.generic.sshclient.SSHClient
+        :return: status by service name: {'state': str, 'sub_state': str, 'restarts': int, 'active_since': float}
+        Restarts and active since are None when unknown (eg. init managers other than systemd or older systemd versions)
+        :rtype: dict
+        """
+        if len(service_names) == 0:
+            return {}
+        if NodeContext.get_current().init_manager == 'systemd':
+            units = dict(('{0}.service'.format(service_name), service_name) for service_name in service_names)
+            output = client.run(['systemctl', 'show', '--property={0}'.format(','.join(ServiceHelper.SYSTEMD_PROPERTIES))] + sorted(units))
+            statuses = {}
+            # Every unit is shown as a block of key=value lines, the blocks are separated by an empty line
+            for block in output.strip().split('\n\n'):
+                properties = dict(line.split('=', 1) for line in block.splitlines() if '=' in line)
+                service_name = units.get(properties.get('Id'))
+                if service_name is not None:
+                    statuses[service_name] = ServiceHelper._parse_systemd_properties(properties)
+            if len(statuses) == len(service_names):
+                return statuses
+        # Other init managers or units systemd could not match: query every service separately
+        service_manager = ServiceFactory.get_manager()
+        return dict((service_name, {'state': service_manager.get_service_status(service_name, client),
+                                    'sub_state': None,
+                                    'restarts': None,
+                                    'active_since': None}) for service_name in service_names)
+
+    @staticmethod
+    def _parse_systemd_properties(properties):
+        """
+        Converts the properties shown by systemd into a service status
+        :param properties: the properties of a unit as shown by systemctl show
+        :type properties: dict
+        :return: the status of the service
+        :rtype: dict
+        """
+        restarts = properties.get('NRestarts', '')
+        timestamp = properties.get('ActiveEnterTimestamp', '')
+        active_since = None
+        if timestamp:
+            # Eg. 'Thu 2017-03-02 10:11:12 CET'. The weekday and the timezone are dropped, the node reports its local time
+            try:
+                active_since = time.mktime(time.strptime(' '.join(timestamp.split()[1:3]), ServiceHelper.SYSTEMD_TIMESTAMP_FORMAT))
+            except ValueError:
+                pass
+        return {'state': properties.get('ActiveState'),
+                'sub_state': properties.get('SubState'),
+                'restarts': int(restarts) if restarts.isdigit() else None,
+                'active_since': active_since}
+
+    @staticmethod
+    def get_flapping_settings(settings):
+        """
+        Gets the settings to detect flapping services, the defaults completed with service_flapping of the healthcheck settings
+        :param settings: the healthcheck settings
+        :type settings: dict
+        :return: max_restarts and window (see is_flapping)
+        :rtype: dict
+        """
+        flapping_settings = dict(ServiceHelper.FLAPPING_SETTINGS)
+        flapping_settings.update(settings.get('service_flapping', {}))
+        return flapping_settings
+
+    @staticmethod
+    def is_flapping(status, max_restarts, window):
+        """
+        Verifies whether a service is restarting frequently: it restarted at least max_restarts times and its last (re)start is recent
+        :param status: status of the service as returned by get_service_statuses
+        :type status: dict
+        :param max_restarts: amount of restarts from which a service can be flapping
+        :type max_restarts: int
+        :param window: amount of seconds since the last (re)start in which a service is considered flapping
+        :type window: int
+        :return: True when the service is flapping. None when it can't be verified (eg. init managers other than systemd or systemd before 235)
+        :rtype: bool
+        """
+        if status['restarts'] is None or status['active_since'] is None:
+            return None
+        return status['restarts'] >= max_restarts and time.time() - status['active_since'] < window
@@ -0,0 +1,81 @@
+# Copyright (C) 2017 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Statistics helper module
+"""
+
+
+class StatisticsHelper(object):
+    """
+    Summarizes measurements (eg. latencies) taken by the checks
+    """
+    DEFAULT_PERCENTILES = [50, 90, 99]
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def get_percentile(values, percentile):
+        """
+        Gets a percentile of the values. Interpolates between the two closest values
+        :param values: measured values
+        :type values: list[float]
+        :param percentile: percentile to calculate (0 - 100)
+        :type percentile: float
+        :return: the percentile. None when there are no values
+        :rtype: float
+        """
+        if len(values) == 0:
+            return None
+        ordered = sorted(values)
+        position = (len(ordered) - 1) * percentile / 100.0
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+    @staticmethod
+    def get_percentiles(values, percentiles=None):
+        """
+        Gets multiple percentiles of the values
+        :param values: measured values
+        :type values: list[float]
+        :param percentiles: percentiles to calculate. Defaults to DEFAULT_PERCENTILES
+        :type percentiles: list[float]
+        :return: the percentiles by name, eg: {'p50': 0.01, 'p90': 0.02, 'p99': 0.5}
+        :rtype: dict
+        """
+        if percentiles is None:
+            percentiles = StatisticsHelper.DEFAULT_PERCENTILES
+        return dict(('p{0}'.format(percentile), StatisticsHelper.get_percentile(values, percentile)) for percentile in percentiles)
+
+    @staticmethod
+    def get_outliers(values, factor, minimum=0):
+        """
+        Lists the values which are more than `factor` times the median of all values
+        :param values: measured values by key
+        :type values: dict
+        :param factor: amount of times a value has to exceed the median to be an outlier
+        :type factor: float
+        :param minimum: values below this minimum are never outliers. Avoids flagging differences that do not matter
+        :type minimum: float
+        :return: the outlying values by key
+        :rtype: dict
+        """
+        median = StatisticsHelper.get_percentile(values.values(), 50)
+        if median is None:
+            return {}
+        return dict((key, value) for key, value in values.iteritems() if value > factor * median and value >= minimum)
@@ -14,6 +14,7 @@
 # Open vStorage is distributed in the hope that it will be useful,
 # but WITHOUT ANY WARRANTY of any kind.
 from ovs.dal.lists.storagerouterlist import StorageRouterList
+from ovs.extensions.healthcheck.metrics import CheckMetrics
 
 
 class StoragerouterHelper(object):
@@ -30,5 +31,18 @@ class StoragerouterHelper(object):
         :param machine_id: id of the machine
         :return:
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
 
         return StorageRouterList.get_by_machine_id(machine_id)
+
+    @staticmethod
+    def get_storagerouters():
+        """
+        Fetch all storagerouters of the cluster
+
+        :return: list of storagerouters
+        :rtype: list[ovs.dal.hybrids.storagerouter.StorageRouter]
+        """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
+
+        return StorageRouterList.get_storagerouters()
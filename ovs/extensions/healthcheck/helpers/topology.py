@@ -0,0 +1,105 @@
+# Copyright (C) 2017 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+
+"""
+Backend topology helper module
+"""
+import time
+import threading
+from ovs.extensions.healthcheck.helpers.alba_node import AlbaNodeHelper
+from ovs.extensions.healthcheck.helpers.context import NodeContext
+from ovs.extensions.healthcheck.metrics import CheckMetrics
+
+
+class BackendTopology(object):
+    """
+    Indexed view on the ASDs of the cluster, by backend
+    Built from the model (the alba nodes and their osds) instead of from the stacks of the backends, which query the asd-manager of every node
+    for every backend. The status of the ASDs is fetched from the stack of every node instead: the asd-manager of every node is queried once
+    The view is built once and shared by all checks of the healthcheck run for at most TTL seconds
+    """
+    TTL = 30  # Seconds
+
+    _current = None
+    _context = None
+    _lock = threading.Lock()
+
+    def __init__(self, alba_nodes):
+        """
+        Builds the view
+        :param alba_nodes: the alba nodes of the cluster
+        :type alba_nodes: list[ovs.dal.hybrids.albanode.AlbaNode]
+        """
+        self.built = time.time()
+        self._osds_by_backend = {}
+        for alba_node in alba_nodes:
+            CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
+            osds = alba_node.osds
+            statuses = self._get_osd_statuses(alba_node) if len(osds) > 0 else {}
+            for osd in osds:
+                status = statuses.get(osd.osd_id, {})
+                osd_info = {'asd_id': osd.osd_id,
+                            'node_id': alba_node.node_id,
+                            'ips': list(osd.ips or []),
+                            'port': osd.port,
+                            'claimed_by': osd.alba_backend_guid,
+                            'status': status.get('status'),
+                            'status_detail': status.get('status_detail')}
+                self._osds_by_backend.setdefault(osd.alba_backend_guid, []).append(osd_info)
+
+    @staticmethod
+    def _get_osd_statuses(alba_node):
+        """
+        Fetches the status of the osds of an alba node from its asd-manager
+        :param alba_node: the alba node
+        :type alba_node: ovs.dal.hybrids.albanode.AlbaNode
+        :return: status and status_detail by osd id. Empty when the asd-manager could not be queried, probing the ASDs tells more
+        :rtype: dict
+        """
+        statuses = {}
+        try:
+            for slot_info in alba_node.stack.itervalues():
+                for osd_id, osd_info in slot_info.get('osds', {}).iteritems():
+                    statuses[osd_id] = osd_info
+        except Exception:
+            return {}
+        return statuses
+
+    @classmethod
+    def get(cls):
+        """
+        Gets the view of the current healthcheck run. Built again when it is older than TTL or when a new run started
+        :return: the view
+        :rtype: BackendTopology
+        """
+        with cls._lock:
+            context = NodeContext.get_current()
+            if cls._current is None or cls._context is not context or cls._current.built + cls.TTL < time.time():
+                cls._current = cls(AlbaNodeHelper.get_albanodes())
+                cls._context = context
+            return cls._current
+
+    def get_osds_by_backend(self, alba_backend_guid):
+        """
+        Lists the ASDs claimed by a backend
+        :param alba_backend_guid: guid of the alba backend
+        :type alba_backend_guid: str
+        :return: information about every ASD: asd_id (long id), node_id, ips, port, claimed_by (guid of the alba backend) and
+                 status and status_detail as reported by the asd-manager (None when unknown)
+        :rtype: list[dict]
+        """
+        return list(self._osds_by_backend.get(alba_backend_guid, []))
@@ -18,6 +18,7 @@ from ovs.dal.hybrids.vdisk import VDisk
 from ovs.dal.lists.vdisklist import VDiskList
 from ovs.dal.lists.vpoollist import VPoolList
 from ovs.extensions.healthcheck.helpers.exceptions import VPoolNotFoundError, VDiskNotFoundError
+from ovs.extensions.healthcheck.metrics import CheckMetrics
 
 
 class VDiskHelper(object):
@@ -40,6 +41,7 @@ class VDiskHelper(object):
         :return: a vdisk object
         :rtype: ovs.dal.hybrids.vdisk.VDisk
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
         vpool = VPoolList.get_vpool_by_name(vpool_name)
         if vpool:
             vdisk = VDiskList.get_by_devicename_and_vpool('/{0}'.format(vdisk_name), vpool)
@@ -59,5 +61,6 @@ class VDiskHelper(object):
         :return: a vdisk object
         :rtype: ovs.dal.hybrids.vdisk.VDisk
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
         return VDisk(vdisk_guid)
 
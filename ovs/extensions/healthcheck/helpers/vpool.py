@@ -15,6 +15,7 @@
 # but WITHOUT ANY WARRANTY of any kind.
 
 from ovs.dal.lists.vpoollist import VPoolList
+from ovs.extensions.healthcheck.metrics import CheckMetrics
 
 
 class VPoolHelper(object):
@@ -33,5 +34,6 @@ class VPoolHelper(object):
         :return: vpools
         :rtype: list
         """
+        CheckMetrics.count_call(CheckMetrics.DAL_QUERIES)
 
         return VPoolList.get_vpools()
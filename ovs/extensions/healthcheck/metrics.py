@@ -0,0 +1,161 @@
+# Copyright (C) 2017 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Metrics module for the health check
+"""
+import time
+import resource
+import threading
+
+
+class CheckMetrics(object):
+    """
+    Collects statistics about the execution of a single check: wall time, cpu time and the amount of external calls
+    Usage:
+    with CheckMetrics(test_name) as metrics:
+        execute_check()
+    External calls are registered with CheckMetrics.count_call and attributed to the metrics active in the calling thread
+    """
+    # External call types
+    ALBA_CLI = 'alba_cli'
+    DAL_QUERIES = 'dal_queries'
+    SOCKETS = 'sockets'
+    # Wait types
+    LOCK_WAIT = 'lock'
+    NAMESPACE_CREATION_WAIT = 'namespace_creation'
+    NAMESPACE_DELETION_WAIT = 'namespace_deletion'
+
+    # Linux only. Python 2 does not expose the constant
+    RUSAGE_THREAD = getattr(resource, 'RUSAGE_THREAD', 1)
+
+    _local = threading.local()
+
+    def __init__(self, test_name):
+        """
+        Initialize the metrics for a check
+        :param test_name: name of the check
+        :type test_name: str
+        """
+        self.test_name = test_name
+        self.wall_time = None
+        self.cpu_time = None
+        self.calls = dict((call_type, 0) for call_type in [self.ALBA_CLI, self.DAL_QUERIES, self.SOCKETS])
+        self.wait_times = {self.LOCK_WAIT: 0.0}
+
+        self._lock = threading.Lock()
+        self._start_wall_time = None
+        self._start_cpu_time = None
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = self.activate()
+        self._start_wall_time = time.time()
+        self._start_cpu_time = self._get_thread_cpu_time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.wall_time = time.time() - self._start_wall_time
+        self.cpu_time = self._get_thread_cpu_time() - self._start_cpu_time
+        CheckMetrics.restore(self._previous)
+        return False
+
+    def activate(self):
+        """
+        Makes these metrics the active metrics of the calling thread
+        Worker threads spawned by a check can use this to attribute their external calls to the check
+        :return: the metrics that were active before
+        :rtype: CheckMetrics
+        """
+        previous = CheckMetrics.get_current()
+        CheckMetrics._local.current = self
+        return previous
+
+    @classmethod
+    def restore(cls, previous):
+        """
+        Makes the given metrics the active metrics of the calling thread again (see activate)
+        :param previous: the metrics returned by activate
+        :type previous: CheckMetrics
+        :return: None
+        :rtype: NoneType
+        """
+        cls._local.current = previous
+
+    @classmethod
+    def get_current(cls):
+        """
+        Gets the metrics active in the calling thread
+        :return: the active metrics or None when no check is being measured
+        :rtype: CheckMetrics
+        """
+        return getattr(cls._local, 'current', None)
+
+    @classmethod
+    def count_call(cls, call_type, amount=1):
+        """
+        Registers an external call for the check which is being executed by the calling thread
+        :param call_type: type of the call (eg. CheckMetrics.ALBA_CLI)
+        :type call_type: str
+        :param amount: amount of calls
+        :type amount: int
+        :return: None
+        :rtype: NoneType
+        """
+        current = cls.get_current()
+        if current is None:
+            return
+        with current._lock:
+            current.calls[call_type] = current.calls.get(call_type, 0) + amount
+
+    @classmethod
+    def add_wait_time(cls, wait_type, seconds):
+        """
+        Registers time spent waiting for the check which is being executed by the calling thread
+        :param wait_type: type of the wait (eg. CheckMetrics.LOCK_WAIT)
+        :type wait_type: str
+        :param seconds: time waited
+        :type seconds: float
+        :return: None
+        :rtype: NoneType
+        """
+        current = cls.get_current()
+        if current is None:
+            return
+        with current._lock:
+            current.wait_times[wait_type] = current.wait_times.get(wait_type, 0.0) + seconds
+
+    def to_dict(self):
+        """
+        Returns the collected metrics in a serializable form
+        :return: wall time, cpu time and wait times (in seconds) and the amount of external calls
+        :rtype: dict
+        """
+        with self._lock:
+            return {'wall_time': round(self.wall_time, 3) if self.wall_time is not None else None,
+                    'cpu_time': round(self.cpu_time, 3) if self.cpu_time is not None else None,
+                    'wait_times': dict((wait_type, round(seconds, 3)) for wait_type, seconds in self.wait_times.iteritems()),
+                    'calls': dict(self.calls)}
+
+    @classmethod
+    def _get_thread_cpu_time(cls):
+        """
+        Gets the cpu time consumed by the calling thread. Checks executed concurrently do not influence each other
+        :return: user and system time in seconds
+        :rtype: float
+        """
+        usage = resource.getrusage(cls.RUSAGE_THREAD)
+        return usage.ru_utime + usage.ru_stime
@@ -19,7 +19,11 @@
 """
 Result processing module for the health check
 """
+import sys
+import json
+import time
 import inspect
+import threading
 import collections
 from ovs.extensions.healthcheck.config.error_codes import ErrorCodes
 
@@ -81,6 +85,15 @@ class HCResults(object):
             self._result = result
             self._test_name = test_name
 
+        @property
+        def context(self):
+            """
+            Context of the node the healthcheck is running on
+            :return: the context of the HCResults instance
+            :rtype: ovs.extensions.healthcheck.helpers.context.NodeContext
+            """
+            return self._result.context
+
         def __getattr__(self, item):
             """
             Get attribute. This method should point to the method of the parent (HCResults instance)
@@ -101,18 +114,27 @@ class HCResults(object):
     }
     LINE_COLOR = '\033[0m'
 
-    def __init__(self, unattended=False, to_json=False):
+    def __init__(self, unattended=False, to_json=False, context=None, stream=None, to_ndjson=False):
         """
         Init method
         :param unattended: unattended output
         :type unattended: bool
         :param to_json: json output
         :type to_json: bool
+        :param context: context of the node the checks are executed on. Defaults to the context of the current run
+        :type context: ovs.extensions.healthcheck.helpers.context.NodeContext
+        :param stream: file-like object the output is written to. Defaults to stdout
+        :type stream: file
+        :param to_ndjson: streamed json output. Every message and every finished test is written as a json record on a separate line
+        :type to_ndjson: bool
         """
         self.unattended = unattended
         self.to_json = to_json
+        self.to_ndjson = to_ndjson
+        self.stream = stream
+        self._context = context
 
-        self.print_progress = not(to_json or unattended)
+        self.print_progress = not(to_json or unattended or to_ndjson)
         # Setup HC counters
         self.counters = {}
         for severity in Severities.get_severities():
@@ -120,6 +142,27 @@ class HCResults(object):
 
         # Result of healthcheck in dict form
         self.result_dict = {}
+        # Execution metrics of every finished test, by test name
+        self.test_metrics = {}
+        # Every message reported by a test, in order of reporting, by test name. Allows the results to be replayed
+        self.test_records = {}
+        # Measurements attached to the results of a test, by test name (see add_data)
+        self.test_data = {}
+        # Checks can report concurrently (see HealthCheckCLIRunner --jobs)
+        self._lock = threading.RLock()
+
+    @property
+    def context(self):
+        """
+        Context of the node the checks are executed on. Passed on to every check through the result collector
+        :return: the node context
+        :rtype: ovs.extensions.healthcheck.helpers.context.NodeContext
+        """
+        if self._context is None:
+            # Imported here as the context depends on the framework while the result processing does not
+            from ovs.extensions.healthcheck.helpers.context import NodeContext
+            self._context = NodeContext.get_current()
+        return self._context
 
     def _call(self, add_to_result, message, code, severity, test_name=''):
         """
@@ -134,23 +177,140 @@ class HCResults(object):
         :type severity: ovs.extensions.healthcheck.result.Severity
         :return:
         """
-        print_value = severity.print_value
-        if add_to_result is True and test_name:
-            if severity.value != -1:
-                if test_name not in self.result_dict:
-                    empty_messages = sorted([(sev.type, []) for sev in Severities.get_severities() if sev.value != -1])
-                    # noinspection PyArgumentList
-                    self.result_dict[test_name] = {"state": print_value,
-                                                   'messages': collections.OrderedDict(empty_messages)}
-                messages = self.result_dict[test_name]['messages']
-                messages[severity.type].append({'code': code, 'message': message})
-                result_severity = Severities.get_severity_by_print_value(self.result_dict[test_name]['state'])
-                if severity.value > result_severity.value:
-                    self.result_dict[test_name]['state'] = print_value
-                self.result_dict[test_name]["messages"] = messages
-        self.counters[print_value] += 1
-        if self.print_progress:
-            print "{0}[{1}] {2}{3}".format(severity.color, print_value, self.LINE_COLOR, str(message))
+        with self._lock:
+            print_value = severity.print_value
+            if test_name:
+                self.test_records.setdefault(test_name, []).append({'severity': severity.type,
+                                                                    'message': message,
+                                                                    'code': code,
+                                                                    'add_to_result': add_to_result})
+            if add_to_result is True and test_name:
+                if severity.value != -1:
+                    if test_name not in self.result_dict:
+                        empty_messages = sorted([(sev.type, []) for sev in Severities.get_severities() if sev.value != -1])
+                        # noinspection PyArgumentList
+                        self.result_dict[test_name] = {"state": print_value,
+                                                       'messages': collections.OrderedDict(empty_messages)}
+                        if test_name in self.test_data:
+                            self.result_dict[test_name]['data'] = self.test_data[test_name]
+                    messages = self.result_dict[test_name]['messages']
+                    messages[severity.type].append({'code': code, 'message': message})
+                    result_severity = Severities.get_severity_by_print_value(self.result_dict[test_name]['state'])
+                    if severity.value > result_severity.value:
+                        self.result_dict[test_name]['state'] = print_value
+                    self.result_dict[test_name]["messages"] = messages
+            self.counters[print_value] += 1
+            if self.print_progress:
+                print >> self.stream, "{0}[{1}] {2}{3}".format(severity.color, print_value, self.LINE_COLOR, str(message))
+            if self.to_ndjson:
+                self._write_record({'type': 'message',
+                                    'test_name': test_name or None,
+                                    'severity': print_value,
+                                    'code': code,
+                                    'message': str(message),
+                                    'timestamp': time.time()})
+
+    def _write_record(self, record):
+        """
+        Writes a json record on a line of its own. The output is flushed so consumers can process the record immediately
+        :param record: record to write
+        :type record: dict
+        :return: None
+        :rtype: NoneType
+        """
+        stream = self.stream or sys.stdout
+        stream.write(json.dumps(record, sort_keys=True) + '\n')
+        stream.flush()
+
+    def finish_test(self, test_name, metrics):
+        """
+        Registers the execution metrics of a finished test
+        :param test_name: name of the finished test
+        :type test_name: str
+        :param metrics: execution metrics of the test (see ovs.extensions.healthcheck.metrics.CheckMetrics.to_dict)
+        :type metrics: dict
+        :return: None
+        :rtype: NoneType
+        """
+        with self._lock:
+            self.test_metrics[test_name] = metrics
+            if test_name in self.result_dict:
+                self.result_dict[test_name]['metrics'] = metrics
+            if self.to_ndjson:
+                test_result = self.result_dict.get(test_name, {})
+                self._write_record({'type': 'test',
+                                    'test_name': test_name,
+                                    'state': test_result.get('state'),
+                                    'messages': test_result.get('messages'),
+                                    'data': self.test_data.get(test_name),
+                                    'metrics': metrics,
+                                    'timestamp': time.time()})
+
+    def get_test_records(self, test_name):
+        """
+        Gets all messages reported by a test
+        :param test_name: name of the test
+        :type test_name: str
+        :return: the reported messages in order of reporting
+        :rtype: list[dict]
+        """
+        with self._lock:
+            return [record.copy() for record in self.test_records.get(test_name, [])]
+
+    def replay_test(self, test_name, records, metrics=None):
+        """
+        Reports the messages of a test which were recorded by another instance (see get_test_records)
+        The output, counters and results are identical to those of the test reporting the messages itself
+        :param test_name: name of the test
+        :type test_name: str
+        :param records: recorded messages of the test
+        :type records: list[dict]
+        :param metrics: recorded execution metrics of the test
+        :type metrics: dict
+        :return: None
+        :rtype: NoneType
+        """
+        with self._lock:
+            for record in records:
+                if 'data' in record:
+                    for key, value in record['data'].iteritems():
+                        self.add_data(key, value, test_name=test_name)
+                    continue
+                self._call(add_to_result=record['add_to_result'], message=record['message'], code=record['code'],
+                           severity=getattr(Severities, record['severity']), test_name=test_name)
+            if metrics is not None:
+                self.finish_test(test_name, metrics)
+
+    def add_data(self, key, value, test_name=''):
+        """
+        Attaches measurements to the results of a test. They are reported under 'data' in the json output
+        :param key: name of the measurements
+        :type key: str
+        :param value: the measurements. Must be serializable as json
+        :type value: object
+        :param test_name: name of the test
+        :type test_name: str
+        :return: None
+        :rtype: NoneType
+        """
+        if not test_name:
+            return
+        with self._lock:
+            self.test_data.setdefault(test_name, {})[key] = value
+            self.test_records.setdefault(test_name, []).append({'data': {key: value}})
+            if test_name in self.result_dict:
+                self.result_dict[test_name]['data'] = self.test_data[test_name]
+
+    def get_slowest_tests(self, amount):
+        """
+        Lists the tests which took the longest to execute
+        :param amount: maximum amount of tests to list
+        :type amount: int
+        :return: list of test names and their metrics, slowest first
+        :rtype: list[tuple(str, dict)]
+        """
+        with self._lock:
+            return sorted(self.test_metrics.iteritems(), key=lambda item: item[1]['wall_time'], reverse=True)[:amount]
 
     def get_results(self):
         """
@@ -162,10 +322,13 @@ class HCResults(object):
         if self.unattended:
                 for key, value in sorted(self.result_dict.items(), key=lambda x: x[0]):
                     if value not in excluded_messages:
-                            print "{0} {1}".format(key, value["state"])
+                            print >> self.stream, "{0} {1}".format(key, value["state"])
         if self.to_json:
-            import json
-            print json.dumps(self.result_dict, indent=4, sort_keys=True)
+            print >> self.stream, json.dumps(self.result_dict, indent=4, sort_keys=True)
+        if self.to_ndjson:
+            self._write_record({'type': 'recap',
+                                'counters': dict((key, value) for key, value in self.counters.iteritems() if key not in excluded_messages),
+                                'timestamp': time.time()})
         return self.result_dict
 
     def failure(self, msg, add_to_result=True, code=ErrorCodes.default.error_code, **kwargs):
@@ -0,0 +1,134 @@
+# Copyright (C) 2017 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+
+"""
+Scheduler module for the health check
+"""
+import time
+
+
+class CheckScheduler(object):
+    """
+    Keeps track of when every check has to be executed again
+    Every check has its own interval. The interval is looked up by test name (eg. alba-disk-safety-test),
+    then by module name (eg. alba) and defaults to the 'default' interval
+    """
+    DEFAULT_INTERVAL = 60  # Seconds
+    DEFAULT_KEY = 'default'
+    SETTINGS_KEY = 'check_intervals'
+
+    def __init__(self, intervals=None):
+        """
+        Initialize the scheduler
+        :param intervals: interval in seconds by test name or module name. The 'default' key applies to all other checks
+        :type intervals: dict
+        """
+        self.intervals = intervals or {}
+        # Start time of the latest execution by test name
+        self._last_runs = {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+        Creates a scheduler with the intervals configured in the healthcheck settings
+        :param settings: the healthcheck settings (see ovs.extensions.healthcheck.helpers.context.NodeContext.settings)
+        :type settings: dict
+        :return: the scheduler
+        :rtype: CheckScheduler
+        """
+        return cls(settings.get(cls.SETTINGS_KEY))
+
+    @staticmethod
+    def get_test_name(method_pointer):
+        """
+        Gets the test name of a check
+        :param method_pointer: check exposed by expose_to_cli
+        :type method_pointer: function
+        :return: the test name (eg. alba-disk-safety-test)
+        :rtype: str
+        """
+        return '{0}-{1}'.format(method_pointer.expose_to_cli['module_name'], method_pointer.expose_to_cli['method_name'])
+
+    def get_interval(self, method_pointer):
+        """
+        Gets the interval of a check
+        :param method_pointer: check exposed by expose_to_cli
+        :type method_pointer: function
+        :return: seconds between two executions of the check
+        :rtype: int
+        """
+        for key in [self.get_test_name(method_pointer), method_pointer.expose_to_cli['module_name'], self.DEFAULT_KEY]:
+            if key in self.intervals:
+                return self.intervals[key]
+        return self.DEFAULT_INTERVAL
+
+    def get_due(self, method_pointers, now=None):
+        """
+        Lists the checks which have to be executed. A check that has never been executed is always due
+        :param method_pointers: all checks
+        :type method_pointers: list[function]
+        :param now: point in time to evaluate. Defaults to the current time
+        :type now: float
+        :return: the checks which have to be executed
+        :rtype: list[function]
+        """
+        if now is None:
+            now = time.time()
+        return [method_pointer for method_pointer in method_pointers if self.get_next_run(method_pointer) <= now]
+
+    def get_next_run(self, method_pointer):
+        """
+        Gets the point in time the check has to be executed again
+        :param method_pointer: check exposed by expose_to_cli
+        :type method_pointer: function
+        :return: timestamp of the next execution. 0 when the check has never been executed
+        :rtype: float
+        """
+        last_run = self._last_runs.get(self.get_test_name(method_pointer))
+        if last_run is None:
+            return 0
+        return last_run + self.get_interval(method_pointer)
+
+    def get_time_until_due(self, method_pointers, now=None):
+        """
+        Gets the time until the first of the checks becomes due
+        :param method_pointers: all checks
+        :type method_pointers: list[function]
+        :param now: point in time to evaluate. Defaults to the current time
+        :type now: float
+        :return: seconds until a check has to be executed
+        :rtype: float
+        """
+        if now is None:
+            now = time.time()
+        if len(method_pointers) == 0:
+            return self.DEFAULT_INTERVAL
+        return max(0, min(self.get_next_run(method_pointer) for method_pointer in method_pointers) - now)
+
+    def mark_started(self, method_pointers, timestamp=None):
+        """
+        Registers the execution of checks
+        :param method_pointers: the executed checks
+        :type method_pointers: list[function]
+        :param timestamp: start time of the execution. Defaults to the current time
+        :type timestamp: float
+        :return: None
+        :rtype: NoneType
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        for method_pointer in method_pointers:
+            self._last_runs[self.get_test_name(method_pointer)] = timestamp
@@ -24,17 +24,17 @@ class AlbaTest(object):
             return {
                 'mybackend02': {
                     '1,2': {
-                        'max_disk_safety': 2, 'current_disk_safety': {2: [{'namespace': 'b4eef27e-ef54-4fe8-8658-cdfbda7ceae4_000000065', 'amount_in_bucket': 100}]}
+                        'max_disk_safety': 2, 'current_disk_safety': {2: {'namespace_count': 1, 'namespaces': [], 'since': None}}
                     }
                 },
                 'mybackend': {
                     '1,2': {
-                        'max_disk_safety': 2, 'current_disk_safety': {1: [{'namespace': 'b4eef27e-ef54-4fe8-8658-cdfbda7ceae4_000000065', 'amount_in_bucket': 100}]}
+                        'max_disk_safety': 2, 'current_disk_safety': {1: {'namespace_count': 1, 'since': 1500000000, 'namespaces': [{'namespace': 'b4eef27e-ef54-4fe8-8658-cdfbda7ceae4_000000065', 'amount_in_bucket': 100.0, 'since': 1500000000}]}}
                     }
                 },
                 'mybackend-global': {
-                    '1,2': {'max_disk_safety': 2, 'current_disk_safety': {0: [{'namespace': 'e88c88c9-632c-4975-b39f-e9993e352560', 'amount_in_bucket': 100}]}},
-                    '1,3': {'max_disk_safety': 3, 'current_disk_safety': {0: [{'namespace': 'e88c88c9-632c-4975-b39f-e9993e352560', 'amount_in_bucket': 100}]}}
+                    '1,2': {'max_disk_safety': 2, 'current_disk_safety': {0: {'namespace_count': 1, 'since': 1500000000, 'namespaces': [{'namespace': 'e88c88c9-632c-4975-b39f-e9993e352560', 'amount_in_bucket': 100.0, 'since': 1500000000}]}}},
+                    '1,3': {'max_disk_safety': 3, 'current_disk_safety': {0: {'namespace_count': 1, 'since': 1500000000, 'namespaces': [{'namespace': 'e88c88c9-632c-4975-b39f-e9993e352560', 'amount_in_bucket': 100.0, 'since': 1500000000}]}}}
                 },
             }
 
@@ -0,0 +1,132 @@
+# Copyright (C) 2016 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+import time
+import pickle
+import uuid
+import unittest
+from ovs.extensions.healthcheck.helpers.cache import CacheHelper
+from ovs.extensions.healthcheck.helpers.disksafety import DiskSafetyAggregator, DiskSafetyTimeline
+
+
+class DiskSafetyTester(unittest.TestCase):
+
+    ITEM_SIZE_LIMIT = 1024 * 1024  # Items of memcache are limited to 1MB
+
+    def setUp(self):
+        # Keep the timelines in memory instead of the volatile store. Like memcache, items which are too large are dropped
+        self._store = {}
+        self._cache_methods = CacheHelper.__dict__['get'], CacheHelper.__dict__['set'], CacheHelper.__dict__['delete']
+        CacheHelper.get = staticmethod(lambda key=None, raw=False: {'item': self._store[key][0], 'time_updated': self._store[key][1]} if key in self._store else None)
+        CacheHelper.set = staticmethod(self._set)
+        CacheHelper.delete = staticmethod(lambda key=None: self._store.pop(key, None))
+
+    def tearDown(self):
+        CacheHelper.get, CacheHelper.set, CacheHelper.delete = self._cache_methods
+
+    def _set(self, item, key=None, expire_time=0):
+        if len(pickle.dumps(item)) > self.ITEM_SIZE_LIMIT:
+            self._store.pop(key, None)
+            return False
+        self._store[key] = (item, time.time())
+        return True
+
+    @staticmethod
+    def _get_bucket_safety(*buckets):
+        return [{'bucket': [1, 2, 3, 2], 'count': count, 'remaining_safety': remaining_safety} for remaining_safety, count in buckets]
+
+    def test_aggregation(self):
+        aggregator = DiskSafetyAggregator(top_size=2)
+        aggregator.add_policy([1, 2, 3, 2])
+        aggregator.add_policy([2, 1, 3, 2])
+        aggregator.add_namespace('ns1', self._get_bucket_safety((2, 10)))
+        aggregator.add_namespace('ns2', self._get_bucket_safety((2, 3), (1, 1)))
+        aggregator.add_namespace('ns3', self._get_bucket_safety((1, 4)))
+        aggregator.add_namespace('ns4', self._get_bucket_safety((0, 1), (2, 7)))
+        aggregator.add_namespace('ns5', self._get_bucket_safety((1, 1), (2, 1)))
+        overview = aggregator.get_overview()
+        self.assertEqual(aggregator.namespace_count, 5)
+        self.assertEqual(overview['2,1'], {'max_disk_safety': 1, 'current_disk_safety': {}})
+        current_disk_safety = overview['1,2']['current_disk_safety']
+        self.assertEqual(current_disk_safety[2], {'namespace_count': 4, 'namespaces': [], 'since': None})
+        # Only the top_size least safe namespaces are kept, largest part of their objects first
+        self.assertEqual(current_disk_safety[1], {'namespace_count': 3, 'since': None, 'namespaces': [{'namespace': 'ns3', 'amount_in_bucket': 100.0, 'since': None},
+                                                                                                      {'namespace': 'ns5', 'amount_in_bucket': 50.0, 'since': None}]})
+        self.assertEqual(current_disk_safety[0], {'namespace_count': 1, 'since': None, 'namespaces': [{'namespace': 'ns4', 'amount_in_bucket': 12.5, 'since': None}]})
+
+    def test_timeline(self):
+        timeline = DiskSafetyTimeline('backend', now=1000)
+        self.assertEqual(timeline.update('ns1', set([0])), {0: 1000})
+        self.assertEqual(timeline.update('ns2', set([0, 1])), {0: 1000, 1: 1000})
+        timeline.save()
+        # A namespace keeps its timestamp while it stays at the remaining safety
+        aggregator = DiskSafetyAggregator(timeline=DiskSafetyTimeline('backend', now=5000))
+        aggregator.add_namespace('ns1', self._get_bucket_safety((0, 1), (1, 1)))
+        aggregator.add_namespace('ns3', self._get_bucket_safety((0, 1)))
+        aggregator.add_namespace('ns2', self._get_bucket_safety((2, 1)))
+        aggregator.timeline.save()
+        current_disk_safety = aggregator.get_overview()['1,2']['current_disk_safety']
+        self.assertEqual(current_disk_safety[0]['since'], 1000)
+        self.assertEqual(sorted((ns['namespace'], ns['since']) for ns in current_disk_safety[0]['namespaces']), [('ns1', 1000), ('ns3', 5000)])
+        self.assertEqual(current_disk_safety[1]['since'], 5000)
+        # Safe namespaces are dropped
+        self.assertEqual(DiskSafetyTimeline('backend', now=6000).update('ns2', set([0])), {0: 6000})
+
+    def test_timeline_size(self):
+        # The state of 20k unsafe namespaces exceeds the item size limit, it has to be spread over multiple items
+        namespaces = [str(uuid.UUID(int=index)) for index in xrange(20000)]
+        timeline = DiskSafetyTimeline('backend', now=1000)
+        for namespace in namespaces:
+            timeline.update(namespace, set([0, 1]))
+        self.assertGreater(len(pickle.dumps(timeline._state)), self.ITEM_SIZE_LIMIT)
+        self.assertTrue(timeline.save())
+        timeline = DiskSafetyTimeline('backend', now=5000)
+        self.assertTrue(timeline.intact)
+        self.assertEqual(timeline.update(namespaces[-1], set([0, 1])), {0: 1000, 1: 1000})
+        # Fewer unsafe namespaces need fewer shards, the others are removed
+        self.assertTrue(timeline.save())
+        self.assertEqual(len(self._store), 2)
+        self.assertEqual(DiskSafetyTimeline('backend', now=6000).update(namespaces[-1], set([0])), {0: 1000})
+
+    def test_timeline_lost(self):
+        aggregator = DiskSafetyAggregator(timeline=DiskSafetyTimeline('backend', now=1000))
+        for index in xrange(3 * DiskSafetyTimeline.SHARD_SIZE):
+            aggregator.add_namespace('ns{0}'.format(index), self._get_bucket_safety((0, 1)))
+        self.assertTrue(aggregator.timeline.save())
+        self.assertEqual(aggregator.get_overview()['1,2']['current_disk_safety'][0]['since'], 1000)
+        # A shard which got evicted makes the timestamps unreliable: they are no longer reported
+        self._store.pop(DiskSafetyTimeline.SHARD_KEY.format('backend', 1))
+        timeline = DiskSafetyTimeline('backend', now=5000)
+        self.assertFalse(timeline.intact)
+        aggregator = DiskSafetyAggregator(timeline=timeline)
+        aggregator.add_namespace('ns0', self._get_bucket_safety((0, 1)))
+        timeline.save()
+        current_disk_safety = aggregator.get_overview()['1,2']['current_disk_safety'][0]
+        self.assertEqual((current_disk_safety['since'], current_disk_safety['namespaces'][0]['since']), (None, None))
+        # So are the timestamps of a state which the volatile store does not keep
+        self.ITEM_SIZE_LIMIT = 0
+        timeline = DiskSafetyTimeline('backend', now=6000)
+        timeline.update('ns1', set([0]))
+        self.assertFalse(timeline.save())
+        self.assertFalse(timeline.intact)
+
+
+def suite():
+    """
+    Gather all the tests from this module in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(DiskSafetyTester))
+    return test_suite
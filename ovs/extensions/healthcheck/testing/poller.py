@@ -0,0 +1,61 @@
+# Copyright (C) 2016 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+import time
+import unittest
+from ovs.extensions.healthcheck.helpers.poller import Poller
+
+
+class PollerTester(unittest.TestCase):
+
+    def test_poll_until_result(self):
+        calls = []
+
+        def ready_on_third_call():
+            calls.append(1)
+            return 'done' if len(calls) == 3 else None
+
+        poller = Poller(timeout=5, interval=0.01)
+        self.assertEqual(poller.poll(ready_on_third_call), 'done')
+        self.assertEqual(poller.attempts, 3)
+        # Slept 0.01 and 0.02 seconds
+        self.assertLess(poller.elapsed, 1)
+
+    def test_poll_deadline(self):
+        poller = Poller(timeout=0.2, interval=0.05, max_interval=0.1)
+        self.assertIsNone(poller.poll(lambda: None))
+        self.assertGreaterEqual(poller.elapsed, 0.2)
+        self.assertLess(poller.elapsed, 0.5)
+
+    def test_poll_jitter(self):
+        sleeps = []
+        original_sleep = time.sleep
+        time.sleep = sleeps.append
+        try:
+            Poller(timeout=5, interval=0.1, max_interval=0.1, jitter=0.5).poll(lambda: 'done' if len(sleeps) == 20 else None)
+        finally:
+            time.sleep = original_sleep
+        self.assertEqual(len(sleeps), 20)
+        self.assertTrue(all(0.05 <= sleep <= 0.1 for sleep in sleeps))
+        self.assertGreater(len(set(sleeps)), 1)
+
+
+def suite():
+    """
+    Gather all the tests from this module in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(PollerTester))
+    return test_suite
@@ -0,0 +1,58 @@
+# Copyright (C) 2016 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+import unittest
+from ovs.extensions.healthcheck.scheduler import CheckScheduler
+
+
+class SchedulerTester(unittest.TestCase):
+
+    @staticmethod
+    def make_check(module_name, method_name):
+        def check(result_handler):
+            pass
+        check.expose_to_cli = {'module_name': module_name, 'method_name': method_name, 'addon_type': 'healthcheck'}
+        return check
+
+    def test_intervals(self):
+        scheduler = CheckScheduler({'default': 10, 'alba': 20, 'alba-disk-safety-test': 30})
+        self.assertEqual(scheduler.get_interval(self.make_check('ovs', 'dns-test')), 10)
+        self.assertEqual(scheduler.get_interval(self.make_check('alba', 'backend-test')), 20)
+        self.assertEqual(scheduler.get_interval(self.make_check('alba', 'disk-safety-test')), 30)
+        self.assertEqual(CheckScheduler().get_interval(self.make_check('ovs', 'dns-test')), CheckScheduler.DEFAULT_INTERVAL)
+
+    def test_due(self):
+        fast_check = self.make_check('ovs', 'dns-test')
+        slow_check = self.make_check('alba', 'disk-safety-test')
+        checks = [fast_check, slow_check]
+        scheduler = CheckScheduler({'default': 10, 'alba-disk-safety-test': 30})
+        # Checks which have never been executed are due
+        self.assertEqual(scheduler.get_due(checks, now=100), checks)
+        scheduler.mark_started(checks, timestamp=100)
+        self.assertEqual(scheduler.get_due(checks, now=105), [])
+        self.assertEqual(scheduler.get_time_until_due(checks, now=105), 5)
+        self.assertEqual(scheduler.get_due(checks, now=110), [fast_check])
+        scheduler.mark_started([fast_check], timestamp=110)
+        self.assertEqual(scheduler.get_due(checks, now=130), checks)
+        self.assertEqual(scheduler.get_time_until_due(checks, now=130), 0)
+
+
+def suite():
+    """
+    Gather all the tests from this module in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(SchedulerTester))
+    return test_suite
@@ -0,0 +1,43 @@
+# Copyright (C) 2016 iNuron NV
+#
+# This file is part of Open vStorage Open Source Edition (OSE),
+# as available from
+#
+#      http://www.openvstorage.org and
+#      http://www.openvstorage.com.
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License v3 (GNU AGPLv3)
+# as published by the Free Software Foundation, in version 3 as it comes
+# in the LICENSE.txt file of the Open vStorage OSE distribution.
+#
+# Open vStorage is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY of any kind.
+import unittest
+from ovs.extensions.healthcheck.helpers.statistics import StatisticsHelper
+
+
+class StatisticsTester(unittest.TestCase):
+
+    def test_percentiles(self):
+        values = [0.4, 0.1, 0.3, 0.2, 0.5]
+        self.assertEqual(StatisticsHelper.get_percentile(values, 50), 0.3)
+        self.assertAlmostEqual(StatisticsHelper.get_percentile(values, 90), 0.46)
+        self.assertEqual(StatisticsHelper.get_percentile([0.7], 99), 0.7)
+        self.assertIsNone(StatisticsHelper.get_percentile([], 50))
+        self.assertEqual(sorted(StatisticsHelper.get_percentiles(values).keys()), ['p50', 'p90', 'p99'])
+
+    def test_outliers(self):
+        latencies = {'asd1': 0.01, 'asd2': 0.012, 'asd3': 0.011, 'asd4': 0.5, 'asd5': 0.07}
+        self.assertEqual(StatisticsHelper.get_outliers(latencies, factor=5), {'asd4': 0.5, 'asd5': 0.07})
+        self.assertEqual(StatisticsHelper.get_outliers(latencies, factor=5, minimum=0.1), {'asd4': 0.5})
+        self.assertEqual(StatisticsHelper.get_outliers({}, factor=5), {})
+
+
+def suite():
+    """
+    Gather all the tests from this module in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(StatisticsTester))
+    return test_suite
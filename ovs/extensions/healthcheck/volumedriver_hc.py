@@ -18,7 +18,7 @@ import subprocess
 import timeout_decorator
 from ovs.dal.exceptions import ObjectNotFoundException
 from ovs.extensions.generic.configuration import Configuration
-from ovs.extensions.generic.system import System
+from ovs.extensions.healthcheck.decorators import main_thread_only
 from ovs.extensions.healthcheck.expose_to_cli import expose_to_cli, HealthCheckCLIRunner
 from ovs.extensions.healthcheck.helpers.exceptions import VDiskNotFoundError
 from ovs.extensions.healthcheck.helpers.vdisk import VDiskHelper
@@ -35,8 +35,6 @@ class VolumedriverHealthCheck(object):
     """
 
     MODULE = 'volumedriver'
-    LOCAL_SR = System.get_my_storagerouter()
-    LOCAL_ID = System.get_my_machine_id()
     VDISK_CHECK_SIZE = 1024 ** 3  # 1GB in bytes
     VDISK_TIMEOUT_BEFORE_DELETE = 0.5
 
@@ -51,10 +49,10 @@ class VolumedriverHealthCheck(object):
         :rtype: NoneType
         """
         # Fetch vdisks hosted on this machine
-        VolumedriverHealthCheck.LOCAL_SR.invalidate_dynamics('vdisks_guids')
-        if len(VolumedriverHealthCheck.LOCAL_SR.vdisks_guids) == 0:
+        result_handler.context.storagerouter.invalidate_dynamics('vdisks_guids')
+        if len(result_handler.context.storagerouter.vdisks_guids) == 0:
             return result_handler.skip('No VDisks present in cluster.')
-        for vdisk_guid in VolumedriverHealthCheck.LOCAL_SR.vdisks_guids:
+        for vdisk_guid in result_handler.context.storagerouter.vdisks_guids:
             try:
                 vdisk = VDiskHelper.get_vdisk_by_guid(vdisk_guid)
                 vdisk.invalidate_dynamics(['dtl_status', 'info'])
@@ -141,15 +139,15 @@ class VolumedriverHealthCheck(object):
             result_handler.skip('No vPools found!')
             return
         for vp in vpools:
-            name = 'ovs-healthcheck-test-{0}.raw'.format(VolumedriverHealthCheck.LOCAL_ID)
-            if vp.guid not in VolumedriverHealthCheck.LOCAL_SR.vpools_guids:
+            name = 'ovs-healthcheck-test-{0}.raw'.format(result_handler.context.machine_id)
+            if vp.guid not in result_handler.context.storagerouter.vpools_guids:
                 result_handler.skip('Skipping vPool {0} because it is not living here.'.format(vp.name))
                 continue
             try:
                 # delete if previous vdisk with this name exists
                 storagedriver_guid = next((storagedriver.guid for storagedriver in vp.storagedrivers
                                            if storagedriver.storagedriver_id == vp.name +
-                                           VolumedriverHealthCheck.LOCAL_ID))
+                                           result_handler.context.machine_id))
                 # create a new one
                 volume = VolumedriverHealthCheck._check_volumedriver(name, storagedriver_guid, result_handler)
 
@@ -185,6 +183,7 @@ class VolumedriverHealthCheck(object):
                     pass
 
     @staticmethod
+    @main_thread_only
     @expose_to_cli(MODULE, 'halted-volumes-test', HealthCheckCLIRunner.ADDON_TYPE)
     def check_for_halted_volumes(result_handler):
         """
@@ -202,7 +201,7 @@ class VolumedriverHealthCheck(object):
             return
 
         for vp in vpools:
-            if vp.guid not in VolumedriverHealthCheck.LOCAL_SR.vpools_guids:
+            if vp.guid not in result_handler.context.storagerouter.vpools_guids:
                 result_handler.skip('Skipping vPool {0} because it is not living here.'.format(vp.name))
                 continue
 
@@ -308,8 +307,8 @@ class VolumedriverHealthCheck(object):
             result_handler.skip('No vPools found!')
             return
         for vp in vpools:
-            name = 'ovs-healthcheck-test-{0}'.format(VolumedriverHealthCheck.LOCAL_ID)
-            if vp.guid not in VolumedriverHealthCheck.LOCAL_SR.vpools_guids:
+            name = 'ovs-healthcheck-test-{0}'.format(result_handler.context.machine_id)
+            if vp.guid not in result_handler.context.storagerouter.vpools_guids:
                 result_handler.skip('Skipping vPool {0} because it is not living here.'.format(vp.name))
                 continue
             try:
@@ -19,8 +19,17 @@ Entrance point for bash (scripts/healthcheck.sh)
 """
 if __name__ == '__main__':
     import sys
-    from ovs.extensions.healthcheck.expose_to_cli import HealthCheckCLIRunner
+    from ovs.extensions.healthcheck.client import HealthCheckClient
     arguments = sys.argv
     # Remove filename
     del arguments[0]
-    HealthCheckCLIRunner.run_method(*arguments)
+    if '--daemon' in arguments:
+        from ovs.extensions.healthcheck.daemon import HealthCheckDaemon
+        HealthCheckDaemon.run_daemon(*arguments)
+    elif '--cluster' in arguments:
+        from ovs.extensions.healthcheck.cluster import ClusterRunner
+        ClusterRunner.run_method(*HealthCheckClient.remove_client_flags(arguments))
+    elif HealthCheckClient.run(arguments) is None:
+        # Not answered by the daemon. Only import the healthcheck when executing the checks
+        from ovs.extensions.healthcheck.expose_to_cli import HealthCheckCLIRunner
+        HealthCheckCLIRunner.run_method(*HealthCheckClient.remove_client_flags(arguments))
@@ -18,3 +18,14 @@
 chown ovs:ovs /opt/OpenvStorage/scripts/healthcheck.sh
 chmod 755 /opt/OpenvStorage/scripts/healthcheck.sh
 chmod +x /opt/OpenvStorage/scripts/healthcheck.sh
+
+cp /opt/OpenvStorage/config/healthcheck/ovs-healthcheck.service /usr/lib/systemd/system/ovs-healthcheck.service
+systemctl daemon-reload
+if [ "$1" -eq 1 ]; then
+    # First installation
+    systemctl enable ovs-healthcheck.service
+    systemctl start ovs-healthcheck.service
+elif systemctl is-enabled --quiet ovs-healthcheck.service; then
+    # Upgrade: only restart a daemon which was not disabled
+    systemctl restart ovs-healthcheck.service
+fi